@@ -7,10 +7,19 @@ Author: Klaus Begnis
 Copyright (c) 2025 Estufa Dashboard. All rights reserved.
 """
 
-from fastapi import HTTPException, Request
+import datetime as dt
+from collections.abc import AsyncGenerator
+from typing import Annotated
 
+from fastapi import Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services.database.base_client._async_dbclient import IAsyncDBClient
+from app.services.database.deletions import DeletionWorker
+from app.services.database.measurement_queries import MeasurementWindow
 from app.services.database.psg_client import PSGClient
-from app.services.mqtt.interfaces import IMQTTPublisher
+from app.services.mqtt.interfaces import IMQTTConsumer, IMQTTPublisher
+from app.services.mqtt.sensor_cache import SensorCache
 
 
 def get_db_client(request: Request) -> PSGClient:
@@ -35,6 +44,53 @@ def get_db_client(request: Request) -> PSGClient:
     return db_client
 
 
+def get_async_db_client(request: Request) -> IAsyncDBClient:
+    """
+    FastAPI dependency to get the async database client from app state.
+
+    Routes await this client, so their queries do not block the event loop.
+
+    Args:
+        request: FastAPI Request object (injected by dependency system).
+
+    Returns:
+        IAsyncDBClient: The async database client instance.
+
+    Raises:
+        HTTPException: If the async database client is not available.
+    """
+    async_db_client = request.app.state.async_db_client
+    if not async_db_client:
+        raise HTTPException(
+            status_code=500,
+            detail="Database connection not available",
+        )
+    return async_db_client
+
+
+async def get_db_session(
+    db_client: Annotated[IAsyncDBClient, Depends(get_async_db_client)],
+) -> AsyncGenerator[AsyncSession]:
+    """
+    FastAPI dependency that opens a database session for the request.
+
+    Database client calls awaited by the route use this session (one pooled
+    connection at a time per request) and it is closed when the request
+    ends. Declared with ``async def`` so the session is visible to the
+    route, which runs in the same context.
+
+    Args:
+        db_client: The async database client (injected by dependency system).
+
+    Yields:
+        AsyncSession: The session of the request.
+    """
+    # FastAPI runs a yield dependency to completion (or closes it) when the
+    # request ends, so the session is always closed
+    async with db_client.request_session() as session:
+        yield session  # noqa: ASYNC119
+
+
 def get_mqtt_publisher(request: Request) -> IMQTTPublisher:
     """
     FastAPI dependency to get MQTT publisher from app state.
@@ -55,3 +111,98 @@ def get_mqtt_publisher(request: Request) -> IMQTTPublisher:
             detail="MQTT publisher not available",
         )
     return mqtt_publisher
+
+
+def get_mqtt_consumer(request: Request) -> IMQTTConsumer:
+    """
+    FastAPI dependency to get MQTT consumer from app state.
+
+    Args:
+        request: FastAPI Request object (injected by dependency system).
+
+    Returns:
+        IMQTTConsumer: The MQTT consumer instance.
+
+    Raises:
+        HTTPException: If MQTT consumer is not available.
+    """
+    mqtt_consumer = request.app.state.mqtt_consumer
+    if not mqtt_consumer:
+        raise HTTPException(
+            status_code=500,
+            detail="MQTT consumer not available",
+        )
+    return mqtt_consumer
+
+
+def get_sensor_cache(request: Request) -> SensorCache:
+    """
+    FastAPI dependency to get the sensor routing cache from app state.
+
+    Args:
+        request: FastAPI Request object (injected by dependency system).
+
+    Returns:
+        SensorCache: The sensor → process cache instance.
+
+    Raises:
+        HTTPException: If the sensor cache is not available.
+    """
+    sensor_cache = request.app.state.sensor_cache
+    if not sensor_cache:
+        raise HTTPException(
+            status_code=500,
+            detail="Sensor cache not available",
+        )
+    return sensor_cache
+
+
+def get_deletion_worker(request: Request) -> DeletionWorker:
+    """
+    FastAPI dependency to get the deletion job worker from app state.
+
+    Args:
+        request: FastAPI Request object (injected by dependency system).
+
+    Returns:
+        DeletionWorker: The deletion worker instance.
+
+    Raises:
+        HTTPException: If the deletion worker is not available.
+    """
+    deletion_worker = request.app.state.deletion_worker
+    if not deletion_worker:
+        raise HTTPException(
+            status_code=500,
+            detail="Deletion worker not available",
+        )
+    return deletion_worker
+
+
+def get_measurement_window(
+    start: Annotated[dt.datetime | None, Query(alias="from")] = None,
+    end: Annotated[dt.datetime | None, Query(alias="to")] = None,
+    after_id: Annotated[int | None, Query(ge=0)] = None,
+    limit: Annotated[int | None, Query(ge=1)] = None,
+) -> MeasurementWindow:
+    """
+    FastAPI dependency to get the readings a measurements route returns.
+
+    Args:
+        start (datetime.datetime | None): ``from``: only readings taken at
+            or after this time (São Paulo time if no offset is given).
+        end (datetime.datetime | None): ``to``: only readings taken before
+            this time.
+        after_id (int | None): Only readings with a greater id; pass the
+            last id received to get the next page or the new readings.
+        limit (int | None): Maximum number of readings.
+
+    Returns:
+        MeasurementWindow: The time range and keyset page.
+    """
+    return MeasurementWindow(
+        start=start,
+        end=end,
+        after_id=after_id,
+        limit=limit,
+    )
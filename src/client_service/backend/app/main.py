@@ -8,20 +8,40 @@ from fastapi.middleware.cors import CORSMiddleware
 # Importar configuração de timezone primeiro
 # (deve ser feito antes de outros imports)
 from .config import timezone_config  # noqa: F401
+from .middleware import MetricsMiddleware
 from .routers import (
     health_router,
+    jobs_router,
     measurements_router,
+    metrics_router,
     processes_router,
     sensors_router,
 )
-from .services.database.init_db import close_database, initialize_database
+from .services.database.async_psg_client import AsyncPSGClient  # noqa: TC001
+from .services.database.deletions import DeletionWorker
+from .services.database.init_db import (
+    close_async_database,
+    close_database,
+    initialize_async_database,
+    initialize_database,
+)
+from .services.database.partitions import PartitionManager, RetentionPolicy
+from .services.database.pool_metrics import observe_pool
 from .services.database.psg_client import PSGClient  # noqa: TC001
+from .services.mqtt.async_consumer import AsyncMQTTConsumer
+from .services.mqtt.async_publisher import AsyncMQTTPublisher
 from .services.mqtt.consumer import PahoMQTTConsumer
+from .services.mqtt.consumer_settings import ConsumerSettings
+from .services.mqtt.ingestion_executor import BackpressurePolicy
+from .services.mqtt.measurement_spool import MeasurementSpool
+from .services.mqtt.messages import BindResponseMode
 from .services.mqtt.publisher import PahoMQTTPublisher
+from .services.mqtt.sensor_cache import SensorCache
+from .utils.logger import logger
 
 
 @asynccontextmanager
-async def lifespan(app: FastAPI) -> AsyncGenerator:  # noqa: RUF029
+async def lifespan(app: FastAPI) -> AsyncGenerator:
     """
     Lifespan handler for the FastAPI application.
 
@@ -29,8 +49,19 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:  # noqa: RUF029
         app (FastAPI): The FastAPI application instance.
 
     Raises:
-        RuntimeError: If the database initialization fails.
+        RuntimeError: If ``MQTT_BACKEND`` is unknown or the database
+            initialization fails.
     """
+    # MQTT implementation: "paho" (threads) or "asyncio" (event loop),
+    # checked before anything is started
+    mqtt_backend = os.getenv("MQTT_BACKEND", "paho")
+    if mqtt_backend not in {"paho", "asyncio"}:
+        msg = (
+            f"Unknown MQTT_BACKEND {mqtt_backend!r}: expected 'paho' or "
+            "'asyncio'"
+        )
+        raise RuntimeError(msg)
+
     # Startup
     app.state.db_client: PSGClient | None = None
     app.state.db_client = initialize_database()
@@ -38,15 +69,194 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:  # noqa: RUF029
         raise RuntimeError(
             "Failed to initialize database.",
         )
+    observe_pool("sync", app.state.db_client.engine.pool)
+
+    # Upcoming monthly partitions of measurements and retention
+    app.state.partition_manager = _partition_manager(app)
+    app.state.partition_manager.start()
+
+    # Background deletion of processes and sensors (resumes queued jobs)
+    app.state.deletion_worker = _deletion_worker(app)
+    app.state.deletion_worker.start()
+
+    # Async client awaited by the API routes (and the asyncio MQTT backend)
+    app.state.async_db_client: AsyncPSGClient | None = None
+    app.state.async_db_client = await initialize_async_database(
+        app.state.db_client,
+    )
+    if not app.state.async_db_client:
+        raise RuntimeError("Failed to initialize async database client.")
+    observe_pool("async", app.state.async_db_client.engine.pool)
+
+    # Warm the sensor → process routing cache
+    app.state.sensor_cache = SensorCache(app.state.db_client)
+    app.state.sensor_cache.warm()
+
+    if mqtt_backend == "asyncio":
+        await _start_asyncio_mqtt(app)
+    else:
+        _start_paho_mqtt(app)
+
+    yield
 
-    # Initialize MQTT Publisher
+    # Shutdown
+    if mqtt_backend == "asyncio":
+        await app.state.mqtt_consumer.aclose()
+        await app.state.mqtt_publisher.aclose()
+    else:
+        if hasattr(app.state, "mqtt_consumer"):
+            app.state.mqtt_consumer.stop()
+        if hasattr(app.state, "mqtt_publisher"):
+            app.state.mqtt_publisher.disconnect()
+    app.state.deletion_worker.stop()
+    app.state.partition_manager.stop()
+    if app.state.async_db_client:
+        await close_async_database(app.state.async_db_client)
+    if app.state.db_client:
+        close_database(app.state.db_client)
+
+
+def _mqtt_broker() -> tuple[str, int]:
+    """
+    Get the MQTT broker address from environment variables.
+
+    Returns:
+        tuple[str, int]: Broker host and port.
+    """
     # Use environment variable or default to localhost for local development
     mqtt_broker_host = os.getenv("MQTT_BROKER_HOST", "localhost")
     mqtt_broker_port = int(os.getenv("MQTT_BROKER_PORT", "1883"))
+    return mqtt_broker_host, mqtt_broker_port
+
+
+def _consumer_settings() -> ConsumerSettings:
+    """
+    Get the MQTT consumer settings from environment variables.
+
+    Every API replica started with the same ``MQTT_SHARED_GROUP`` receives a
+    share of the sensor messages instead of a copy of all of them.
+
+    Returns:
+        ConsumerSettings: Broker address, buffering (bulk inserts), worker,
+        deduplication and bind coordinator (coalesced sensor registration)
+        settings.
+    """
+    broker_host, broker_port = _mqtt_broker()
+    return ConsumerSettings(
+        broker_host=broker_host,
+        broker_port=broker_port,
+        flush_size=int(os.getenv("MEASUREMENT_FLUSH_SIZE", "100")),
+        flush_interval=float(os.getenv("MEASUREMENT_FLUSH_INTERVAL", "1.0")),
+        # Ingestion worker pool (keeps DB work off the paho network thread)
+        ingestion_workers=int(os.getenv("INGESTION_WORKERS", "4")),
+        max_concurrency=int(os.getenv("INGESTION_CONCURRENCY", "64")),
+        queue_size=int(os.getenv("INGESTION_QUEUE_SIZE", "1000")),
+        backpressure=BackpressurePolicy(
+            os.getenv("INGESTION_BACKPRESSURE", "block"),
+        ),
+        # Required by the spill policy, one directory per instance
+        spill_dir=os.getenv("INGESTION_SPILL_DIR") or None,
+        shared_group=os.getenv("MQTT_SHARED_GROUP") or None,
+        dedup_window=int(os.getenv("DEDUP_WINDOW", "1024")),
+        max_pending=int(os.getenv("MEASUREMENT_MAX_PENDING", "10000")),
+        bind_batch_size=int(os.getenv("BIND_BATCH_SIZE", "500")),
+        bind_window=float(os.getenv("BIND_WINDOW", "0")),
+        bind_response_mode=BindResponseMode(
+            os.getenv("BIND_RESPONSE_MODE", "both"),
+        ),
+    )
+
+
+def _partition_manager(app: FastAPI) -> PartitionManager:
+    """
+    Create the manager of the monthly partitions of measurements.
+
+    Args:
+        app (FastAPI): The FastAPI application instance.
+
+    Returns:
+        PartitionManager: The partition manager.
+    """
+    return PartitionManager(
+        app.state.db_client.engine,
+        premake_months=int(
+            os.getenv("MEASUREMENT_PARTITION_PREMAKE_MONTHS", "2"),
+        ),
+        retention=RetentionPolicy(
+            months=int(os.getenv("MEASUREMENT_RETENTION_MONTHS", "0")),
+            detach_only=os.getenv("MEASUREMENT_RETENTION_DETACH", "0") == "1",
+            dedup_days=int(os.getenv("MEASUREMENT_DEDUP_DAYS", "30")),
+        ),
+        interval=float(os.getenv("MEASUREMENT_PARTITION_INTERVAL", "3600")),
+    )
+
+
+def _deletion_worker(app: FastAPI) -> DeletionWorker:
+    """
+    Create the worker of the process and sensor deletion jobs.
+
+    Args:
+        app (FastAPI): The FastAPI application instance.
+
+    Returns:
+        DeletionWorker: The deletion worker.
+    """
+    return DeletionWorker(
+        app.state.db_client.engine,
+        batch_size=int(os.getenv("DELETION_BATCH_SIZE", "5000")),
+        pause=float(os.getenv("DELETION_BATCH_PAUSE", "0")),
+        interval=float(os.getenv("DELETION_JOB_INTERVAL", "10")),
+        max_attempts=int(os.getenv("DELETION_MAX_ATTEMPTS", "5")),
+    )
+
+
+def _measurement_spool(app: FastAPI) -> MeasurementSpool | None:
+    """
+    Create the local spool for measurements the database does not accept.
+
+    ``MEASUREMENT_SPOOL_DIR`` has no default: the directory must be on
+    persistent storage and belong to this instance only.
+
+    Args:
+        app (FastAPI): The FastAPI application instance.
+
+    Returns:
+        MeasurementSpool | None: The spool, or None if
+        ``MEASUREMENT_SPOOL_DIR`` is not set.
+    """
+    spool_dir = os.getenv("MEASUREMENT_SPOOL_DIR")
+    if not spool_dir:
+        logger.warning(
+            "MEASUREMENT_SPOOL_DIR is not set: measurements the database "
+            "does not accept are dropped",
+        )
+        return None
+    return MeasurementSpool(
+        spool_dir,
+        app.state.db_client,
+        segment_records=int(
+            os.getenv("MEASUREMENT_SPOOL_SEGMENT_RECORDS", "65536"),
+        ),
+        replay_batch=int(os.getenv("MEASUREMENT_SPOOL_REPLAY_BATCH", "1000")),
+        fsync=os.getenv("MEASUREMENT_SPOOL_FSYNC", "0") == "1",
+    )
+
+
+def _start_paho_mqtt(app: FastAPI) -> None:
+    """
+    Start the paho MQTT publisher and consumer threads.
+
+    Args:
+        app (FastAPI): The FastAPI application instance.
+
+    Raises:
+        RuntimeError: If the MQTT publisher or consumer fails to connect.
+    """
+    settings = _consumer_settings()
 
     app.state.mqtt_publisher = PahoMQTTPublisher(
-        mqtt_broker_host,
-        mqtt_broker_port,
+        settings.broker_host,
+        settings.broker_port,
     )
     if not app.state.mqtt_publisher.connect():
         raise RuntimeError("Failed to connect MQTT Publisher.")
@@ -55,8 +265,9 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:  # noqa: RUF029
     app.state.mqtt_consumer = PahoMQTTConsumer(
         app.state.db_client,
         app.state.mqtt_publisher,
-        mqtt_broker_host,
-        mqtt_broker_port,
+        settings,
+        sensor_cache=app.state.sensor_cache,
+        spool=_measurement_spool(app),
     )
     if not app.state.mqtt_consumer.connect():
         raise RuntimeError("Failed to connect MQTT Consumer.")
@@ -64,15 +275,39 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:  # noqa: RUF029
     # Start consumer thread
     app.state.mqtt_consumer.start()
 
-    yield
 
-    # Shutdown
-    if hasattr(app.state, "mqtt_consumer"):
-        app.state.mqtt_consumer.stop()
-    if hasattr(app.state, "mqtt_publisher"):
-        app.state.mqtt_publisher.disconnect()
-    if app.state.db_client:
-        close_database(app.state.db_client)
+async def _start_asyncio_mqtt(app: FastAPI) -> None:
+    """
+    Start the asyncio MQTT publisher and consumer on the event loop.
+
+    Args:
+        app (FastAPI): The FastAPI application instance.
+
+    Raises:
+        RuntimeError: If the MQTT publisher or the MQTT consumer fails to
+            connect.
+    """
+    settings = _consumer_settings()
+
+    app.state.mqtt_publisher = AsyncMQTTPublisher(
+        settings.broker_host,
+        settings.broker_port,
+    )
+    if not await app.state.mqtt_publisher.aconnect():
+        raise RuntimeError("Failed to connect MQTT Publisher.")
+
+    app.state.mqtt_consumer = AsyncMQTTConsumer(
+        app.state.async_db_client,
+        app.state.mqtt_publisher,
+        settings,
+        sensor_cache=app.state.sensor_cache,
+        spool=_measurement_spool(app),
+    )
+    if not await app.state.mqtt_consumer.aconnect():
+        raise RuntimeError("Failed to connect MQTT Consumer.")
+
+    # Start consumer task
+    app.state.mqtt_consumer.start()
 
 
 app = FastAPI(
@@ -90,10 +325,13 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
 
 # Routers
 app.include_router(health_router)
+app.include_router(jobs_router)
 app.include_router(measurements_router)
+app.include_router(metrics_router)
 app.include_router(processes_router)
 app.include_router(sensors_router)
 
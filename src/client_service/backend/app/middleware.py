@@ -0,0 +1,63 @@
+"""
+ASGI middleware of the Estufa Dashboard API.
+"""
+
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.metrics import Histogram
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "estufa_http_request_duration_seconds",
+    "HTTP request latency until the response is sent, per route.",
+    ("method", "route", "status"),
+)
+
+
+class MetricsMiddleware:
+    """Records the latency of every HTTP request per route template.
+
+    A plain ASGI middleware (no ``BaseHTTPMiddleware`` task and stream
+    wrapping), labelled with the matched route path (``/sensors/{id}``)
+    rather than the raw URL so the number of series stays bounded.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        """
+        Initialize the middleware.
+
+        Args:
+            app (ASGIApp): The wrapped application.
+        """
+        self.app = app
+
+    async def __call__(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+    ) -> None:
+        """Time the request and record it once the response is done."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.labels(
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                str(status),
+            ).observe(time.perf_counter() - started_at)
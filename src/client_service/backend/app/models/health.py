@@ -9,3 +9,76 @@ class HealthResponse(BaseModel):
     status: Literal["ok", "error"]
     version: str
     uptime: float
+
+
+class SensorCacheStats(BaseModel):
+    """Sensor → process routing cache counters."""
+
+    size: int
+    hits: int
+    misses: int
+
+
+class DedupStats(BaseModel):
+    """Sequence number deduplication counters."""
+
+    window: int
+    sensors: int
+    checked: int
+    duplicates: int
+
+
+class BindStats(BaseModel):
+    """Coalesced sensor registration counters."""
+
+    pending: int
+    requests: int
+    batches: int
+    largest_batch: int
+    failed: int
+
+
+class SpoolStats(BaseModel):
+    """Local measurement spool statistics."""
+
+    pending: int
+    pending_bytes: int
+    segments: int
+    spooled: int
+    replayed: int
+    replay_rate: float
+    last_error: str | None = None
+
+
+class TopicIngestionStats(BaseModel):
+    """Per-topic wait and processing times of the ingestion workers."""
+
+    messages: int
+    wait_avg_ms: float
+    wait_max_ms: float
+    processing_avg_ms: float
+    processing_max_ms: float
+
+
+class IngestionExecutorStats(BaseModel):
+    """Ingestion worker pool statistics."""
+
+    workers: int
+    policy: str
+    max_queue: int
+    queue_depth: int
+    max_queue_depth: int
+    dropped: int
+    spilled: int
+    topics: dict[str, TopicIngestionStats]
+
+
+class IngestionStatsResponse(BaseModel):
+    """MQTT ingestion pipeline statistics."""
+
+    sensor_cache: SensorCacheStats
+    dedup: DedupStats
+    bind: BindStats
+    buffered_measurements: int
+    spool: SpoolStats | None = None
+    executor: IngestionExecutorStats | None = None
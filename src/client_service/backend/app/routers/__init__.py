@@ -1,13 +1,17 @@
 """Python package init."""
 
 from .health import router as health_router
+from .jobs import router as jobs_router
 from .measurements import router as measurements_router
+from .metrics import router as metrics_router
 from .processes import router as processes_router
 from .sensors import router as sensors_router
 
 __all__ = [
     "health_router",
+    "jobs_router",
     "measurements_router",
+    "metrics_router",
     "processes_router",
     "sensors_router",
 ]
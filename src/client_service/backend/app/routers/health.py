@@ -1,8 +1,11 @@
 import time
+from typing import Annotated
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
-from app.models.health import HealthResponse
+from app.dependencies import get_mqtt_consumer
+from app.models.health import HealthResponse, IngestionStatsResponse
+from app.services.mqtt.interfaces import IMQTTConsumer
 from app.utils.logger import logger
 
 router = APIRouter(tags=["health"])
@@ -23,3 +26,15 @@ async def health_check() -> HealthResponse:
         version="0.1.0",
         uptime=uptime,
     )
+
+
+@router.get("/health/ingestion")
+async def ingestion_stats(
+    mqtt_consumer: Annotated[IMQTTConsumer, Depends(get_mqtt_consumer)],
+) -> IngestionStatsResponse:
+    """Ingestion pipeline statistics endpoint.
+
+    Returns:
+        IngestionStatsResponse: Counters of the MQTT ingestion pipeline.
+    """
+    return IngestionStatsResponse(**mqtt_consumer.stats())
@@ -0,0 +1,48 @@
+"""
+File: jobs.py
+Project: Estufa Dashboard API
+
+Copyright (c) 2025 Estufa Dashboard. All rights reserved.
+"""
+
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from app.dependencies import get_async_db_client, get_db_session
+from app.services.database.base_client._async_dbclient import IAsyncDBClient
+from app.services.database.tables.deletion_jobs import PydanticDeletionJob
+
+# One database session per request, shared by the client calls of the route
+router = APIRouter(
+    prefix="/jobs",
+    tags=["jobs"],
+    dependencies=[Depends(get_db_session)],
+)
+
+
+@router.get("/{job_id}")
+async def get_job(
+    job_id: int,
+    db_client: Annotated[IAsyncDBClient, Depends(get_async_db_client)],
+) -> PydanticDeletionJob:
+    """
+    Get a deletion job (queued by ``DELETE /processes/{id}`` or
+    ``DELETE /sensors/{id}``).
+
+    Args:
+        job_id (int): The id of the job.
+
+    Returns:
+        PydanticDeletionJob: The job, with its status and progress.
+
+    Raises:
+        HTTPException: If job not found.
+    """
+    job = await db_client.get_deletion_job(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Job {job_id} not found",
+        )
+    return job
@@ -11,16 +11,21 @@ from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException, Response
 
-from app.dependencies import get_db_client
-from app.services.database.psg_client import PSGClient
+from app.dependencies import get_async_db_client, get_db_session
+from app.services.database.base_client._async_dbclient import IAsyncDBClient
 
-router = APIRouter(prefix="/measurements", tags=["measurements"])
+# One database session per request, shared by the client calls of the route
+router = APIRouter(
+    prefix="/measurements",
+    tags=["measurements"],
+    dependencies=[Depends(get_db_session)],
+)
 
 
 @router.delete("/{measurement_id}")
 async def delete_measurement(
     measurement_id: int,
-    db_client: Annotated[PSGClient, Depends(get_db_client)],
+    db_client: Annotated[IAsyncDBClient, Depends(get_async_db_client)],
 ) -> Response:
     """
     Delete a measurement by id.
@@ -34,7 +39,7 @@ async def delete_measurement(
     Raises:
         HTTPException: If measurement not found or deletion fails.
     """
-    success = db_client.delete_measurement(measurement_id)
+    success = await db_client.delete_measurement(measurement_id)
     if not success:
         raise HTTPException(
             status_code=404,
@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Response
+
+from app.utils.metrics import CONTENT_TYPE, REGISTRY
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", response_class=Response)
+async def metrics() -> Response:
+    """Prometheus scrape endpoint.
+
+    Returns:
+        Response: Every registered metric in the text exposition format.
+    """
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
@@ -7,25 +7,58 @@ Author: Klaus Begnis
 Copyright (c) 2025 Estufa Dashboard. All rights reserved.
 """
 
-import datetime
+import datetime as dt
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 
 from app.config.timezone_config import SAO_PAULO_TZ
-from app.dependencies import get_db_client, get_mqtt_publisher
+from app.dependencies import (
+    get_async_db_client,
+    get_db_session,
+    get_deletion_worker,
+    get_measurement_window,
+    get_mqtt_publisher,
+    get_sensor_cache,
+)
 from app.models.processes import CreateProcessRequest
-from app.services.database.psg_client import PSGClient
+from app.services.database.base_client._async_dbclient import IAsyncDBClient
+from app.services.database.deletions import DeletionWorker
+from app.services.database.measurement_queries import MeasurementWindow
+from app.services.database.tables.deletion_jobs import (
+    DeletionTarget,
+    PydanticDeletionJob,
+)
+from app.services.database.tables.measurement_rollups import (
+    PydanticMeasurementRollup,
+    Resolution,
+)
 from app.services.database.tables.measurements import PydanticMeasurement
 from app.services.database.tables.processes import PydanticProcess
 from app.services.mqtt.interfaces import IMQTTPublisher
-
-router = APIRouter(prefix="/processes", tags=["processes"])
+from app.services.mqtt.sensor_cache import SensorCache
+from app.utils.downsampling import MIN_POINTS, downsample_measurements
+from app.utils.measurement_stream import (
+    STREAM_RESPONSES,
+    encode_json,
+    encode_measurements,
+    encode_stream,
+    negotiate_media_type,
+)
+
+# One database session per request, shared by the client calls of the route
+router = APIRouter(
+    prefix="/processes",
+    tags=["processes"],
+    dependencies=[Depends(get_db_session)],
+)
 
 
 @router.get("/")
 async def get_processes(
-    db_client: Annotated[PSGClient, Depends(get_db_client)],
+    db_client: Annotated[IAsyncDBClient, Depends(get_async_db_client)],
 ) -> list[PydanticProcess]:
     """
     Get all processes.
@@ -33,13 +66,13 @@ async def get_processes(
     Returns:
         list[PydanticProcess]: The list of processes.
     """
-    return db_client.get_all_processes()
+    return await db_client.get_all_processes()
 
 
 @router.get("/{process_id}")
 async def get_process_by_id(
     process_id: int,
-    db_client: Annotated[PSGClient, Depends(get_db_client)],
+    db_client: Annotated[IAsyncDBClient, Depends(get_async_db_client)],
 ) -> PydanticProcess:
     """
     Get a process by id.
@@ -53,7 +86,7 @@ async def get_process_by_id(
     Raises:
         HTTPException: If process not found.
     """
-    process = db_client.get_process_by_id(process_id)
+    process = await db_client.get_process_by_id(process_id)
     if not process:
         raise HTTPException(
             status_code=404,
@@ -65,7 +98,7 @@ async def get_process_by_id(
 @router.post("/start")
 async def start_new_process(
     request: CreateProcessRequest,
-    db_client: Annotated[PSGClient, Depends(get_db_client)],
+    db_client: Annotated[IAsyncDBClient, Depends(get_async_db_client)],
     mqtt: Annotated[IMQTTPublisher, Depends(get_mqtt_publisher)],
 ) -> PydanticProcess:
     """
@@ -80,14 +113,15 @@ async def start_new_process(
     Raises:
         HTTPException: If process creation fails.
     """
-    now = datetime.datetime.now(SAO_PAULO_TZ)
+    now = dt.datetime.now(SAO_PAULO_TZ)
     new_process = PydanticProcess(
         id=0,  # Will be set by database
         name=request.name,
         started_at=now,
         ended_at=None,
     )
-    created_process = db_client.create_new_process(new_process)
+    created_process = await db_client.create_new_process(new_process)
+    db_client.invalidate_active_process_cache()
     if not created_process:
         raise HTTPException(
             status_code=500,
@@ -103,7 +137,7 @@ async def start_new_process(
 @router.post("/end/{process_id}")
 async def end_process(
     process_id: int,
-    db_client: Annotated[PSGClient, Depends(get_db_client)],
+    db_client: Annotated[IAsyncDBClient, Depends(get_async_db_client)],
     mqtt: Annotated[IMQTTPublisher, Depends(get_mqtt_publisher)],
 ) -> Response:
     """
@@ -119,14 +153,15 @@ async def end_process(
         HTTPException: If process not found or update fails.
     """
     # Check if process exists
-    process = db_client.get_process_by_id(process_id)
+    process = await db_client.get_process_by_id(process_id)
     if not process:
         raise HTTPException(
             status_code=404,
             detail=f"Process {process_id} not found",
         )
 
-    success = db_client.end_process(process_id)
+    success = await db_client.end_process(process_id)
+    db_client.invalidate_active_process_cache()
     if not success:
         raise HTTPException(
             status_code=500,
@@ -139,63 +174,168 @@ async def end_process(
     return Response(status_code=200)
 
 
-@router.get("/{process_id}/measurements")
+@router.get(
+    "/{process_id}/measurements",
+    response_model=list[PydanticMeasurement],
+    responses=STREAM_RESPONSES,
+)
 async def get_measurements(
     process_id: int,
-    db_client: Annotated[PSGClient, Depends(get_db_client)],
-) -> list[PydanticMeasurement]:
+    db_client: Annotated[IAsyncDBClient, Depends(get_async_db_client)],
+    window: Annotated[MeasurementWindow, Depends(get_measurement_window)],
+    max_points: Annotated[int | None, Query(ge=MIN_POINTS)] = None,
+    accept: Annotated[str | None, Header()] = None,
+) -> list[PydanticMeasurement] | Response:
     """
     Get all measurements from a process.
 
     Args:
         process_id (int): The id of the process.
+        window (MeasurementWindow): ``from``, ``to``, ``after_id`` and
+            ``limit`` query parameters (see ``get_measurement_window``).
+        max_points (int | None): If given, downsample each sensor's series
+            to at most this many measurements (LTTB on ``rh``).
+        accept (str | None): ``application/x-ndjson``, ``text/csv`` or
+            ``application/vnd.apache.arrow.stream`` to stream the readings
+            in that format instead of a JSON list.
 
     Returns:
-        list[PydanticMeasurement]: The list of measurements.
+        list[PydanticMeasurement] | Response: The measurements, ordered
+        by id (by sensor and time when downsampled), or a streaming
+        response with them in the format the ``Accept`` header asks for.
 
     Raises:
         HTTPException: If process not found.
     """
     # Check if process exists
-    process = db_client.get_process_by_id(process_id)
+    process = await db_client.get_process_by_id(process_id)
+    if not process:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Process {process_id} not found",
+        )
+
+    media_type = negotiate_media_type(accept)
+    if media_type is not None and max_points is None:
+        # From the database cursor to the client one batch at a time
+        batches = db_client.stream_measurements(
+            process_id=process_id,
+            window=window,
+        )
+        return StreamingResponse(
+            encode_stream(batches, media_type),
+            media_type=media_type,
+        )
+
+    if max_points is None:
+        # Encoded from the rows: no model per reading, no response
+        # validation
+        rows = await db_client.get_measurement_rows(
+            process_id=process_id,
+            window=window,
+        )
+        return Response(
+            await run_in_threadpool(encode_json, rows),
+            media_type="application/json",
+        )
+
+    measurements = await db_client.get_all_measurements_from_process_id(
+        process_id,
+        window=window,
+    )
+    # CPU-bound: keep the event loop free for other requests
+    measurements = await run_in_threadpool(
+        downsample_measurements,
+        measurements,
+        max_points,
+    )
+    if media_type is not None:
+        return Response(
+            encode_measurements(measurements, media_type),
+            media_type=media_type,
+        )
+    return measurements
+
+
+@router.get("/{process_id}/measurements/rollup")
+async def get_measurement_rollups(
+    process_id: int,
+    db_client: Annotated[IAsyncDBClient, Depends(get_async_db_client)],
+    resolution: Resolution = Resolution.HOUR,
+    sensor_id: int | None = None,
+) -> list[PydanticMeasurementRollup]:
+    """
+    Get the measurements of a process aggregated per sensor and bucket.
+
+    Serves long-range charts from the rollup tables: one row per sensor
+    and minute, hour or day instead of every measurement.
+
+    Args:
+        process_id (int): The id of the process.
+        resolution (Resolution): Bucket size (minute, hour or day).
+        sensor_id (int | None): Only this sensor, if given.
+
+    Returns:
+        list[PydanticMeasurementRollup]: Count, min, max and average of
+        ``rh`` and ``soc`` per sensor and bucket.
+
+    Raises:
+        HTTPException: If process not found.
+    """
+    process = await db_client.get_process_by_id(process_id)
     if not process:
         raise HTTPException(
             status_code=404,
             detail=f"Process {process_id} not found",
         )
 
-    return db_client.get_all_measurements_from_process_id(process_id)
+    return await db_client.get_measurement_rollups(
+        process_id,
+        resolution,
+        sensor_id,
+    )
 
 
-@router.delete("/{process_id}")
+@router.delete("/{process_id}", status_code=202)
 async def delete_process(
     process_id: int,
-    db_client: Annotated[PSGClient, Depends(get_db_client)],
-) -> Response:
+    response: Response,
+    db_client: Annotated[IAsyncDBClient, Depends(get_async_db_client)],
+    sensor_cache: Annotated[SensorCache, Depends(get_sensor_cache)],
+    deletion_worker: Annotated[DeletionWorker, Depends(get_deletion_worker)],
+) -> PydanticDeletionJob:
     """
     Delete a process and all related data.
 
+    The process is hidden right away (with its sensors) and its data is
+    removed by a background job, in batches; ``GET /jobs/{job_id}``
+    (the ``Location`` header) reports its progress.
+
     Args:
         process_id (int): The id of the process to delete.
 
     Returns:
-        Response: Success response (204 No Content).
+        PydanticDeletionJob: The queued deletion job (202 Accepted).
 
     Raises:
-        HTTPException: If process not found or deletion fails.
+        HTTPException: If process not found or the deletion cannot be queued.
     """
     # Check if process exists
-    process = db_client.get_process_by_id(process_id)
+    process = await db_client.get_process_by_id(process_id)
     if not process:
         raise HTTPException(
             status_code=404,
             detail=f"Process {process_id} not found",
         )
 
-    success = db_client.delete_process(process_id)
-    if not success:
+    job = await db_client.start_deletion(DeletionTarget.PROCESS, process_id)
+    db_client.invalidate_active_process_cache()
+    if not job:
         raise HTTPException(
             status_code=500,
             detail="Failed to delete process",
         )
-    return Response(status_code=204)
+    sensor_cache.evict_process(process_id)
+    deletion_worker.wake()
+    response.headers["Location"] = f"/jobs/{job.id}"
+    return job
@@ -9,37 +9,120 @@ Copyright (c) 2025 Estufa Dashboard. All rights reserved.
 
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, Response
-
-from app.dependencies import get_db_client
-from app.services.database.psg_client import PSGClient
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from app.dependencies import (
+    get_async_db_client,
+    get_db_session,
+    get_deletion_worker,
+    get_measurement_window,
+    get_sensor_cache,
+)
+from app.services.database.base_client._async_dbclient import IAsyncDBClient
+from app.services.database.deletions import DeletionWorker
+from app.services.database.measurement_queries import MeasurementWindow
+from app.services.database.tables.deletion_jobs import (
+    DeletionTarget,
+    PydanticDeletionJob,
+)
 from app.services.database.tables.measurements import PydanticMeasurement
 from app.services.database.tables.sensor_registry import PydanticSensorRegistry
-
-router = APIRouter(prefix="/sensors", tags=["sensors"])
-
-
-@router.get("/{sensor_id}/measurements")
+from app.services.mqtt.sensor_cache import SensorCache
+from app.utils.downsampling import MIN_POINTS, downsample_measurements
+from app.utils.measurement_stream import (
+    STREAM_RESPONSES,
+    encode_json,
+    encode_measurements,
+    encode_stream,
+    negotiate_media_type,
+)
+
+# One database session per request, shared by the client calls of the route
+router = APIRouter(
+    prefix="/sensors",
+    tags=["sensors"],
+    dependencies=[Depends(get_db_session)],
+)
+
+
+@router.get(
+    "/{sensor_id}/measurements",
+    response_model=list[PydanticMeasurement],
+    responses=STREAM_RESPONSES,
+)
 async def get_measurements_by_sensor_id(
     sensor_id: int,
-    db_client: Annotated[PSGClient, Depends(get_db_client)],
-) -> list[PydanticMeasurement]:
+    db_client: Annotated[IAsyncDBClient, Depends(get_async_db_client)],
+    window: Annotated[MeasurementWindow, Depends(get_measurement_window)],
+    max_points: Annotated[int | None, Query(ge=MIN_POINTS)] = None,
+    accept: Annotated[str | None, Header()] = None,
+) -> list[PydanticMeasurement] | Response:
     """
     Get all measurements from a sensor.
 
     Args:
         sensor_id (int): The id of the sensor.
+        window (MeasurementWindow): ``from``, ``to``, ``after_id`` and
+            ``limit`` query parameters (see ``get_measurement_window``).
+        max_points (int | None): If given, downsample the series to at
+            most this many measurements (LTTB on ``rh``).
+        accept (str | None): ``application/x-ndjson``, ``text/csv`` or
+            ``application/vnd.apache.arrow.stream`` to stream the readings
+            in that format instead of a JSON list.
 
     Returns:
-        list[PydanticMeasurement]: The list of measurements.
+        list[PydanticMeasurement] | Response: The measurements, ordered
+        by id (by time when downsampled), or a streaming response with
+        them in the format the ``Accept`` header asks for.
     """
-    return db_client.get_all_measurements_from_sensor_id(sensor_id)
+    media_type = negotiate_media_type(accept)
+    if media_type is not None and max_points is None:
+        # From the database cursor to the client one batch at a time
+        batches = db_client.stream_measurements(
+            sensor_id=sensor_id,
+            window=window,
+        )
+        return StreamingResponse(
+            encode_stream(batches, media_type),
+            media_type=media_type,
+        )
+
+    if max_points is None:
+        # Encoded from the rows: no model per reading, no response
+        # validation
+        rows = await db_client.get_measurement_rows(
+            sensor_id=sensor_id,
+            window=window,
+        )
+        return Response(
+            await run_in_threadpool(encode_json, rows),
+            media_type="application/json",
+        )
+
+    measurements = await db_client.get_all_measurements_from_sensor_id(
+        sensor_id,
+        window=window,
+    )
+    # CPU-bound: keep the event loop free for other requests
+    measurements = await run_in_threadpool(
+        downsample_measurements,
+        measurements,
+        max_points,
+    )
+    if media_type is not None:
+        return Response(
+            encode_measurements(measurements, media_type),
+            media_type=media_type,
+        )
+    return measurements
 
 
 @router.get("/{sensor_id}")
 async def get_sensor_by_id(
     sensor_id: int,
-    db_client: Annotated[PSGClient, Depends(get_db_client)],
+    db_client: Annotated[IAsyncDBClient, Depends(get_async_db_client)],
 ) -> PydanticSensorRegistry:
     """
     Get a sensor by id.
@@ -53,7 +136,7 @@ async def get_sensor_by_id(
     Raises:
         HTTPException: If sensor not found.
     """
-    sensor = db_client.get_sensor_by_id(sensor_id)
+    sensor = await db_client.get_sensor_by_id(sensor_id)
     if not sensor:
         raise HTTPException(
             status_code=404,
@@ -62,35 +145,45 @@ async def get_sensor_by_id(
     return sensor
 
 
-@router.delete("/{sensor_id}")
+@router.delete("/{sensor_id}", status_code=202)
 async def delete_sensor(
     sensor_id: int,
-    db_client: Annotated[PSGClient, Depends(get_db_client)],
-) -> Response:
+    response: Response,
+    db_client: Annotated[IAsyncDBClient, Depends(get_async_db_client)],
+    sensor_cache: Annotated[SensorCache, Depends(get_sensor_cache)],
+    deletion_worker: Annotated[DeletionWorker, Depends(get_deletion_worker)],
+) -> PydanticDeletionJob:
     """
     Delete a sensor and all related measurements.
 
+    The sensor is hidden right away and its data is
+    removed by a background job, in batches; ``GET /jobs/{job_id}``
+    (the ``Location`` header) reports its progress.
+
     Args:
         sensor_id (int): The id of the sensor to delete.
 
     Returns:
-        Response: Success response (204 No Content).
+        PydanticDeletionJob: The queued deletion job (202 Accepted).
 
     Raises:
-        HTTPException: If sensor not found or deletion fails.
+        HTTPException: If sensor not found or the deletion cannot be queued.
     """
     # Check if sensor exists
-    sensor = db_client.get_sensor_by_id(sensor_id)
+    sensor = await db_client.get_sensor_by_id(sensor_id)
     if not sensor:
         raise HTTPException(
             status_code=404,
             detail=f"Sensor {sensor_id} not found",
         )
 
-    success = db_client.delete_sensor(sensor_id)
-    if not success:
+    job = await db_client.start_deletion(DeletionTarget.SENSOR, sensor_id)
+    if not job:
         raise HTTPException(
             status_code=500,
             detail="Failed to delete sensor",
         )
-    return Response(status_code=204)
+    sensor_cache.evict(sensor_id)
+    deletion_worker.wake()
+    response.headers["Location"] = f"/jobs/{job.id}"
+    return job
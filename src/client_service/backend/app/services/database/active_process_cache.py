@@ -0,0 +1,76 @@
+"""
+Short-lived in-memory copy of the active process.
+
+Shared by the sync and async database clients so that invalidating it after
+a process starts or ends is seen by every ingestion path.
+
+The database read of a lookup runs outside the lock, so a process may start
+or end (and invalidate the cache) while it is in flight. Every invalidation
+bumps a generation counter: a lookup reads the ``generation`` before its
+read and passes it to ``set``, which drops the value if the cache was
+invalidated since, instead of caching the outdated process for a full TTL.
+"""
+
+import threading
+import time
+
+from app.services.database.tables.processes import PydanticProcess
+
+
+class ActiveProcessCache:
+    """Thread-safe holder for the cached active process."""
+
+    def __init__(self, ttl: float = 5.0) -> None:
+        """
+        Initialize the cache.
+
+        Args:
+            ttl (float): Seconds a cached value stays fresh. Bounds how long
+                changes made by other API instances go unnoticed.
+        """
+        self.ttl = ttl
+        self._process: PydanticProcess | None = None
+        self._expires_at = 0.0
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def generation(self) -> int:
+        """Number of invalidations so far, to be passed to ``set``."""
+        with self._lock:
+            return self._generation
+
+    def get(self) -> tuple[bool, PydanticProcess | None]:
+        """
+        Get the cached active process.
+
+        Returns:
+            tuple[bool, PydanticProcess | None]: Whether the cached value is
+            fresh, and the cached process (None if no process is running).
+        """
+        with self._lock:
+            fresh = time.monotonic() < self._expires_at
+            return fresh, self._process
+
+    def set(self, process: PydanticProcess | None, generation: int) -> None:
+        """
+        Store the active process looked up from the database.
+
+        Args:
+            process (PydanticProcess | None): The active process, or None if
+                no process is running.
+            generation (int): The ``generation`` read before the lookup.
+                The value is not stored if the cache was invalidated since.
+        """
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._process = process
+            self._expires_at = time.monotonic() + self.ttl
+
+    def invalidate(self) -> None:
+        """Drop the cached value so the next lookup hits the database."""
+        with self._lock:
+            self._generation += 1
+            self._process = None
+            self._expires_at = 0.0
@@ -0,0 +1,868 @@
+"""
+Asynchronous PostgreSQL client (SQLAlchemy async engine over asyncpg).
+"""
+
+import datetime as dt
+from collections.abc import AsyncGenerator, Sequence
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any
+
+from sqlalchemy import Row, delete, func, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from app.config.timezone_config import SAO_PAULO_TZ
+from app.services.database.active_process_cache import ActiveProcessCache
+from app.services.database.base_client._async_dbclient import (  # noqa: PLC2701
+    IAsyncDBClient,
+)
+from app.services.database.deletions import (
+    hide_statements,
+    insert_job,
+    job_model,
+)
+from app.services.database.measurement_insert import (
+    INSERT_MEASUREMENTS,
+    REJECTED_ERRORS,
+    RESET_SEQUENCES,
+    insert_params,
+    reject_measurement,
+    reset_params,
+    split_batch,
+)
+from app.services.database.measurement_queries import (
+    STREAM_BATCH_SIZE,
+    MeasurementWindow,
+    measurement_rows_query,
+    measurements_from_rows,
+)
+from app.services.database.rollups import (
+    REBUILD_ROLLUPS,
+    rollup_query,
+)
+from app.services.database.tables.deletion_jobs import (
+    DeletionJob,
+    DeletionTarget,
+    PydanticDeletionJob,
+)
+from app.services.database.tables.measurement_rollups import (
+    PydanticMeasurementRollup,
+    Resolution,
+)
+from app.services.database.tables.measurements import (
+    Measurement,
+    PydanticMeasurement,
+)
+from app.services.database.tables.processes import Process, PydanticProcess
+from app.services.database.tables.sensor_registry import (
+    SENSOR_ID_SEQUENCE,
+    PydanticSensorRegistry,
+    SensorRegistry,
+)
+from app.utils.logger import logger
+
+# Session of the API request being served, if any (see ``request_session``)
+_request_session: ContextVar[AsyncSession | None] = ContextVar(
+    "request_session",
+    default=None,
+)
+
+
+# One public method per IAsyncDBClient operation
+class AsyncPSGClient(IAsyncDBClient):  # noqa: PLR0904
+    """PostgreSQL client on the SQLAlchemy async engine (asyncpg driver).
+
+    Every operation is its own unit of work (see ``session_scope``), so the
+    client can be shared by concurrent tasks on the event loop. The API
+    routes await it, so a slow query never blocks other requests.
+    """
+
+    # The five connection fields, plus the keyword-only shared cache and
+    # pool settings
+    def __init__(  # noqa: PLR0913
+        self,
+        host: str,
+        port: int,
+        database: str,
+        user: str,
+        password: str,
+        *,
+        active_process_cache: ActiveProcessCache | None = None,
+        pool_options: dict[str, Any] | None = None,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.database = database
+        self.user = user
+        self.password = password
+        # QueuePool settings passed to create_async_engine (pool_size, ...)
+        self.pool_options = pool_options or {}
+        self.engine: AsyncEngine | None = None
+        self.SessionLocal: async_sessionmaker | None = None
+        self.active_process_cache = active_process_cache or ActiveProcessCache()
+
+    async def connect(self) -> bool:
+        """
+        Connect to the database.
+
+        Returns:
+            bool: True if the connection was successful, False otherwise.
+        """
+        database_url = f"postgresql+asyncpg://{self.user}:{self.password}@{self.host}:{self.port}/{self.database}"
+        try:
+            self.engine = create_async_engine(
+                database_url,
+                echo=False,
+                **self.pool_options,
+            )
+            self.SessionLocal = async_sessionmaker(
+                self.engine,
+                autoflush=False,
+                expire_on_commit=False,
+            )
+
+            # Testar conexão
+            async with self.engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+        except (SQLAlchemyError, OSError) as e:
+            logger.error(f"Failed to connect to database (async): {e}")
+            return False
+
+        logger.info("Successfully connected to PostgreSQL (async)")
+        return True
+
+    async def disconnect(self) -> bool:
+        """
+        Disconnect from the database.
+
+        Returns:
+            bool: True if the disconnection was successful, False otherwise.
+        """
+        try:
+            if self.engine:
+                await self.engine.dispose()
+            logger.info("Disconnected from PostgreSQL database (async)")
+            return True
+        except Exception as e:
+            logger.error(f"Error disconnecting from database (async): {e}")
+            return False
+
+    @asynccontextmanager
+    async def request_session(self) -> AsyncGenerator[AsyncSession]:
+        """
+        Open the session of an API request.
+
+        Client calls awaited by the request while it is open use this
+        session instead of opening their own, so a request checks out at
+        most one connection at a time. Each call still commits its own
+        work. The session must not be used by concurrent tasks.
+
+        Yields:
+            AsyncSession: The request session.
+        """
+        session = self.SessionLocal()
+        token = _request_session.set(session)
+        try:
+            yield session
+        finally:
+            _request_session.reset(token)
+            await session.close()
+
+    @asynccontextmanager
+    async def session_scope(self) -> AsyncGenerator[AsyncSession]:
+        """
+        Run one unit of work in a transaction.
+
+        Uses the request session if one is open, otherwise a new session
+        that is closed afterwards. Commits on success and rolls back on
+        error, so the connection goes back to the pool at the end of the
+        unit of work.
+
+        Yields:
+            AsyncSession: The session of the unit of work.
+        """
+        session = _request_session.get()
+        if session is None:
+            async with self.SessionLocal() as session, session.begin():
+                yield session
+            return
+
+        try:
+            yield session
+            await session.commit()
+        except BaseException:
+            await session.rollback()
+            raise
+
+    async def execute(self, query: str) -> bool:
+        """
+        Execute a query on the database.
+
+        Args:
+            query (str): The query to execute.
+
+        Returns:
+            bool: True if the query was executed successfully, False otherwise.
+        """
+        try:
+            async with self.engine.begin() as conn:
+                await conn.execute(text(query))
+            return True
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to execute query: {e}")
+            return False
+
+    async def add_new_measurement(
+        self,
+        measurement: PydanticMeasurement,
+    ) -> bool:
+        """
+        Add a new measurement to the database.
+
+        Args:
+            measurement (PydanticMeasurement): The measurement to add.
+
+        Returns:
+            bool: True if the measurement was added successfully,
+            False otherwise.
+        """
+        # Same statement as the batches, so redeliveries are skipped too
+        return await self.add_new_measurements([measurement])
+
+    async def add_new_measurements(
+        self,
+        measurements: list[PydanticMeasurement],
+    ) -> bool:
+        """
+        Add several measurements to the database in a single statement.
+
+        Readings the database rejects (``REJECTED_ERRORS``) are dropped,
+        after splitting the batch so the others are stored.
+
+        Args:
+            measurements (list[PydanticMeasurement]): The measurements to add.
+
+        Returns:
+            bool: True if all measurements were added (or were already
+            stored, or were rejected), False if the database failed and the
+            batch can be retried.
+        """
+        if not measurements:
+            return True
+
+        try:
+            async with self.engine.begin() as conn:
+                # Skip duplicated deliveries (same sensor_id and seq), unless
+                # the sensor restarted its sequence
+                await conn.execute(RESET_SEQUENCES, reset_params(measurements))
+                await conn.execute(
+                    INSERT_MEASUREMENTS,
+                    insert_params(measurements),
+                )
+        except REJECTED_ERRORS as e:
+            if len(measurements) == 1:
+                reject_measurement(measurements[0], e)
+                return True
+            first, second = split_batch(measurements)
+            if not await self.add_new_measurements(first):
+                return False
+            return await self.add_new_measurements(second)
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to add {len(measurements)} measurements: {e}")
+            return False
+
+        logger.debug("Added %d new measurements in bulk", len(measurements))
+        return True
+
+    async def get_active_process(self) -> PydanticProcess | None:
+        """Get the most recent process that has not ended.
+
+        Served from the (possibly shared) in-memory copy while it is fresh.
+
+        Returns:
+            PydanticProcess | None: The active process, or None if no
+            process is running.
+        """
+        fresh, active_process = self.active_process_cache.get()
+        if fresh:
+            return active_process
+        # Read before the lookup: a process started or ended meanwhile
+        # invalidates the cache and the result is not cached
+        generation = self.active_process_cache.generation
+
+        try:
+            async with self.session_scope() as session:
+                process = await session.scalar(
+                    select(Process)
+                    .where(
+                        Process.ended_at.is_(None),
+                        Process.deleted_at.is_(None),
+                    )
+                    .order_by(Process.id.desc())
+                    .limit(1),
+                )
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to get active process: {e}")
+            return None
+
+        active_process = None
+        if process:
+            active_process = PydanticProcess(
+                id=process.id,
+                name=process.name,
+                started_at=process.started_at,
+                ended_at=process.ended_at,
+            )
+        self.active_process_cache.set(active_process, generation)
+        return active_process
+
+    def invalidate_active_process_cache(self) -> None:
+        """Drop the cached active process so the next lookup hits the DB."""
+        self.active_process_cache.invalidate()
+
+    async def register_new_sensor(
+        self,
+        sensor_id: int,
+        process_id: int,
+    ) -> bool:
+        """Register a new sensor.
+
+        Args:
+            sensor_id (int): The id of the sensor.
+            process_id (int): The id of the process.
+
+        Returns:
+            bool: True if the sensor was registered successfully,
+            False otherwise.
+        """
+        try:
+            async with self.session_scope() as session:
+                session.add(
+                    SensorRegistry(
+                        process_id=process_id,
+                        sensor_id=sensor_id,
+                        position="unknown",  # Default position
+                    ),
+                )
+            logger.info(
+                f"Registered sensor {sensor_id} for process {process_id}",
+            )
+            return True
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to register sensor: {e}")
+            return False
+
+    async def register_new_sensors(
+        self,
+        process_id: int,
+        count: int,
+    ) -> list[int] | None:
+        """Allocate ids and register several sensors in one transaction.
+
+        Args:
+            process_id (int): The id of the process.
+            count (int): Number of sensors to register.
+
+        Returns:
+            list[int] | None: The new sensor ids, or None if the sensors
+            could not be registered.
+        """
+        if count <= 0:
+            return []
+
+        try:
+            async with self.engine.begin() as conn:
+                result = await conn.scalars(
+                    select(SENSOR_ID_SEQUENCE.next_value()).select_from(
+                        func.generate_series(1, count),
+                    ),
+                )
+                sensor_ids = list(result)
+                await conn.execute(
+                    insert(SensorRegistry),
+                    [
+                        {
+                            "sensor_id": sensor_id,
+                            "process_id": process_id,
+                            "position": "unknown",  # Default position
+                        }
+                        for sensor_id in sensor_ids
+                    ],
+                )
+            logger.info(
+                f"Registered {count} sensors for process {process_id}",
+            )
+            return sensor_ids
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to register {count} sensors: {e}")
+            return None
+
+    async def get_all_sensors(self) -> list[PydanticSensorRegistry]:
+        """Get all registered sensors.
+
+        Returns:
+            list[PydanticSensorRegistry]: The list of sensors.
+        """
+        try:
+            async with self.session_scope() as session:
+                sensors = await session.scalars(
+                    select(SensorRegistry).where(
+                        SensorRegistry.deleted_at.is_(None),
+                    ),
+                )
+                return [
+                    PydanticSensorRegistry(
+                        process_id=s.process_id,
+                        sensor_id=s.sensor_id,
+                        position=s.position,
+                    )
+                    for s in sensors
+                ]
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to get all sensors: {e}")
+            return []
+
+    async def get_sensor_by_id(
+        self,
+        sensor_id: int,
+    ) -> PydanticSensorRegistry | None:
+        """Get a sensor by id.
+
+        Args:
+            sensor_id (int): The id of the sensor.
+
+        Returns:
+            PydanticSensorRegistry | None: The sensor, or None if not found.
+        """
+        try:
+            async with self.session_scope() as session:
+                sensor = await session.get(SensorRegistry, sensor_id)
+                if sensor and sensor.deleted_at is None:
+                    return PydanticSensorRegistry(
+                        process_id=sensor.process_id,
+                        sensor_id=sensor.sensor_id,
+                        position=sensor.position,
+                    )
+                return None
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to get sensor {sensor_id}: {e}")
+            return None
+
+    async def get_all_sensors_from_process_id(
+        self,
+        process_id: int,
+    ) -> list[PydanticSensorRegistry]:
+        """Get all sensors from a process id.
+
+        Args:
+            process_id (int): The id of the process.
+
+        Returns:
+            list[PydanticSensorRegistry]: The list of sensors.
+        """
+        try:
+            async with self.session_scope() as session:
+                sensors = await session.scalars(
+                    select(SensorRegistry).where(
+                        SensorRegistry.process_id == process_id,
+                        SensorRegistry.deleted_at.is_(None),
+                    ),
+                )
+                return [
+                    PydanticSensorRegistry(
+                        process_id=s.process_id,
+                        sensor_id=s.sensor_id,
+                        position=s.position,
+                    )
+                    for s in sensors
+                ]
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to get sensors for process {process_id}: {e}")
+            return []
+
+    async def get_all_measurements_from_process_id(
+        self,
+        process_id: int,
+        window: MeasurementWindow | None = None,
+    ) -> list[PydanticMeasurement]:
+        """
+        Get all measurements from a process id.
+
+        Args:
+            process_id (int): The id of the process.
+            window (MeasurementWindow | None): Time range and keyset page
+                of the readings; all of them if not given.
+
+        Returns:
+            list[PydanticMeasurement]: The list of measurements, ordered by
+            id.
+        """
+        try:
+            async with self.session_scope() as session:
+                rows = await session.execute(
+                    measurement_rows_query(
+                        process_id=process_id,
+                        window=window,
+                    ),
+                )
+                return measurements_from_rows(rows)
+        except SQLAlchemyError as e:
+            logger.error(
+                f"Failed to get measurements for process {process_id}: {e}",
+            )
+            return []
+
+    async def get_all_measurements_from_sensor_id(
+        self,
+        sensor_id: int,
+        window: MeasurementWindow | None = None,
+    ) -> list[PydanticMeasurement]:
+        """
+        Get all measurements from a sensor id.
+
+        Args:
+            sensor_id (int): The id of the sensor.
+            window (MeasurementWindow | None): Time range and keyset page
+                of the readings; all of them if not given.
+
+        Returns:
+            list[PydanticMeasurement]: The list of measurements, ordered by
+            id.
+        """
+        try:
+            async with self.session_scope() as session:
+                rows = await session.execute(
+                    measurement_rows_query(
+                        sensor_id=sensor_id,
+                        window=window,
+                    ),
+                )
+                return measurements_from_rows(rows)
+        except SQLAlchemyError as e:
+            logger.error(
+                f"Failed to get measurements for sensor {sensor_id}: {e}",
+            )
+            return []
+
+    async def get_measurement_rows(
+        self,
+        process_id: int | None = None,
+        sensor_id: int | None = None,
+        window: MeasurementWindow | None = None,
+    ) -> list[Row]:
+        """
+        Get the measurements of a process or sensor as plain rows.
+
+        The fast path of the JSON responses: no ORM object or model is
+        built per reading, the rows are encoded as they are.
+
+        Args:
+            process_id (int | None): Only the readings of this process.
+            sensor_id (int | None): Only the readings of this sensor.
+            window (MeasurementWindow | None): Time range and keyset page
+                of the readings; all of them if not given.
+
+        Returns:
+            list[Row]: Rows of ``MEASUREMENT_COLUMNS``, ordered by id.
+        """
+        try:
+            async with self.session_scope() as session:
+                result = await session.execute(
+                    measurement_rows_query(
+                        process_id=process_id,
+                        sensor_id=sensor_id,
+                        window=window,
+                    ),
+                )
+                return list(result)
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to get measurement rows: {e}")
+            return []
+
+    async def stream_measurements(
+        self,
+        process_id: int | None = None,
+        sensor_id: int | None = None,
+        window: MeasurementWindow | None = None,
+        batch_size: int = STREAM_BATCH_SIZE,
+    ) -> AsyncGenerator[Sequence[Row]]:
+        """
+        Stream the measurements of a process or sensor in batches.
+
+        Reads plain rows (no ORM objects) from a server-side cursor, so
+        only one batch is in memory at a time however many readings
+        match. The cursor holds its own connection until the generator is
+        exhausted or closed; the request session is not used.
+
+        Args:
+            process_id (int | None): Only the readings of this process.
+            sensor_id (int | None): Only the readings of this sensor.
+            window (MeasurementWindow | None): Time range and keyset page
+                of the readings; all of them if not given.
+            batch_size (int): Rows fetched from the cursor per round trip.
+
+        Yields:
+            Sequence[Row]: Up to ``batch_size`` rows of
+            ``MEASUREMENT_COLUMNS``, ordered by id.
+
+        Raises:
+            SQLAlchemyError: If the query fails. Part of the readings may
+                have been yielded already, so the error is not swallowed.
+        """
+        try:
+            async with self.engine.connect() as conn:
+                result = await conn.stream(
+                    measurement_rows_query(
+                        process_id=process_id,
+                        sensor_id=sensor_id,
+                        window=window,
+                    ).execution_options(yield_per=batch_size),
+                )
+                # Closed by encode_stream when the response ends
+                async for rows in result.partitions():
+                    yield rows  # noqa: ASYNC119
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to stream measurements: {e}")
+            raise
+
+    async def get_measurement_rollups(
+        self,
+        process_id: int,
+        resolution: Resolution,
+        sensor_id: int | None = None,
+    ) -> list[PydanticMeasurementRollup]:
+        """
+        Get the measurements of a process aggregated per sensor and bucket.
+
+        Args:
+            process_id (int): The id of the process.
+            resolution (Resolution): Bucket size.
+            sensor_id (int | None): Only this sensor, if given.
+
+        Returns:
+            list[PydanticMeasurementRollup]: The rollups, by sensor and
+            bucket.
+        """
+        try:
+            async with self.session_scope() as session:
+                rows = await session.execute(
+                    rollup_query(process_id, resolution, sensor_id),
+                )
+                return [
+                    PydanticMeasurementRollup(**row._asdict()) for row in rows
+                ]
+        except SQLAlchemyError as e:
+            logger.error(
+                f"Failed to get {resolution.value} rollups for process "
+                f"{process_id}: {e}",
+            )
+            return []
+
+    async def create_new_process(
+        self,
+        process: PydanticProcess,
+    ) -> PydanticProcess | None:
+        """Create a new process.
+
+        Args:
+            process (PydanticProcess): The process to create.
+
+        Returns:
+            PydanticProcess | None: The created process with ID,
+            or None if failed.
+        """
+        try:
+            async with self.session_scope() as session:
+                db_process = Process(
+                    name=process.name,
+                    started_at=process.started_at,
+                    ended_at=process.ended_at,
+                )
+                session.add(db_process)
+                await session.flush()
+                created_process = PydanticProcess(
+                    id=db_process.id,
+                    name=db_process.name,
+                    started_at=db_process.started_at,
+                    ended_at=db_process.ended_at,
+                )
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to create process: {e}")
+            return None
+        logger.info(f"Created new process: {process.name}")
+        return created_process
+
+    async def get_process_by_id(
+        self,
+        process_id: int,
+    ) -> PydanticProcess | None:
+        """Get a process by id.
+
+        Args:
+            process_id (int): The id of the process.
+
+        Returns:
+            PydanticProcess | None: The process, or None if not found.
+        """
+        try:
+            async with self.session_scope() as session:
+                process = await session.get(Process, process_id)
+                if process and process.deleted_at is None:
+                    return PydanticProcess(
+                        id=process.id,
+                        name=process.name,
+                        started_at=process.started_at,
+                        ended_at=process.ended_at,
+                    )
+                return None
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to get process {process_id}: {e}")
+            return None
+
+    async def get_all_processes(self) -> list[PydanticProcess]:
+        """Get all processes.
+
+        Returns:
+            list[PydanticProcess]: The list of processes.
+        """
+        try:
+            async with self.session_scope() as session:
+                processes = await session.scalars(
+                    select(Process).where(Process.deleted_at.is_(None)),
+                )
+                return [
+                    PydanticProcess(
+                        id=p.id,
+                        name=p.name,
+                        started_at=p.started_at,
+                        ended_at=p.ended_at,
+                    )
+                    for p in processes
+                ]
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to get all processes: {e}")
+            return []
+
+    async def end_process(self, process_id: int) -> bool:
+        """End a process by updating ended_at.
+
+        Args:
+            process_id (int): The id of the process.
+
+        Returns:
+            bool: True if the process was ended successfully, False otherwise.
+        """
+        try:
+            async with self.session_scope() as session:
+                process = await session.get(Process, process_id)
+                if not process or process.deleted_at is not None:
+                    logger.warning(f"Process {process_id} not found")
+                    return False
+                process.ended_at = dt.datetime.now(SAO_PAULO_TZ)
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to end process {process_id}: {e}")
+            return False
+        logger.info(f"Ended process {process_id}")
+        return True
+
+    async def start_deletion(
+        self,
+        target: DeletionTarget,
+        target_id: int,
+    ) -> PydanticDeletionJob | None:
+        """
+        Hide a process or a sensor and queue the deletion of its data.
+
+        Reads skip the target from now on; ``DeletionWorker`` removes its
+        data in batches.
+
+        Args:
+            target (DeletionTarget): What is deleted.
+            target_id (int): The id of the process or sensor.
+
+        Returns:
+            PydanticDeletionJob | None: The queued job, or None if the
+            target was not found (or is already being deleted) or the
+            job could not be queued.
+        """
+        hide, *cascade = hide_statements(target, target_id)
+        try:
+            async with self.session_scope() as session:
+                if await session.scalar(hide) is None:
+                    logger.warning(f"{target.value} {target_id} not found")
+                    return None
+                for statement in cascade:
+                    await session.execute(statement)
+                job = await session.scalar(insert_job(target, target_id))
+                return job_model(job)
+        except SQLAlchemyError as e:
+            logger.error(
+                f"Failed to queue deletion of {target.value} {target_id}: {e}",
+            )
+            return None
+
+    async def get_deletion_job(self, job_id: int) -> PydanticDeletionJob | None:
+        """
+        Get a deletion job by id.
+
+        Args:
+            job_id (int): The id of the job.
+
+        Returns:
+            PydanticDeletionJob | None: The job, or None if not found.
+        """
+        try:
+            async with self.session_scope() as session:
+                job = await session.get(DeletionJob, job_id)
+                return job_model(job) if job else None
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to get deletion job {job_id}: {e}")
+            return None
+
+    async def delete_measurement(self, measurement_id: int) -> bool:
+        """Delete a measurement by id.
+
+        Args:
+            measurement_id (int): The id of the measurement to delete.
+
+        Returns:
+            bool: True if the measurement was deleted successfully,
+            False otherwise.
+        """
+        try:
+            async with self.session_scope() as session:
+                deleted = (
+                    await session.execute(
+                        delete(Measurement)
+                        .where(Measurement.id == measurement_id)
+                        .returning(
+                            Measurement.sensor_id,
+                            Measurement.timestamp,
+                        ),
+                    )
+                ).first()
+                # Recompute the rollups the measurement was in
+                if deleted is not None:
+                    for statement in REBUILD_ROLLUPS:
+                        await session.execute(
+                            statement,
+                            {
+                                "sensor_id": deleted.sensor_id,
+                                "timestamp": deleted.timestamp,
+                            },
+                        )
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to delete measurement {measurement_id}: {e}")
+            return False
+        if deleted is None:
+            logger.warning(f"Measurement {measurement_id} not found")
+            return False
+        logger.info(f"Deleted measurement {measurement_id}")
+        return True
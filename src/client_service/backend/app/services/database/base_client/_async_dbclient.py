@@ -0,0 +1,187 @@
+"""
+Asynchronous counterpart of ``IDBClient``.
+
+Implemented by the client the API routes await, so a slow query only
+suspends its own request instead of the whole event loop.
+"""
+
+from abc import ABC, abstractmethod
+from collections.abc import AsyncGenerator, Sequence
+from contextlib import AbstractAsyncContextManager
+
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services.database.measurement_queries import (
+    STREAM_BATCH_SIZE,
+    MeasurementWindow,
+)
+from app.services.database.tables.deletion_jobs import (
+    DeletionTarget,
+    PydanticDeletionJob,
+)
+from app.services.database.tables.measurement_rollups import (
+    PydanticMeasurementRollup,
+    Resolution,
+)
+from app.services.database.tables.measurements import PydanticMeasurement
+from app.services.database.tables.processes import PydanticProcess
+from app.services.database.tables.sensor_registry import PydanticSensorRegistry
+
+
+# The async twin of IDBClient, plus the streaming and request session
+# methods of the API routes
+class IAsyncDBClient(ABC):  # noqa: PLR0904
+    @abstractmethod
+    async def connect(self) -> bool:
+        """Connect to the database."""
+
+    @abstractmethod
+    async def disconnect(self) -> bool:
+        """Disconnect from the database."""
+
+    @abstractmethod
+    def request_session(self) -> AbstractAsyncContextManager[AsyncSession]:
+        """Open a session shared by the calls of one API request."""
+
+    @abstractmethod
+    async def execute(self, query: str) -> bool:
+        """Execute a query on the database."""
+
+    @abstractmethod
+    async def add_new_measurement(
+        self,
+        measurement: PydanticMeasurement,
+    ) -> bool:
+        """Add a new measurement to the database."""
+
+    @abstractmethod
+    async def add_new_measurements(
+        self,
+        measurements: list[PydanticMeasurement],
+    ) -> bool:
+        """Add several measurements to the database in a single statement."""
+
+    @abstractmethod
+    async def get_all_measurements_from_process_id(
+        self,
+        process_id: int,
+        window: MeasurementWindow | None = None,
+    ) -> list[PydanticMeasurement]:
+        """Get all measurements from a process id."""
+
+    @abstractmethod
+    async def get_all_measurements_from_sensor_id(
+        self,
+        sensor_id: int,
+        window: MeasurementWindow | None = None,
+    ) -> list[PydanticMeasurement]:
+        """Get all measurements from a sensor id."""
+
+    @abstractmethod
+    async def get_measurement_rows(
+        self,
+        process_id: int | None = None,
+        sensor_id: int | None = None,
+        window: MeasurementWindow | None = None,
+    ) -> list[Row]:
+        """Get the measurements of a process or sensor as plain rows."""
+
+    @abstractmethod
+    def stream_measurements(
+        self,
+        process_id: int | None = None,
+        sensor_id: int | None = None,
+        window: MeasurementWindow | None = None,
+        batch_size: int = STREAM_BATCH_SIZE,
+    ) -> AsyncGenerator[Sequence[Row]]:
+        """Stream the measurements of a process or sensor in batches."""
+
+    @abstractmethod
+    async def get_measurement_rollups(
+        self,
+        process_id: int,
+        resolution: Resolution,
+        sensor_id: int | None = None,
+    ) -> list[PydanticMeasurementRollup]:
+        """Get the measurements of a process aggregated per bucket."""
+
+    @abstractmethod
+    async def create_new_process(
+        self,
+        process: PydanticProcess,
+    ) -> PydanticProcess | None:
+        """Create a new process."""
+
+    @abstractmethod
+    async def get_process_by_id(
+        self,
+        process_id: int,
+    ) -> PydanticProcess | None:
+        """Get a process by id."""
+
+    @abstractmethod
+    async def get_all_processes(self) -> list[PydanticProcess]:
+        """Get all processes."""
+
+    @abstractmethod
+    async def get_active_process(self) -> PydanticProcess | None:
+        """Get the most recent process that has not ended."""
+
+    @abstractmethod
+    def invalidate_active_process_cache(self) -> None:
+        """Drop the cached active process so the next lookup hits the DB."""
+
+    @abstractmethod
+    async def end_process(self, process_id: int) -> bool:
+        """End a process by updating ended_at."""
+
+    @abstractmethod
+    async def register_new_sensor(
+        self,
+        sensor_id: int,
+        process_id: int,
+    ) -> bool:
+        """Register a new sensor."""
+
+    @abstractmethod
+    async def register_new_sensors(
+        self,
+        process_id: int,
+        count: int,
+    ) -> list[int] | None:
+        """Allocate ids and register several sensors in one transaction."""
+
+    @abstractmethod
+    async def get_all_sensors_from_process_id(
+        self,
+        process_id: int,
+    ) -> list[PydanticSensorRegistry]:
+        """Get all sensors from a process id."""
+
+    @abstractmethod
+    async def get_all_sensors(self) -> list[PydanticSensorRegistry]:
+        """Get all registered sensors."""
+
+    @abstractmethod
+    async def get_sensor_by_id(
+        self,
+        sensor_id: int,
+    ) -> PydanticSensorRegistry | None:
+        """Get a sensor by id."""
+
+    @abstractmethod
+    async def start_deletion(
+        self,
+        target: DeletionTarget,
+        target_id: int,
+    ) -> PydanticDeletionJob | None:
+        """Hide a process or sensor and queue the deletion of its data."""
+
+    @abstractmethod
+    async def get_deletion_job(self, job_id: int) -> PydanticDeletionJob | None:
+        """Get a deletion job by id."""
+
+    @abstractmethod
+    async def delete_measurement(self, measurement_id: int) -> bool:
+        """Delete a measurement by id."""
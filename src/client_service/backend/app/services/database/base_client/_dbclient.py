@@ -9,6 +9,7 @@ Copyright (c) 2025 replace with company name. All rights reserved.
 
 from abc import ABC, abstractmethod
 
+from app.services.database.measurement_queries import MeasurementWindow
 from app.services.database.tables.measurements import PydanticMeasurement
 from app.services.database.tables.processes import PydanticProcess
 from app.services.database.tables.sensor_registry import PydanticSensorRegistry
@@ -31,10 +32,18 @@ class IDBClient(ABC):
     def add_new_measurement(self, measurement: PydanticMeasurement) -> bool:
         """Add a new measurement to the database."""
 
+    @abstractmethod
+    def add_new_measurements(
+        self,
+        measurements: list[PydanticMeasurement],
+    ) -> bool:
+        """Add several measurements to the database in a single statement."""
+
     @abstractmethod
     def get_all_measurements_from_process_id(
         self,
         process_id: int,
+        window: MeasurementWindow | None = None,
     ) -> list[PydanticMeasurement]:
         """Get all measurements from a process id."""
 
@@ -42,6 +51,7 @@ class IDBClient(ABC):
     def get_all_measurements_from_sensor_id(
         self,
         sensor_id: int,
+        window: MeasurementWindow | None = None,
     ) -> list[PydanticMeasurement]:
         """Get all measurements from a sensor id."""
 
@@ -60,6 +70,14 @@ class IDBClient(ABC):
     def get_all_processes(self) -> list[PydanticProcess]:
         """Get all processes."""
 
+    @abstractmethod
+    def get_active_process(self) -> PydanticProcess | None:
+        """Get the most recent process that has not ended."""
+
+    @abstractmethod
+    def invalidate_active_process_cache(self) -> None:
+        """Drop the cached active process so the next lookup hits the DB."""
+
     @abstractmethod
     def end_process(self, process_id: int) -> bool:
         """End a process by updating ended_at."""
@@ -68,6 +86,14 @@ class IDBClient(ABC):
     def register_new_sensor(self, sensor_id: int, process_id: int) -> bool:
         """Register a new sensor."""
 
+    @abstractmethod
+    def register_new_sensors(
+        self,
+        process_id: int,
+        count: int,
+    ) -> list[int] | None:
+        """Allocate ids and register several sensors in one transaction."""
+
     @abstractmethod
     def get_all_sensors_from_process_id(
         self,
@@ -76,16 +102,12 @@ class IDBClient(ABC):
         """Get all sensors from a process id."""
 
     @abstractmethod
-    def get_sensor_by_id(self, sensor_id: int) -> PydanticSensorRegistry | None:
-        """Get a sensor by id."""
-
-    @abstractmethod
-    def delete_process(self, process_id: int) -> bool:
-        """Delete a process and all related data."""
+    def get_all_sensors(self) -> list[PydanticSensorRegistry]:
+        """Get all registered sensors."""
 
     @abstractmethod
-    def delete_sensor(self, sensor_id: int) -> bool:
-        """Delete a sensor and all related measurements."""
+    def get_sensor_by_id(self, sensor_id: int) -> PydanticSensorRegistry | None:
+        """Get a sensor by id."""
 
     @abstractmethod
     def delete_measurement(self, measurement_id: int) -> bool:
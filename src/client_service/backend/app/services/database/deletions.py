@@ -0,0 +1,545 @@
+"""
+Background deletion of processes and sensors.
+
+Deleting a process with months of readings in one statement holds its
+locks for as long as the delete takes and can outlive the request. A
+delete request now only hides the target (``deleted_at``, so reads skip it
+from then on) and queues a job in ``deletion_jobs``. ``DeletionWorker``
+runs the jobs on a thread: readings and rollups are deleted in bounded
+batches, each in its own short transaction, and the registry rows go in
+a last transaction together with any reading that arrived meanwhile.
+
+Jobs live in the database, so a job left unfinished by a restart is
+resumed by any API replica. A session advisory lock per job keeps two
+replicas from running the same job.
+"""
+
+import threading
+from typing import Any
+
+from sqlalchemy import (
+    ColumnElement,
+    Connection,
+    Delete,
+    Engine,
+    Insert,
+    Table,
+    Update,
+    delete,
+    func,
+    insert,
+    select,
+    text,
+    tuple_,
+    update,
+)
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.services.database.partitions import (
+    process_time_floor,
+    sensor_time_floor,
+)
+from app.services.database.rollups import delete_rollups
+from app.services.database.tables.deletion_jobs import (
+    DeletionJob,
+    DeletionTarget,
+    JobStatus,
+    PydanticDeletionJob,
+)
+from app.services.database.tables.measurement_rollups import ROLLUP_TABLES
+from app.services.database.tables.measurements import Measurement
+from app.services.database.tables.processes import Process
+from app.services.database.tables.sensor_registry import SensorRegistry
+from app.utils.logger import logger
+
+# Key of the advisory locks held while running a job ("dele"); the job id
+# is the second key
+_LOCK_KEY = 0x64656C65
+
+UNFINISHED = (JobStatus.PENDING.value, JobStatus.RUNNING.value)
+
+# Longest error message stored with a job
+_MAX_ERROR_LENGTH = 500
+
+
+def hide_statements(target: DeletionTarget, target_id: int) -> list[Update]:
+    """
+    Build the updates that hide a target from reads.
+
+    The first one returns the id of the target if it was visible, so a
+    missing or already hidden target queues no job. Hiding a process hides
+    its sensors too.
+
+    Args:
+        target (DeletionTarget): What is deleted.
+        target_id (int): The id of the process or sensor.
+
+    Returns:
+        list[Update]: The updates, to run in one transaction.
+    """
+    now = func.localtimestamp()
+    if target is DeletionTarget.PROCESS:
+        return [
+            update(Process)
+            .where(Process.id == target_id, Process.deleted_at.is_(None))
+            .values(deleted_at=now)
+            .returning(Process.id),
+            update(SensorRegistry)
+            .where(
+                SensorRegistry.process_id == target_id,
+                SensorRegistry.deleted_at.is_(None),
+            )
+            .values(deleted_at=now),
+        ]
+    return [
+        update(SensorRegistry)
+        .where(
+            SensorRegistry.sensor_id == target_id,
+            SensorRegistry.deleted_at.is_(None),
+        )
+        .values(deleted_at=now)
+        .returning(SensorRegistry.sensor_id),
+    ]
+
+
+def insert_job(target: DeletionTarget, target_id: int) -> Insert:
+    """
+    Build the insert of a pending job.
+
+    Args:
+        target (DeletionTarget): What is deleted.
+        target_id (int): The id of the process or sensor.
+
+    Returns:
+        Insert: The insert, returning the job.
+    """
+    return (
+        insert(DeletionJob)
+        .values(
+            target=target.value,
+            target_id=target_id,
+            status=JobStatus.PENDING.value,
+            deleted_rows=0,
+            attempts=0,
+            created_at=func.localtimestamp(),
+        )
+        .returning(DeletionJob)
+    )
+
+
+def job_model(job: DeletionJob) -> PydanticDeletionJob:
+    """
+    Convert a job row to its model.
+
+    Args:
+        job (DeletionJob): The job.
+
+    Returns:
+        PydanticDeletionJob: The job model.
+    """
+    return PydanticDeletionJob(
+        id=job.id,
+        target=job.target,
+        target_id=job.target_id,
+        status=job.status,
+        deleted_rows=job.deleted_rows,
+        error=job.error,
+        created_at=job.created_at,
+        finished_at=job.finished_at,
+    )
+
+
+def _measurement_filter(
+    target: DeletionTarget,
+    target_id: int,
+) -> ColumnElement[bool]:
+    if target is DeletionTarget.PROCESS:
+        return (Measurement.process_id == target_id) & (
+            Measurement.timestamp >= process_time_floor(target_id)
+        )
+    return (Measurement.sensor_id == target_id) & (
+        Measurement.timestamp >= sensor_time_floor(target_id)
+    )
+
+
+def _batched_delete(
+    table: Table,
+    keys: tuple[str, ...],
+    where: ColumnElement[bool],
+    batch_size: int,
+) -> Delete:
+    # DELETE has no LIMIT: pick a batch of primary keys first
+    columns = [table.c[key] for key in keys]
+    return delete(table).where(
+        tuple_(*columns).in_(select(*columns).where(where).limit(batch_size)),
+    )
+
+
+def batch_deletes(
+    target: DeletionTarget,
+    target_id: int,
+    batch_size: int,
+) -> list[Delete]:
+    """
+    Build the deletes of one batch of each table with data of a target.
+
+    Each one is repeated until it deletes less than ``batch_size`` rows.
+
+    Args:
+        target (DeletionTarget): What is deleted.
+        target_id (int): The id of the process or sensor.
+        batch_size (int): Maximum rows per delete.
+
+    Returns:
+        list[Delete]: The deletes of the readings and the rollups.
+    """
+    statements = [
+        _batched_delete(
+            Measurement.__table__,
+            ("id", "timestamp"),
+            _measurement_filter(target, target_id),
+            batch_size,
+        ),
+    ]
+    for table in ROLLUP_TABLES.values():
+        owner = (
+            table.process_id
+            if target is DeletionTarget.PROCESS
+            else table.sensor_id
+        )
+        statements.append(
+            _batched_delete(
+                table.__table__,
+                ("sensor_id", "bucket"),
+                owner == target_id,
+                batch_size,
+            ),
+        )
+    return statements
+
+
+def final_deletes(target: DeletionTarget, target_id: int) -> list[Delete]:
+    """
+    Build the deletes that remove a target once its data is gone.
+
+    Readings stored while the batches ran (before every consumer saw the
+    target hidden) are removed here too, in the same transaction.
+
+    Args:
+        target (DeletionTarget): What is deleted.
+        target_id (int): The id of the process or sensor.
+
+    Returns:
+        list[Delete]: The deletes, to run in one transaction.
+    """
+    readings = delete(Measurement).where(
+        _measurement_filter(target, target_id),
+    )
+    if target is DeletionTarget.PROCESS:
+        return [
+            readings,
+            *delete_rollups(process_id=target_id),
+            delete(SensorRegistry).where(
+                SensorRegistry.process_id == target_id,
+            ),
+            delete(Process).where(Process.id == target_id),
+        ]
+    return [
+        readings,
+        *delete_rollups(sensor_id=target_id),
+        delete(SensorRegistry).where(SensorRegistry.sensor_id == target_id),
+    ]
+
+
+class DeletionWorker:
+    """Runs the queued deletion jobs in bounded batches on a thread."""
+
+    def __init__(
+        self,
+        engine: Engine,
+        batch_size: int = 5000,
+        pause: float = 0.0,
+        interval: float = 10.0,
+        max_attempts: int = 5,
+    ) -> None:
+        """
+        Initialize the deletion worker.
+
+        Args:
+            engine (Engine): Engine of the database.
+            batch_size (int): Maximum rows deleted per transaction.
+            pause (float): Seconds between batches, to leave room for the
+                ingestion on a busy database.
+            interval (float): Seconds between checks for jobs queued by
+                other replicas or left unfinished (jobs queued by this
+                replica start right away, see ``wake``).
+            max_attempts (int): Runs of a job that fail before it is
+                marked as failed.
+        """
+        self.engine = engine
+        self.batch_size = max(1, batch_size)
+        self.pause = max(0.0, pause)
+        self.interval = interval
+        self.max_attempts = max(1, max_attempts)
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._stats: dict[str, Any] = {
+            "done": 0,
+            "failed": 0,
+            "deleted_rows": 0,
+        }
+
+    def start(self) -> None:
+        """Start the worker thread (pending jobs are checked right away)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run_loop,
+            name="deletion-worker",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the worker thread; a running job resumes on the next start."""
+        self._stop_event.set()
+        self._wake_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def wake(self) -> None:
+        """Check for pending jobs now instead of after ``interval``."""
+        self._wake_event.set()
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Get job counters.
+
+        Returns:
+            dict[str, Any]: Jobs done and failed, and rows deleted.
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def run_pending(self) -> int:
+        """
+        Run the unfinished jobs no other replica is running.
+
+        Returns:
+            int: Number of jobs finished.
+        """
+        finished = 0
+        try:
+            with self.engine.connect() as conn:
+                for job_id in self._unfinished_job_ids(conn):
+                    if self._stop_event.is_set():
+                        break
+                    finished += self._run_locked_job(conn, job_id)
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to run deletion jobs: {e}")
+        return finished
+
+    def _run_loop(self) -> None:
+        """Run the pending jobs when woken or every ``interval`` seconds."""
+        while not self._stop_event.is_set():
+            self._wake_event.clear()
+            self.run_pending()
+            self._wake_event.wait(self.interval)
+
+    @staticmethod
+    def _unfinished_job_ids(conn: Connection) -> list[int]:
+        """
+        List the jobs that are pending or were interrupted.
+
+        Args:
+            conn (Connection): Database connection.
+
+        Returns:
+            list[int]: The ids of the jobs, oldest first.
+        """
+        job_ids = conn.scalars(
+            select(DeletionJob.id)
+            .where(DeletionJob.status.in_(UNFINISHED))
+            .order_by(DeletionJob.id),
+        ).all()
+        conn.commit()
+        return list(job_ids)
+
+    def _run_locked_job(self, conn: Connection, job_id: int) -> bool:
+        """
+        Run a job unless another replica holds its lock.
+
+        Args:
+            conn (Connection): Connection to take the lock on.
+            job_id (int): The id of the job.
+
+        Returns:
+            bool: True if the job finished, False otherwise.
+        """
+        # Held by the session, across the batch transactions
+        locked = conn.scalar(
+            text("SELECT pg_try_advisory_lock(:key, :job_id)"),
+            {"key": _LOCK_KEY, "job_id": job_id},
+        )
+        conn.commit()
+        if not locked:
+            return False
+        try:
+            return self._run_job(conn, job_id)
+        finally:
+            conn.execute(
+                text("SELECT pg_advisory_unlock(:key, :job_id)"),
+                {"key": _LOCK_KEY, "job_id": job_id},
+            )
+            conn.commit()
+
+    def _run_job(self, conn: Connection, job_id: int) -> bool:
+        """
+        Delete the data of a job batch by batch, then its target.
+
+        Args:
+            conn (Connection): Connection holding the lock of the job.
+            job_id (int): The id of the job.
+
+        Returns:
+            bool: True if the job finished, False if it failed or the
+            worker is stopping (it is resumed later).
+        """
+        with conn.begin():
+            job = conn.execute(
+                select(
+                    DeletionJob.target,
+                    DeletionJob.target_id,
+                    DeletionJob.status,
+                    DeletionJob.attempts,
+                ).where(DeletionJob.id == job_id),
+            ).first()
+            # Finished by another replica since the jobs were listed
+            if job is None or job.status not in UNFINISHED:
+                return False
+            conn.execute(
+                update(DeletionJob)
+                .where(DeletionJob.id == job_id)
+                .values(
+                    status=JobStatus.RUNNING.value,
+                    attempts=DeletionJob.attempts + 1,
+                ),
+            )
+
+        target = DeletionTarget(job.target)
+        try:
+            if not self._delete_batches(conn, job_id, target, job.target_id):
+                return False
+            self._finish_job(conn, job_id, target, job.target_id)
+        except SQLAlchemyError as e:
+            logger.error(f"Deletion job {job_id} failed: {e}")
+            self._record_failure(conn, job_id, job.attempts + 1, e)
+            return False
+
+        logger.info(
+            f"Deletion job {job_id} removed {target.value} {job.target_id}",
+        )
+        with self._lock:
+            self._stats["done"] += 1
+        return True
+
+    def _delete_batches(
+        self,
+        conn: Connection,
+        job_id: int,
+        target: DeletionTarget,
+        target_id: int,
+    ) -> bool:
+        """
+        Delete the data of a job target, one batch per transaction.
+
+        Args:
+            conn (Connection): Connection holding the lock of the job.
+            job_id (int): The id of the job.
+            target (DeletionTarget): What the job deletes.
+            target_id (int): The id of the process or sensor.
+
+        Returns:
+            bool: True if all batches were deleted, False if the worker is
+            stopping.
+        """
+        for statement in batch_deletes(target, target_id, self.batch_size):
+            deleted = self.batch_size
+            while deleted >= self.batch_size:
+                with conn.begin():
+                    deleted = conn.execute(statement).rowcount
+                    conn.execute(
+                        update(DeletionJob)
+                        .where(DeletionJob.id == job_id)
+                        .values(
+                            deleted_rows=DeletionJob.deleted_rows + deleted,
+                        ),
+                    )
+                with self._lock:
+                    self._stats["deleted_rows"] += deleted
+                if self._stop_event.wait(self.pause):
+                    return False
+        return True
+
+    @staticmethod
+    def _finish_job(
+        conn: Connection,
+        job_id: int,
+        target: DeletionTarget,
+        target_id: int,
+    ) -> None:
+        """
+        Delete the job target itself and mark the job as done.
+
+        Args:
+            conn (Connection): Connection holding the lock of the job.
+            job_id (int): The id of the job.
+            target (DeletionTarget): What the job deletes.
+            target_id (int): The id of the process or sensor.
+        """
+        with conn.begin():
+            for statement in final_deletes(target, target_id):
+                conn.execute(statement)
+            conn.execute(
+                update(DeletionJob)
+                .where(DeletionJob.id == job_id)
+                .values(
+                    status=JobStatus.DONE.value,
+                    error=None,
+                    finished_at=func.localtimestamp(),
+                ),
+            )
+
+    def _record_failure(
+        self,
+        conn: Connection,
+        job_id: int,
+        attempts: int,
+        error: SQLAlchemyError,
+    ) -> None:
+        """
+        Store the error of a job; give up after ``max_attempts`` runs.
+
+        Args:
+            conn (Connection): Connection holding the lock of the job.
+            job_id (int): The id of the job.
+            attempts (int): Runs of the job so far.
+            error (SQLAlchemyError): The error of this run.
+        """
+        values: dict[str, Any] = {"error": str(error)[:_MAX_ERROR_LENGTH]}
+        if attempts >= self.max_attempts:
+            values["status"] = JobStatus.FAILED.value
+            values["finished_at"] = func.localtimestamp()
+            with self._lock:
+                self._stats["failed"] += 1
+        with conn.begin():
+            conn.execute(
+                update(DeletionJob)
+                .where(DeletionJob.id == job_id)
+                .values(**values),
+            )
@@ -8,14 +8,15 @@ Copyright (c) 2025 Estufa Dashboard. All rights reserved.
 """
 
 import os
-from typing import Optional
+from typing import Any, Optional
 from urllib.parse import urlparse
 
 from sqlalchemy import create_engine, text
 from sqlalchemy.exc import SQLAlchemyError
 
+from app.services.database.async_psg_client import AsyncPSGClient
+from app.services.database.migrate import run_migrations
 from app.services.database.psg_client import PSGClient
-from app.services.database.tables.base import Base
 from app.utils.logger import logger
 
 
@@ -32,6 +33,30 @@ def get_database_url() -> str:
     )
 
 
+def get_pool_options() -> dict[str, Any]:
+    """
+    Get the connection pool settings from environment variables.
+
+    Used for the sync and the async engine (each has its own pool). The
+    pool has to cover the MQTT flusher and bind threads plus the API
+    requests served at the same time; ``DB_POOL_TIMEOUT`` bounds how long a
+    caller waits for a connection when all of them are checked out.
+
+    Returns:
+        dict[str, Any]: QueuePool keyword arguments for ``create_engine``.
+    """
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "10")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "20")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        # Replace connections before server or proxy idle timeouts
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        # Test connections on checkout (e.g. after a database restart)
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower()
+        in {"1", "true", "yes"},
+    }
+
+
 def create_database_if_not_exists(
     database_name: str,
     user: str,
@@ -87,26 +112,27 @@ def create_database_if_not_exists(
         return False
 
 
-def create_database_tables() -> bool:
+def migrate_database() -> bool:
     """
-    Create all database tables.
+    Bring the database schema up to date with the versioned migrations.
 
     Returns:
-        bool: True if the tables were created successfully, False otherwise.
+        bool: True if the schema is up to date, False otherwise.
     """
+    engine = create_engine(get_database_url(), echo=False)
     try:
-        database_url = get_database_url()
-        engine = create_engine(database_url, echo=False)
-
-        # Criar todas as tabelas
-        Base.metadata.create_all(bind=engine)
-
-        logger.info("Successfully created all database tables")
-        return True
-
+        applied = run_migrations(engine)
     except SQLAlchemyError as e:
-        logger.error(f"Failed to create database tables: {e}")
+        logger.error(f"Failed to migrate database: {e}")
         return False
+    finally:
+        engine.dispose()
+
+    if applied:
+        logger.info(f"Applied schema migrations {applied}")
+    else:
+        logger.info("Database schema is up to date")
+    return True
 
 
 def initialize_database() -> Optional[PSGClient]:
@@ -147,6 +173,7 @@ def initialize_database() -> Optional[PSGClient]:
             database=database,
             user=user,
             password=password,
+            pool_options=get_pool_options(),
         )
 
         # Connect to database
@@ -154,9 +181,9 @@ def initialize_database() -> Optional[PSGClient]:
             logger.error("Failed to connect to database")
             return None
 
-        # Create tables
-        if not create_database_tables():
-            logger.error("Failed to create database tables")
+        # Create or update tables
+        if not migrate_database():
+            logger.error("Failed to migrate database")
             return None
 
         logger.info("Database initialization completed successfully")
@@ -182,3 +209,51 @@ def close_database(db_client: PSGClient) -> bool:
     except Exception as e:
         logger.error(f"Failed to close database connection: {e}")
         return False
+
+
+async def initialize_async_database(
+    db_client: PSGClient,
+) -> Optional[AsyncPSGClient]:
+    """
+    Create an async database client for an initialized database.
+
+    The async client connects with the same parameters as ``db_client`` and
+    shares its active process cache.
+
+    Args:
+        db_client (PSGClient): The initialized sync database client.
+
+    Returns:
+        Optional[AsyncPSGClient]: The async database client if the connection
+        was successful, None otherwise.
+    """
+    async_db_client = AsyncPSGClient(
+        host=db_client.host,
+        port=db_client.port,
+        database=db_client.database,
+        user=db_client.user,
+        password=db_client.password,
+        active_process_cache=db_client.active_process_cache,
+        pool_options=db_client.pool_options,
+    )
+    if not await async_db_client.connect():
+        logger.error("Failed to connect async database client")
+        return None
+    return async_db_client
+
+
+async def close_async_database(async_db_client: AsyncPSGClient) -> bool:
+    """
+    Close the async database connection.
+
+    Args:
+        async_db_client (AsyncPSGClient): The async database client to close.
+
+    Returns:
+        bool: True if the connection was closed successfully, False otherwise.
+    """
+    try:
+        return await async_db_client.disconnect()
+    except Exception as e:
+        logger.error(f"Failed to close async database connection: {e}")
+        return False
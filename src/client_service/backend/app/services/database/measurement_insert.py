@@ -0,0 +1,203 @@
+"""
+Bulk insert of measurements with deduplication.
+
+A partitioned table can only have unique constraints that include the
+partition key, so ``(sensor_id, seq)`` cannot be unique in ``measurements``
+itself. The pairs are claimed in ``measurement_seqs`` instead, in the same
+statement: a reading is inserted only if its pair was not stored before
+(readings without ``seq`` are always inserted). Concurrent inserts of the
+same pair, also from other API replicas, wait for each other on the
+``measurement_seqs`` primary key, so a redelivered reading is stored once.
+The readings actually inserted are merged into the rollup tables by the
+same statement (see ``rollups.py``).
+
+A sensor that reboots (or whose uint32 ``seq`` wraps around) counts again
+from zero, and its new readings would collide with the pairs it stored
+before. As in ``sequence_dedup``, a ``seq`` more than ``SEQ_RESET_GAP``
+below the highest stored ``seq`` of the sensor starts a new epoch:
+``RESET_SEQUENCES`` runs before the insert, in the same transaction, and
+forgets the sensor's pairs from that ``seq`` up, so the new epoch can claim
+them. It cannot run as a CTE of the insert, whose ``ON CONFLICT`` would
+still see the deleted pairs.
+
+Readings of a sensor that is not registered to their process, or whose
+deletion was requested (``deleted_at``), are skipped by the statement: a
+consumer with a stale sensor cache (e.g. another API replica), a buffer or
+the spool may still hold readings of a deleted sensor or process, and they
+must not fail the batch on the foreign keys.
+
+A batch the database rejects because of its rows (a constraint or an
+invalid value, ``REJECTED_ERRORS``) would fail again on every retry, so the
+clients split it until the rejected readings are isolated, store the rest
+and drop those (``reject_measurement``). Other errors (connection lost,
+database down) fail the whole batch, to be retried later.
+"""
+
+from typing import Any
+
+from sqlalchemy import text
+from sqlalchemy.exc import DataError, IntegrityError
+
+from app.services.database.rollups import merge_rollups_ctes
+from app.services.database.tables.measurements import PydanticMeasurement
+from app.utils.logger import logger
+from app.utils.metrics import Counter
+
+# Caused by the rows of the batch: retrying the same rows fails again
+REJECTED_ERRORS = (IntegrityError, DataError)
+
+MEASUREMENTS_REJECTED = Counter(
+    "estufa_measurements_rejected_total",
+    "Measurements dropped because the database rejected them.",
+)
+
+# A seq this far below the highest stored one starts a new epoch of the
+# sensor (the default DEDUP_WINDOW of the consumers)
+SEQ_RESET_GAP = 1024
+
+RESET_SEQUENCES = text(
+    """
+    WITH lowest AS (
+        SELECT b.sensor_id, min(b.seq) AS seq
+        FROM unnest(
+            CAST(:sensor_id AS integer[]),
+            CAST(:seq AS bigint[])
+        ) AS b (sensor_id, seq)
+        WHERE b.seq IS NOT NULL
+        GROUP BY b.sensor_id
+    ),
+    reset AS (
+        SELECT l.sensor_id, l.seq
+        FROM lowest l
+        WHERE l.seq < (
+            SELECT max(m.seq) FROM measurement_seqs m
+            WHERE m.sensor_id = l.sensor_id
+        ) - :gap
+    )
+    DELETE FROM measurement_seqs m
+    USING reset r
+    WHERE m.sensor_id = r.sensor_id AND m.seq >= r.seq
+    """,
+)
+
+# The batch is sent as one array per column, so the statement (and its
+# prepared plan) is the same for any batch size
+INSERT_MEASUREMENTS = text(
+    """
+    WITH batch AS (
+        SELECT b.* FROM unnest(
+            CAST(:process_id AS integer[]),
+            CAST(:sensor_id AS integer[]),
+            CAST(:rh AS double precision[]),
+            CAST(:soc AS double precision[]),
+            CAST(:timestamp AS timestamptz[]),
+            CAST(:seq AS bigint[])
+        ) AS b (process_id, sensor_id, rh, soc, "timestamp", seq)
+        JOIN sensor_registry s
+            ON s.sensor_id = b.sensor_id
+            AND s.process_id = b.process_id
+            AND s.deleted_at IS NULL
+    ),
+    claimed AS (
+        INSERT INTO measurement_seqs (sensor_id, seq)
+        SELECT DISTINCT sensor_id, seq FROM batch WHERE seq IS NOT NULL
+        ON CONFLICT DO NOTHING
+        RETURNING sensor_id, seq
+    ),
+    numbered AS (
+        SELECT DISTINCT ON (sensor_id, seq) *
+        FROM batch
+        WHERE seq IS NOT NULL
+        ORDER BY sensor_id, seq
+    ),
+    inserted AS (
+        INSERT INTO measurements
+            (process_id, sensor_id, rh, soc, "timestamp", seq)
+        SELECT process_id, sensor_id, rh, soc, "timestamp", seq
+        FROM batch
+        WHERE seq IS NULL
+        UNION ALL
+        SELECT n.process_id, n.sensor_id, n.rh, n.soc, n."timestamp", n.seq
+        FROM numbered n
+        JOIN claimed c USING (sensor_id, seq)
+        RETURNING process_id, sensor_id, rh, soc, "timestamp"
+    ),
+    """  # noqa: S608
+    + merge_rollups_ctes("inserted")
+    # Number of measurements stored (the rest were redeliveries)
+    + " SELECT count(*) FROM inserted",
+)
+
+
+def insert_params(measurements: list[PydanticMeasurement]) -> dict[str, Any]:
+    """
+    Get the parameters of ``INSERT_MEASUREMENTS`` for a batch.
+
+    Args:
+        measurements (list[PydanticMeasurement]): The measurements to add.
+
+    Returns:
+        dict[str, Any]: One list of values per column.
+    """
+    return {
+        "process_id": [m.process_id for m in measurements],
+        "sensor_id": [m.sensor_id for m in measurements],
+        "rh": [m.rh for m in measurements],
+        "soc": [m.soc for m in measurements],
+        "timestamp": [m.timestamp for m in measurements],
+        "seq": [m.seq for m in measurements],
+    }
+
+
+def reset_params(measurements: list[PydanticMeasurement]) -> dict[str, Any]:
+    """
+    Get the parameters of ``RESET_SEQUENCES`` for a batch.
+
+    Args:
+        measurements (list[PydanticMeasurement]): The measurements to add.
+
+    Returns:
+        dict[str, Any]: The sensor ids, the sequence numbers and the gap.
+    """
+    return {
+        "sensor_id": [m.sensor_id for m in measurements],
+        "seq": [m.seq for m in measurements],
+        "gap": SEQ_RESET_GAP,
+    }
+
+
+def split_batch(
+    measurements: list[PydanticMeasurement],
+) -> tuple[list[PydanticMeasurement], list[PydanticMeasurement]]:
+    """
+    Split a rejected batch in two halves, to be inserted separately.
+
+    Args:
+        measurements (list[PydanticMeasurement]): The batch (two or more
+            measurements).
+
+    Returns:
+        tuple[list[PydanticMeasurement], list[PydanticMeasurement]]: The
+        first and the second half.
+    """
+    middle = len(measurements) // 2
+    return measurements[:middle], measurements[middle:]
+
+
+def reject_measurement(
+    measurement: PydanticMeasurement,
+    error: IntegrityError | DataError,
+) -> None:
+    """
+    Drop a measurement the database rejected on its own.
+
+    Args:
+        measurement (PydanticMeasurement): The measurement.
+        error (IntegrityError | DataError): The error of its insert.
+    """
+    MEASUREMENTS_REJECTED.inc()
+    logger.error(
+        f"Dropped measurement of sensor {measurement.sensor_id} "
+        f"(process {measurement.process_id}, seq {measurement.seq}, "
+        f"{measurement.timestamp}) rejected by the database: {error.orig}",
+    )
@@ -0,0 +1,160 @@
+"""
+Queries of the measurements of a process or a sensor.
+
+Shared by the sync and the async client. The time range and the keyset
+cursor are part of the SQL, so only the requested readings leave the
+database: ``from``/``to`` prune the monthly partitions and ``after_id``
+with ``limit`` reads the ``(process_id, id)`` or ``(sensor_id, id)``
+index from the last id a client has seen.
+
+``measurement_rows_query`` selects the same readings as plain rows. Loading
+an ORM object per reading costs more than the query for large results, so
+the read paths use rows: they are encoded as they are, or turned into
+``PydanticMeasurement`` models without an ORM object in between.
+"""
+
+import datetime as dt
+from collections.abc import Iterable, Sequence
+from typing import Any, NamedTuple
+
+from sqlalchemy import BindParameter, DateTime, Select, literal, select
+
+from app.config.timezone_config import SAO_PAULO_TZ
+from app.services.database.partitions import (
+    process_time_floor,
+    sensor_time_floor,
+)
+from app.services.database.tables.measurements import (
+    Measurement,
+    PydanticMeasurement,
+)
+from app.services.database.tables.sensor_registry import SensorRegistry
+
+# Columns of the rows of ``measurement_rows_query``, in order
+MEASUREMENT_COLUMNS = tuple(Measurement.__table__.columns)
+MEASUREMENT_FIELDS = tuple(column.name for column in MEASUREMENT_COLUMNS)
+
+# Readings per round trip when streaming from a server-side cursor
+STREAM_BATCH_SIZE = 5000
+
+
+class MeasurementWindow(NamedTuple):
+    """Time range and keyset page of the readings to read."""
+
+    # Only readings taken at or after this time
+    start: dt.datetime | None = None
+    # Only readings taken before this time
+    end: dt.datetime | None = None
+    # Only readings with a greater id (the last id of the previous page)
+    after_id: int | None = None
+    # Maximum number of readings
+    limit: int | None = None
+
+
+def hidden_sensor_ids() -> Select:
+    """
+    Select the sensors whose deletion is in progress.
+
+    Their readings are removed in batches by a deletion job and must not
+    show up meanwhile. Deleting a process hides its sensors too.
+
+    Returns:
+        Select: The ids of the hidden sensors.
+    """
+    return select(SensorRegistry.sensor_id).where(
+        SensorRegistry.deleted_at.is_not(None),
+    )
+
+
+def _as_timestamptz(value: dt.datetime) -> BindParameter:
+    # Naive times are in São Paulo like the rest of the API; compared as
+    # timestamptz, PostgreSQL converts them like the stored timestamps
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=SAO_PAULO_TZ)
+    return literal(value, DateTime(timezone=True))
+
+
+def measurements_query(
+    process_id: int | None = None,
+    sensor_id: int | None = None,
+    window: MeasurementWindow | None = None,
+) -> Select:
+    """
+    Build the query of the measurements of a process or a sensor.
+
+    Args:
+        process_id (int | None): The id of the process.
+        sensor_id (int | None): The id of the sensor.
+        window (MeasurementWindow | None): Time range and keyset page
+            (``after_id`` is the cursor); all the readings if not given.
+
+    Returns:
+        Select: The query, ordered by id.
+    """
+    start, end, after_id, limit = window or MeasurementWindow()
+    query = select(Measurement).where(
+        Measurement.sensor_id.not_in(hidden_sensor_ids()),
+    )
+    if process_id is not None:
+        query = query.where(
+            Measurement.process_id == process_id,
+            # Skips the partitions before the process started
+            Measurement.timestamp >= process_time_floor(process_id),
+        )
+    if sensor_id is not None:
+        query = query.where(
+            Measurement.sensor_id == sensor_id,
+            Measurement.timestamp >= sensor_time_floor(sensor_id),
+        )
+    if start is not None:
+        query = query.where(Measurement.timestamp >= _as_timestamptz(start))
+    if end is not None:
+        query = query.where(Measurement.timestamp < _as_timestamptz(end))
+    if after_id is not None:
+        query = query.where(Measurement.id > after_id)
+    query = query.order_by(Measurement.id)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+def measurement_rows_query(
+    process_id: int | None = None,
+    sensor_id: int | None = None,
+    window: MeasurementWindow | None = None,
+) -> Select:
+    """
+    Build the query of the measurements as plain rows.
+
+    Args:
+        process_id (int | None): The id of the process.
+        sensor_id (int | None): The id of the sensor.
+        window (MeasurementWindow | None): Time range and keyset page.
+
+    Returns:
+        Select: The query of ``MEASUREMENT_COLUMNS``, ordered by id.
+    """
+    return measurements_query(
+        process_id=process_id,
+        sensor_id=sensor_id,
+        window=window,
+    ).with_only_columns(*MEASUREMENT_COLUMNS)
+
+
+def measurements_from_rows(
+    rows: Iterable[Sequence[Any]],
+) -> list[PydanticMeasurement]:
+    """
+    Build the models of rows of ``measurement_rows_query``.
+
+    Args:
+        rows (Iterable[Sequence[Any]]): Rows of ``MEASUREMENT_COLUMNS``.
+
+    Returns:
+        list[PydanticMeasurement]: One model per row.
+    """
+    # Validating is faster than model_construct, which runs in Python
+    return [
+        PydanticMeasurement(**dict(zip(MEASUREMENT_FIELDS, row, strict=True)))
+        for row in rows
+    ]
@@ -0,0 +1,221 @@
+"""
+Versioned schema migrations.
+
+Migrations are the modules of ``app/services/database/migrations`` named
+``v<version>_<description>.py``, applied in version order. Each one defines
+``upgrade(conn)`` and may set ``TRANSACTIONAL = False`` when it runs
+statements that cannot be inside a transaction (``CREATE INDEX
+CONCURRENTLY``); those run on an autocommit connection and must be safe to
+re-run after a failure. Applied versions are recorded in
+``schema_migrations``, and a PostgreSQL advisory lock keeps API replicas
+that start together from applying the same migration twice.
+
+A migration is never edited once released: schema changes (columns,
+indexes) go in a new module, so they also reach existing deployments.
+"""
+
+import importlib
+import pkgutil
+import re
+from collections.abc import Callable
+from typing import NamedTuple
+
+from sqlalchemy import Connection, Engine, text
+
+from app.utils.logger import logger
+
+MIGRATIONS_PACKAGE = "app.services.database.migrations"
+
+# Key of the advisory lock held while migrating ("estufa" in ASCII)
+_LOCK_KEY = 0x657374756661
+
+_MODULE_NAME = re.compile(r"v(?P<version>\d+)_(?P<name>\w+)")
+
+
+class Migration(NamedTuple):
+    """A schema migration module."""
+
+    version: int
+    name: str
+    upgrade: Callable[[Connection], None]
+    transactional: bool
+
+
+def discover_migrations() -> list[Migration]:
+    """
+    Find the migration modules, in version order.
+
+    Returns:
+        list[Migration]: The migrations.
+
+    Raises:
+        ValueError: If two modules have the same version.
+    """
+    package = importlib.import_module(MIGRATIONS_PACKAGE)
+    migrations: dict[int, Migration] = {}
+    for module_info in pkgutil.iter_modules(package.__path__):
+        match = _MODULE_NAME.fullmatch(module_info.name)
+        if match is None:
+            continue
+        version = int(match["version"])
+        if version in migrations:
+            msg = f"Duplicate migration version {version}"
+            raise ValueError(msg)
+        module = importlib.import_module(
+            f"{MIGRATIONS_PACKAGE}.{module_info.name}",
+        )
+        migrations[version] = Migration(
+            version=version,
+            name=match["name"],
+            upgrade=module.upgrade,
+            transactional=getattr(module, "TRANSACTIONAL", True),
+        )
+    return [migrations[version] for version in sorted(migrations)]
+
+
+def run_migrations(engine: Engine) -> list[int]:
+    """
+    Apply the migrations that are not recorded in ``schema_migrations``.
+
+    Args:
+        engine (Engine): Engine of the database to migrate.
+
+    Returns:
+        list[int]: Versions applied by this call.
+    """
+    applied: list[int] = []
+    with engine.connect().execution_options(
+        isolation_level="AUTOCOMMIT",
+    ) as lock_conn:
+        # Blocks until another replica finishes migrating
+        lock_conn.execute(
+            text("SELECT pg_advisory_lock(:key)"),
+            {"key": _LOCK_KEY},
+        )
+        try:
+            lock_conn.execute(
+                text(
+                    "CREATE TABLE IF NOT EXISTS schema_migrations ("
+                    "version INTEGER PRIMARY KEY, "
+                    "name VARCHAR NOT NULL, "
+                    "applied_at TIMESTAMPTZ NOT NULL DEFAULT now())",
+                ),
+            )
+            done = set(
+                lock_conn.scalars(
+                    text("SELECT version FROM schema_migrations"),
+                ),
+            )
+            for migration in discover_migrations():
+                if migration.version in done:
+                    continue
+                logger.info(
+                    "Applying migration v%04d_%s",
+                    migration.version,
+                    migration.name,
+                )
+                if migration.transactional:
+                    with engine.begin() as conn:
+                        migration.upgrade(conn)
+                        _record(conn, migration)
+                else:
+                    migration.upgrade(lock_conn)
+                    _record(lock_conn, migration)
+                applied.append(migration.version)
+        finally:
+            lock_conn.execute(
+                text("SELECT pg_advisory_unlock(:key)"),
+                {"key": _LOCK_KEY},
+            )
+    return applied
+
+
+def _record(conn: Connection, migration: Migration) -> None:
+    conn.execute(
+        text(
+            "INSERT INTO schema_migrations (version, name) "
+            "VALUES (:version, :name)",
+        ),
+        {"version": migration.version, "name": migration.name},
+    )
+
+
+def create_index_concurrently(
+    conn: Connection,
+    name: str,
+    definition: str,
+) -> None:
+    """
+    Build an index without blocking writes to its table.
+
+    An interrupted ``CREATE INDEX CONCURRENTLY`` leaves an invalid index
+    behind that ``IF NOT EXISTS`` would skip, so it is dropped first. Must
+    run on an autocommit connection (``TRANSACTIONAL = False``).
+
+    Args:
+        conn (Connection): Autocommit connection.
+        name (str): Index name.
+        definition (str): What follows ``ON`` in ``CREATE INDEX``, e.g.
+            ``"measurements (sensor_id, timestamp)"``.
+    """
+    invalid = conn.scalar(
+        text(
+            "SELECT 1 FROM pg_index i "
+            "JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = :name AND NOT i.indisvalid",
+        ),
+        {"name": name},
+    )
+    if invalid:
+        logger.warning(f"Dropping invalid index {name} before rebuilding it")
+        conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+    conn.execute(
+        text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {definition}"),
+    )
+
+
+def create_partitioned_index_concurrently(
+    conn: Connection,
+    name: str,
+    table: str,
+    columns: str,
+) -> None:
+    """
+    Build an index on a partitioned table without blocking writes.
+
+    PostgreSQL cannot build an index on a partitioned table concurrently:
+    the index is created on the parent only (invalid until complete), then
+    built concurrently on each partition and attached. Partitions created
+    afterwards get the index with the parent's definition. Must run on an
+    autocommit connection (``TRANSACTIONAL = False``).
+
+    Args:
+        conn (Connection): Autocommit connection.
+        name (str): Index name on the parent table.
+        table (str): Partitioned table.
+        columns (str): Indexed columns, e.g. ``"(sensor_id, id)"``.
+    """
+    conn.execute(
+        text(f"CREATE INDEX IF NOT EXISTS {name} ON ONLY {table} {columns}"),
+    )
+    partitions = conn.scalars(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = CAST(:table AS regclass)",
+        ),
+        {"table": table},
+    ).all()
+    for partition in partitions:
+        child = f"{name}_{partition}"
+        create_index_concurrently(conn, child, f"{partition} {columns}")
+        attached = conn.scalar(
+            text(
+                "SELECT 1 FROM pg_inherits "
+                "WHERE inhrelid = CAST(:child AS regclass) "
+                "AND inhparent = CAST(:name AS regclass)",
+            ),
+            {"child": child, "name": name},
+        )
+        if not attached:
+            conn.execute(text(f"ALTER INDEX {name} ATTACH PARTITION {child}"))
@@ -0,0 +1,61 @@
+"""
+Schema of the releases before versioned migrations.
+
+Same tables, columns, sequence and indexes that ``create_all`` and
+``ADDED_COLUMNS`` used to create, all with ``IF NOT EXISTS``: on an
+existing deployment this only records the baseline.
+"""
+
+from sqlalchemy import Connection, text
+
+STATEMENTS = (
+    (
+        "CREATE TABLE IF NOT EXISTS processes ("
+        "id SERIAL PRIMARY KEY, "
+        "name VARCHAR, "
+        "started_at TIMESTAMP WITHOUT TIME ZONE, "
+        "ended_at TIMESTAMP WITHOUT TIME ZONE)"
+    ),
+    (
+        "CREATE TABLE IF NOT EXISTS sensor_registry ("
+        "sensor_id INTEGER PRIMARY KEY, "
+        "process_id INTEGER REFERENCES processes (id), "
+        "position VARCHAR)"
+    ),
+    (
+        "CREATE TABLE IF NOT EXISTS measurements ("
+        "id SERIAL PRIMARY KEY, "
+        "process_id INTEGER NOT NULL REFERENCES processes (id), "
+        "sensor_id INTEGER NOT NULL REFERENCES sensor_registry (sensor_id), "
+        "rh DOUBLE PRECISION, "
+        "soc DOUBLE PRECISION, "
+        '"timestamp" TIMESTAMP WITHOUT TIME ZONE)'
+    ),
+    "ALTER TABLE measurements ADD COLUMN IF NOT EXISTS seq BIGINT",
+    (
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_measurements_sensor_seq "
+        "ON measurements (sensor_id, seq)"
+    ),
+    (
+        "CREATE INDEX IF NOT EXISTS ix_processes_active "
+        "ON processes (id) WHERE ended_at IS NULL"
+    ),
+    # Sensor ids: move the sequence past the ids already in use
+    "CREATE SEQUENCE IF NOT EXISTS sensor_id_seq",
+    (
+        "SELECT setval('sensor_id_seq', GREATEST("
+        "(SELECT COALESCE(MAX(sensor_id), 0) FROM sensor_registry), "
+        "(SELECT last_value FROM sensor_id_seq)))"
+    ),
+)
+
+
+def upgrade(conn: Connection) -> None:
+    """
+    Create the baseline schema.
+
+    Args:
+        conn (Connection): Connection in the migration transaction.
+    """
+    for statement in STATEMENTS:
+        conn.execute(text(statement))
@@ -0,0 +1,49 @@
+"""
+Indexes for the per-process and per-sensor time-series queries.
+
+Without them every measurement query and the deletes of a process or a
+sensor scan the whole ``measurements`` table:
+
+- ``(process_id, timestamp)`` and ``(sensor_id, timestamp)`` serve the
+  filters (and time ranges) of ``/processes/{id}/measurements`` and
+  ``/sensors/{id}/measurements`` and the cascade deletes.
+- A BRIN index on ``timestamp`` covers time-range scans across sensors for
+  a few pages of index, since rows are inserted in time order.
+- ``sensor_registry.process_id`` serves the sensors of a process.
+
+Built concurrently so a deployment with data keeps ingesting meanwhile.
+"""
+
+from sqlalchemy import Connection
+
+from app.services.database.migrate import create_index_concurrently
+
+TRANSACTIONAL = False
+
+# (name, what follows ON in CREATE INDEX)
+INDEXES = (
+    (
+        "ix_measurements_process_timestamp",
+        'measurements (process_id, "timestamp")',
+    ),
+    (
+        "ix_measurements_sensor_timestamp",
+        'measurements (sensor_id, "timestamp")',
+    ),
+    (
+        "ix_measurements_timestamp_brin",
+        'measurements USING brin ("timestamp")',
+    ),
+    ("ix_sensor_registry_process_id", "sensor_registry (process_id)"),
+)
+
+
+def upgrade(conn: Connection) -> None:
+    """
+    Create the indexes.
+
+    Args:
+        conn (Connection): Autocommit connection.
+    """
+    for name, definition in INDEXES:
+        create_index_concurrently(conn, name, definition)
@@ -0,0 +1,117 @@
+"""
+Partition ``measurements`` by month.
+
+PostgreSQL cannot partition an existing table in place, so the table is
+renamed, recreated with ``PARTITION BY RANGE ("timestamp")`` and its rows
+are copied into monthly partitions (see ``partitions.py``), all in one
+transaction. Ingestion waits for the copy, once.
+
+Every unique constraint of a partitioned table has to include the
+partition key: the primary key becomes ``(id, "timestamp")`` and the
+``(sensor_id, seq)`` deduplication moves to ``measurement_seqs`` (see
+``measurement_insert.py``). ``"timestamp"`` becomes NOT NULL; rows
+without one take the start of their process.
+"""
+
+from sqlalchemy import Connection, text
+
+from app.services.database.partitions import (
+    DEFAULT_PARTITION,
+    add_months,
+    create_month_partition,
+)
+
+STATEMENTS = (
+    # Free the names used by the old table's indexes
+    "ALTER TABLE measurements RENAME TO measurements_legacy",
+    "ALTER INDEX measurements_pkey RENAME TO measurements_legacy_pkey",
+    (
+        "DROP INDEX IF EXISTS uq_measurements_sensor_seq, "
+        "ix_measurements_process_timestamp, ix_measurements_sensor_timestamp, "
+        "ix_measurements_timestamp_brin"
+    ),
+    (
+        "CREATE TABLE measurements ("
+        "id INTEGER NOT NULL DEFAULT nextval('measurements_id_seq'), "
+        "process_id INTEGER NOT NULL REFERENCES processes (id), "
+        "sensor_id INTEGER NOT NULL REFERENCES sensor_registry (sensor_id), "
+        "rh DOUBLE PRECISION, "
+        "soc DOUBLE PRECISION, "
+        '"timestamp" TIMESTAMP WITHOUT TIME ZONE NOT NULL, '
+        "seq BIGINT, "
+        'PRIMARY KEY (id, "timestamp")) '
+        'PARTITION BY RANGE ("timestamp")'
+    ),
+    # Keep the id sequence when the old table is dropped
+    "ALTER SEQUENCE measurements_id_seq OWNED BY measurements.id",
+    # Created on every partition
+    (
+        "CREATE INDEX ix_measurements_process_timestamp "
+        'ON measurements (process_id, "timestamp")'
+    ),
+    (
+        "CREATE INDEX ix_measurements_sensor_timestamp "
+        'ON measurements (sensor_id, "timestamp")'
+    ),
+    (
+        "CREATE INDEX ix_measurements_timestamp_brin "
+        'ON measurements USING brin ("timestamp")'
+    ),
+    f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF measurements DEFAULT",
+    (
+        "CREATE TABLE measurement_seqs ("
+        "sensor_id INTEGER NOT NULL, "
+        "seq BIGINT NOT NULL, "
+        "recorded_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(), "
+        "PRIMARY KEY (sensor_id, seq))"
+    ),
+    (
+        "CREATE INDEX ix_measurement_seqs_recorded_at "
+        "ON measurement_seqs USING brin (recorded_at)"
+    ),
+)
+
+
+def upgrade(conn: Connection) -> None:
+    """
+    Recreate ``measurements`` as a partitioned table and copy the rows.
+
+    Args:
+        conn (Connection): Connection in the migration transaction.
+    """
+    for statement in STATEMENTS:
+        conn.execute(text(statement))
+
+    # One partition per month from the oldest reading to the next month;
+    # the partition manager creates the following ones
+    first, current = conn.execute(
+        text(
+            "SELECT CAST(date_trunc('month', "
+            'COALESCE(MIN("timestamp"), LOCALTIMESTAMP)) AS date), '
+            "CAST(date_trunc('month', LOCALTIMESTAMP) AS date) "
+            "FROM measurements_legacy",
+        ),
+    ).one()
+    month = min(first, current)
+    while month <= add_months(current, 1):
+        create_month_partition(conn, month)
+        month = add_months(month, 1)
+
+    conn.execute(
+        text(
+            "INSERT INTO measurements "
+            '(id, process_id, sensor_id, rh, soc, "timestamp", seq) '
+            "SELECT m.id, m.process_id, m.sensor_id, m.rh, m.soc, "
+            'COALESCE(m."timestamp", p.started_at, LOCALTIMESTAMP), m.seq '
+            "FROM measurements_legacy m "
+            "LEFT JOIN processes p ON p.id = m.process_id",
+        ),
+    )
+    conn.execute(
+        text(
+            "INSERT INTO measurement_seqs (sensor_id, seq) "
+            "SELECT DISTINCT sensor_id, seq FROM measurements_legacy "
+            "WHERE seq IS NOT NULL",
+        ),
+    )
+    conn.execute(text("DROP TABLE measurements_legacy"))
@@ -0,0 +1,50 @@
+"""
+Rollup tables: measurements aggregated per sensor by minute, hour and day.
+
+Filled from the measurements already stored; from then on the insert
+statement of the ingestion keeps them up to date.
+"""
+
+from sqlalchemy import Connection, text
+
+from app.services.database.rollups import ROLLUP_COLUMNS, rollup_select
+from app.services.database.tables.measurement_rollups import ROLLUP_TABLES
+
+
+def upgrade(conn: Connection) -> None:
+    """
+    Create and fill the rollup tables.
+
+    Args:
+        conn (Connection): Connection in the migration transaction.
+    """
+    for resolution, table in ROLLUP_TABLES.items():
+        name = table.__tablename__
+        conn.execute(
+            text(
+                f"CREATE TABLE {name} ("
+                "sensor_id INTEGER NOT NULL, "
+                "bucket TIMESTAMP WITHOUT TIME ZONE NOT NULL, "
+                "process_id INTEGER NOT NULL, "
+                "count BIGINT NOT NULL, "
+                "rh_min DOUBLE PRECISION, "
+                "rh_max DOUBLE PRECISION, "
+                "rh_sum DOUBLE PRECISION, "
+                "soc_min DOUBLE PRECISION, "
+                "soc_max DOUBLE PRECISION, "
+                "soc_sum DOUBLE PRECISION, "
+                "PRIMARY KEY (sensor_id, bucket))",
+            ),
+        )
+        conn.execute(
+            text(
+                f"CREATE INDEX ix_{name}_process_bucket "
+                f"ON {name} (process_id, bucket)",
+            ),
+        )
+        conn.execute(
+            text(
+                f"INSERT INTO {name} ({ROLLUP_COLUMNS}) "
+                + rollup_select(resolution, "measurements"),
+            ),
+        )
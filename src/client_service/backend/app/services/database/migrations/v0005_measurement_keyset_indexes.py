@@ -0,0 +1,37 @@
+"""
+Indexes for the keyset pagination of measurements (``after_id``).
+
+``(process_id, id)`` and ``(sensor_id, id)`` let a client poll for the
+readings after the last id it has seen by reading only the new index
+entries of each partition, instead of every reading of the process.
+
+Built concurrently on each partition so ingestion keeps running.
+"""
+
+from sqlalchemy import Connection
+
+from app.services.database.migrate import create_partitioned_index_concurrently
+
+TRANSACTIONAL = False
+
+# Name and columns of each index
+INDEXES = (
+    ("ix_measurements_process_keyset", "(process_id, id)"),
+    ("ix_measurements_sensor_keyset", "(sensor_id, id)"),
+)
+
+
+def upgrade(conn: Connection) -> None:
+    """
+    Create the indexes.
+
+    Args:
+        conn (Connection): Autocommit connection.
+    """
+    for name, columns in INDEXES:
+        create_partitioned_index_concurrently(
+            conn,
+            name,
+            "measurements",
+            columns,
+        )
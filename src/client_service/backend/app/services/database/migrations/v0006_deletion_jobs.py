@@ -0,0 +1,45 @@
+"""
+Background deletion jobs and the soft-delete flag of processes and sensors.
+
+``deleted_at`` hides a process or a sensor from reads as soon as its
+deletion is requested; ``deletion_jobs`` queues the removal of its data.
+Adding a nullable column is a catalog change, so the migration is quick.
+"""
+
+from sqlalchemy import Connection, text
+
+
+def upgrade(conn: Connection) -> None:
+    """
+    Add the ``deleted_at`` columns and create ``deletion_jobs``.
+
+    Args:
+        conn (Connection): Connection in the migration transaction.
+    """
+    for table in ("processes", "sensor_registry"):
+        conn.execute(
+            text(
+                f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS "
+                "deleted_at TIMESTAMP WITHOUT TIME ZONE",
+            ),
+        )
+    conn.execute(
+        text(
+            "CREATE TABLE deletion_jobs ("
+            "id SERIAL PRIMARY KEY, "
+            "target VARCHAR NOT NULL, "
+            "target_id INTEGER NOT NULL, "
+            "status VARCHAR NOT NULL, "
+            "deleted_rows BIGINT NOT NULL, "
+            "attempts INTEGER NOT NULL, "
+            "error VARCHAR, "
+            "created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL, "
+            "finished_at TIMESTAMP WITHOUT TIME ZONE)",
+        ),
+    )
+    conn.execute(
+        text(
+            "CREATE INDEX ix_deletion_jobs_unfinished ON deletion_jobs (id) "
+            "WHERE status IN ('pending', 'running')",
+        ),
+    )
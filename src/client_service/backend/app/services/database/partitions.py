@@ -0,0 +1,466 @@
+"""
+Monthly partitions of ``measurements``.
+
+``measurements`` is partitioned by range of ``"timestamp"``: one partition
+per month named ``measurements_pYYYYMM`` plus ``measurements_default`` for
+readings outside all of them. ``PartitionManager`` creates the partitions
+of the next months ahead of time and applies the retention policy: whole
+months past the retention are detached (and dropped), a catalog change
+instead of deleting every row. Queries that filter on ``"timestamp"`` only
+scan the partitions of the matching months.
+"""
+
+import datetime as dt
+import re
+import threading
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import (
+    ColumnElement,
+    Connection,
+    Engine,
+    func,
+    literal_column,
+    select,
+    text,
+)
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.services.database.tables.processes import Process
+from app.services.database.tables.sensor_registry import SensorRegistry
+from app.utils.logger import logger
+
+DEFAULT_PARTITION = "measurements_default"
+
+# Key of the advisory lock held while maintaining partitions ("meas")
+_LOCK_KEY = 0x6D656173
+
+_PARTITION_NAME = re.compile(r"measurements_p(?P<year>\d{4})(?P<month>\d{2})")
+
+# Rows of measurement_seqs deleted per transaction by the trim
+SEQ_TRIM_BATCH = 10000
+
+# Readings sent in batches carry the time they were taken, which may be a
+# little before the process start stored in ``processes``
+PROCESS_START_MARGIN = dt.timedelta(days=1)
+
+
+def add_months(month: dt.date, months: int) -> dt.date:
+    """
+    Get the first day of the month ``months`` away from ``month``.
+
+    Args:
+        month (datetime.date): First day of a month.
+        months (int): Months to add (may be negative).
+
+    Returns:
+        datetime.date: First day of the resulting month.
+    """
+    index = month.year * 12 + month.month - 1 + months
+    return dt.date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: dt.date) -> str:
+    """
+    Get the name of the partition of a month.
+
+    Args:
+        month (datetime.date): First day of the month.
+
+    Returns:
+        str: The partition name, e.g. ``measurements_p202510``.
+    """
+    return f"measurements_p{month:%Y%m}"
+
+
+def create_month_partition(conn: Connection, month: dt.date) -> bool:
+    """
+    Create the partition of a month if it does not exist.
+
+    Rows of that month already in the default partition (e.g. a reading
+    with a clock far ahead) would make ``CREATE TABLE ... PARTITION OF``
+    fail, so they are moved into the new partition in the same
+    transaction.
+
+    Args:
+        conn (Connection): Connection in a transaction.
+        month (datetime.date): First day of the month.
+
+    Returns:
+        bool: True if the partition was created, False if it existed.
+    """
+    name = partition_name(month)
+    if conn.scalar(text("SELECT to_regclass(:name)"), {"name": name}):
+        return False
+
+    bounds = {"lower": month, "upper": add_months(month, 1)}
+    stray = conn.scalar(
+        text(
+            "SELECT EXISTS (SELECT 1 FROM measurements_default "
+            'WHERE "timestamp" >= :lower AND "timestamp" < :upper)',
+        ),
+        bounds,
+    )
+    if stray:
+        conn.execute(
+            text(
+                "CREATE TEMPORARY TABLE stray_measurements "
+                "(LIKE measurements) ON COMMIT DROP",
+            ),
+        )
+        conn.execute(
+            text(
+                "WITH moved AS (DELETE FROM measurements_default "
+                'WHERE "timestamp" >= :lower AND "timestamp" < :upper '
+                "RETURNING *) "
+                "INSERT INTO stray_measurements SELECT * FROM moved",
+            ),
+            bounds,
+        )
+
+    conn.execute(
+        text(
+            f"CREATE TABLE {name} PARTITION OF measurements "
+            f"FOR VALUES FROM ('{bounds['lower']}') "
+            f"TO ('{bounds['upper']}')",
+        ),
+    )
+    if stray:
+        conn.execute(
+            text("INSERT INTO measurements SELECT * FROM stray_measurements"),
+        )
+        conn.execute(text("DROP TABLE stray_measurements"))
+    logger.info(f"Created partition {name}")
+    return True
+
+
+def list_month_partitions(conn: Connection) -> list[dt.date]:
+    """
+    Get the months that have a partition attached to ``measurements``.
+
+    Args:
+        conn (Connection): Database connection.
+
+    Returns:
+        list[datetime.date]: First day of each month, oldest first.
+    """
+    names = conn.scalars(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = 'measurements'::regclass",
+        ),
+    )
+    months = []
+    for name in names:
+        match = _PARTITION_NAME.fullmatch(name)
+        if match is not None:
+            months.append(
+                dt.date(int(match["year"]), int(match["month"]), 1),
+            )
+    return sorted(months)
+
+
+def process_time_floor(process_id: int) -> ColumnElement:
+    """
+    Lower bound of the timestamps of a process's measurements.
+
+    Compared with ``Measurement.timestamp`` it lets PostgreSQL skip the
+    partitions of the months before the process started.
+
+    Args:
+        process_id (int): The id of the process.
+
+    Returns:
+        ColumnElement: SQL expression of the bound.
+    """
+    started_at = (
+        select(Process.started_at)
+        .where(Process.id == process_id)
+        .scalar_subquery()
+    )
+    return func.coalesce(
+        started_at - PROCESS_START_MARGIN,
+        literal_column("'-infinity'::timestamp"),
+    )
+
+
+def sensor_time_floor(sensor_id: int) -> ColumnElement:
+    """
+    Lower bound of the timestamps of a sensor's measurements.
+
+    Same as ``process_time_floor``, through the sensor's process.
+
+    Args:
+        sensor_id (int): The id of the sensor.
+
+    Returns:
+        ColumnElement: SQL expression of the bound.
+    """
+    started_at = (
+        select(Process.started_at)
+        .join(SensorRegistry, SensorRegistry.process_id == Process.id)
+        .where(SensorRegistry.sensor_id == sensor_id)
+        .scalar_subquery()
+    )
+    return func.coalesce(
+        started_at - PROCESS_START_MARGIN,
+        literal_column("'-infinity'::timestamp"),
+    )
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    """
+    How long measurements and their deduplication pairs are kept.
+
+    Attributes:
+        months (int): Full months kept before the current one; older
+            partitions are removed (0 keeps everything).
+        detach_only (bool): Detach expired partitions but keep them as
+            standalone tables (e.g. to archive them) instead of dropping
+            them.
+        dedup_days (int): Days the ``(sensor_id, seq)`` pairs of stored
+            readings are remembered to discard redeliveries (0 keeps them
+            forever).
+    """
+
+    months: int = 0
+    detach_only: bool = False
+    dedup_days: int = 30
+
+
+class PartitionManager:
+    """Creates upcoming partitions and applies retention on a thread."""
+
+    def __init__(
+        self,
+        engine: Engine,
+        *,
+        premake_months: int = 2,
+        retention: RetentionPolicy | None = None,
+        interval: float = 3600.0,
+    ) -> None:
+        """
+        Initialize the partition manager.
+
+        Args:
+            engine (Engine): Engine of the database.
+            premake_months (int): Months after the current one that always
+                have a partition.
+            retention (RetentionPolicy | None): Retention of the partitions
+                and of the deduplication pairs. Keeps everything but the
+                pairs older than 30 days if not given.
+            interval (float): Seconds between maintenance runs.
+        """
+        retention = retention or RetentionPolicy()
+        self.engine = engine
+        self.premake_months = max(0, premake_months)
+        self.retention_months = max(0, retention.months)
+        self.detach_only = retention.detach_only
+        self.dedup_days = max(0, retention.dedup_days)
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._stats: dict[str, Any] = {
+            "runs": 0,
+            "created": 0,
+            "removed": 0,
+            "failed": 0,
+        }
+
+    def start(self) -> None:
+        """Start the maintenance thread (the first run is immediate)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run_loop,
+            name="partition-manager",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the maintenance thread."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Get maintenance counters.
+
+        Returns:
+            dict[str, Any]: Maintenance runs, partitions created and
+            removed, and runs that failed.
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def maintain(self) -> bool:
+        """
+        Create the upcoming partitions, apply the retention policy and trim
+        the deduplication pairs.
+
+        Each partition change commits on its own, so the lock it takes on
+        ``measurements`` (which blocks ingestion and reads) is released
+        right away; the trim of ``measurement_seqs`` runs afterwards, in
+        batches. A session advisory lock is held for the whole run: when
+        another API replica is already maintaining the partitions this run
+        is skipped.
+
+        Returns:
+            bool: True if the maintenance ran, False if it was skipped or
+            failed.
+        """
+        try:
+            with self.engine.connect() as conn:
+                changes = self._maintain_locked(conn)
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to maintain measurement partitions: {e}")
+            with self._lock:
+                self._stats["failed"] += 1
+            return False
+        if changes is None:
+            return False
+
+        created, removed = changes
+        with self._lock:
+            self._stats["runs"] += 1
+            self._stats["created"] += created
+            self._stats["removed"] += removed
+        return True
+
+    def _maintain_locked(self, conn: Connection) -> tuple[int, int] | None:
+        """
+        Run the maintenance under the advisory lock.
+
+        Args:
+            conn (Connection): Connection to take the lock on.
+
+        Returns:
+            tuple[int, int] | None: Number of partitions created and
+            removed, or None if another replica holds the lock.
+        """
+        locked = conn.scalar(
+            text("SELECT pg_try_advisory_lock(:key)"),
+            {"key": _LOCK_KEY},
+        )
+        conn.commit()
+        if not locked:
+            return None
+        try:
+            changes = self._maintain_partitions(conn)
+            self._forget_old_seqs(conn)
+        finally:
+            conn.execute(
+                text("SELECT pg_advisory_unlock(:key)"),
+                {"key": _LOCK_KEY},
+            )
+            conn.commit()
+        return changes
+
+    def _maintain_partitions(self, conn: Connection) -> tuple[int, int]:
+        """
+        Create the upcoming partitions and remove the expired ones.
+
+        Args:
+            conn (Connection): Connection holding the maintenance lock.
+
+        Returns:
+            tuple[int, int]: Number of partitions created and removed.
+        """
+        with conn.begin():
+            # Stored timestamps are in the database session time zone
+            current = conn.scalar(
+                text(
+                    "SELECT CAST(date_trunc('month', LOCALTIMESTAMP) AS date)",
+                ),
+            )
+        created = 0
+        for n in range(self.premake_months + 1):
+            with conn.begin():
+                created += create_month_partition(conn, add_months(current, n))
+        return created, self._apply_retention(conn, current)
+
+    def _run_loop(self) -> None:
+        """Run the maintenance every ``interval`` seconds until stopped."""
+        while True:
+            self.maintain()
+            if self._stop_event.wait(self.interval):
+                return
+
+    def _apply_retention(self, conn: Connection, current: dt.date) -> int:
+        """
+        Detach (and drop) the partitions of the months past the retention.
+
+        Args:
+            conn (Connection): Connection holding the maintenance lock.
+            current (datetime.date): First day of the current month.
+
+        Returns:
+            int: Number of partitions removed.
+        """
+        if not self.retention_months:
+            return 0
+
+        cutoff = add_months(current, -self.retention_months)
+        with conn.begin():
+            expired = [
+                month for month in list_month_partitions(conn) if month < cutoff
+            ]
+        for month in expired:
+            name = partition_name(month)
+            with conn.begin():
+                conn.execute(
+                    text(f"ALTER TABLE measurements DETACH PARTITION {name}"),
+                )
+                if not self.detach_only:
+                    conn.execute(text(f"DROP TABLE {name}"))
+            if self.detach_only:
+                logger.info(f"Detached expired partition {name}")
+            else:
+                logger.info(f"Dropped expired partition {name}")
+
+        # Stray old readings that landed in the default partition
+        with conn.begin():
+            conn.execute(
+                text(
+                    "DELETE FROM measurements_default "
+                    'WHERE "timestamp" < :cutoff',
+                ),
+                {"cutoff": cutoff},
+            )
+        return len(expired)
+
+    def _forget_old_seqs(self, conn: Connection) -> None:
+        """
+        Trim the sequence numbers remembered for deduplication.
+
+        Deletes ``SEQ_TRIM_BATCH`` pairs per transaction, so the trim never
+        holds many row locks (or a long transaction) at once.
+
+        Args:
+            conn (Connection): Connection holding the maintenance lock.
+        """
+        if not self.dedup_days:
+            return
+
+        trim = text(
+            "DELETE FROM measurement_seqs WHERE (sensor_id, seq) IN ("
+            "SELECT sensor_id, seq FROM measurement_seqs "
+            "WHERE recorded_at < now() - make_interval(days => :days) "
+            "LIMIT :batch)",
+        )
+        deleted = SEQ_TRIM_BATCH
+        while deleted >= SEQ_TRIM_BATCH and not self._stop_event.is_set():
+            with conn.begin():
+                deleted = conn.execute(
+                    trim,
+                    {"days": self.dedup_days, "batch": SEQ_TRIM_BATCH},
+                ).rowcount
@@ -0,0 +1,94 @@
+"""
+Connection pool metrics for ``GET /metrics``.
+
+The connection counts are read from the SQLAlchemy pool when the endpoint
+is scraped. Checkouts, hold times and invalidations are recorded from pool
+events: a long hold time points at a unit of work that keeps its
+connection for too long, and invalidations at connections dropped by the
+database (caught by ``pool_pre_ping``).
+"""
+
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine.interfaces import DBAPIConnection
+from sqlalchemy.pool import ConnectionPoolEntry, Pool, PoolProxiedConnection
+
+from app.utils.metrics import Counter, Gauge, Histogram
+
+POOL_CONNECTIONS = Gauge(
+    "estufa_db_pool_connections",
+    "Connections of a database pool, by state.",
+    ("pool", "state"),
+)
+POOL_CHECKOUTS = Counter(
+    "estufa_db_pool_checkouts_total",
+    "Connections checked out of a database pool.",
+    ("pool",),
+)
+POOL_HOLD_SECONDS = Histogram(
+    "estufa_db_pool_hold_seconds",
+    "Time a connection stays checked out of a database pool.",
+    ("pool",),
+)
+POOL_INVALIDATED = Counter(
+    "estufa_db_pool_invalidated_total",
+    "Pooled connections discarded after an error or a failed pre-ping.",
+    ("pool",),
+)
+
+# Gauge state -> QueuePool method
+_POOL_STATES = {
+    "size": "size",
+    "checked_in": "checkedin",
+    "checked_out": "checkedout",
+    "overflow": "overflow",
+}
+
+
+def observe_pool(name: str, pool: Pool) -> None:
+    """
+    Expose the connection counts and checkout events of a pool.
+
+    Pools without connection counters (e.g. ``NullPool``) only report the
+    event metrics.
+
+    Args:
+        name (str): Value of the ``pool`` label (e.g. ``"sync"``).
+        pool (Pool): The engine's connection pool.
+    """
+    for state, method in _POOL_STATES.items():
+        read = getattr(pool, method, None)
+        if callable(read):
+            POOL_CONNECTIONS.labels(name, state).set_function(read)
+
+    checkouts = POOL_CHECKOUTS.labels(name)
+    hold_seconds = POOL_HOLD_SECONDS.labels(name)
+    invalidated = POOL_INVALIDATED.labels(name)
+
+    def on_checkout(
+        _dbapi_connection: DBAPIConnection,
+        record: ConnectionPoolEntry,
+        _proxy: PoolProxiedConnection,
+    ) -> None:
+        checkouts.inc()
+        record.info["checked_out_at"] = time.perf_counter()
+
+    def on_checkin(
+        _dbapi_connection: DBAPIConnection | None,
+        record: ConnectionPoolEntry,
+    ) -> None:
+        checked_out_at = record.info.pop("checked_out_at", None)
+        if checked_out_at is not None:
+            hold_seconds.observe(time.perf_counter() - checked_out_at)
+
+    def on_invalidate(
+        _dbapi_connection: DBAPIConnection,
+        _record: ConnectionPoolEntry,
+        _exception: BaseException | None,
+    ) -> None:
+        invalidated.inc()
+
+    event.listen(pool, "checkout", on_checkout)
+    event.listen(pool, "checkin", on_checkin)
+    event.listen(pool, "invalidate", on_invalidate)
@@ -8,44 +8,75 @@ Copyright (c) 2025 Estufa Dashboard. All rights reserved.
 """
 
 import datetime
+from collections.abc import Generator
+from contextlib import contextmanager
+from typing import Any
 
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session, sessionmaker
 
 from app.config.timezone_config import SAO_PAULO_TZ
+from app.services.database.active_process_cache import ActiveProcessCache
 from app.services.database.base_client._dbclient import (
     IDBClient,  # noqa: PLC2701
 )
+from app.services.database.measurement_insert import (
+    INSERT_MEASUREMENTS,
+    REJECTED_ERRORS,
+    RESET_SEQUENCES,
+    insert_params,
+    reject_measurement,
+    reset_params,
+    split_batch,
+)
+from app.services.database.measurement_queries import (
+    MeasurementWindow,
+    measurement_rows_query,
+    measurements_from_rows,
+)
+from app.services.database.rollups import REBUILD_ROLLUPS
 from app.services.database.tables.measurements import (
     Measurement,
     PydanticMeasurement,
 )
 from app.services.database.tables.processes import Process, PydanticProcess
 from app.services.database.tables.sensor_registry import (
+    SENSOR_ID_SEQUENCE,
     PydanticSensorRegistry,
     SensorRegistry,
 )
 from app.utils.logger import logger
 
 
-class PSGClient(IDBClient):
-    def __init__(
+# One public method per IDBClient operation
+class PSGClient(IDBClient):  # noqa: PLR0904
+    # The five connection fields, plus the keyword-only shared cache and
+    # pool settings
+    def __init__(  # noqa: PLR0913
         self,
         host: str,
         port: int,
         database: str,
         user: str,
         password: str,
+        *,
+        active_process_cache: ActiveProcessCache | None = None,
+        pool_options: dict[str, Any] | None = None,
     ) -> None:
         self.host = host
         self.port = port
         self.database = database
         self.user = user
         self.password = password
+        # QueuePool settings passed to create_engine (pool_size, ...)
+        self.pool_options = pool_options or {}
         self.engine = None
         self.SessionLocal = None
-        self._session = None
+        # Cached result of get_active_process (may be shared with the async
+        # client so both see invalidations)
+        self.active_process_cache = active_process_cache or ActiveProcessCache()
 
     def connect(self) -> bool:
         """
@@ -59,12 +90,17 @@ class PSGClient(IDBClient):
             database_url = f"postgresql://{self.user}:{self.password}@{self.host}:{self.port}/{self.database}"
 
             # Criar engine
-            self.engine = create_engine(database_url, echo=False)
+            self.engine = create_engine(
+                database_url,
+                echo=False,
+                **self.pool_options,
+            )
 
             # Criar SessionLocal
             self.SessionLocal = sessionmaker(
                 autocommit=False,
                 autoflush=False,
+                expire_on_commit=False,
                 bind=self.engine,
             )
 
@@ -87,8 +123,6 @@ class PSGClient(IDBClient):
             bool: True if the disconnection was successful, False otherwise.
         """
         try:
-            if self._session:
-                self._session.close()
             if self.engine:
                 self.engine.dispose()
             logger.info("Disconnected from PostgreSQL database")
@@ -116,16 +150,20 @@ class PSGClient(IDBClient):
             logger.error(f"Failed to execute query: {e}")
             return False
 
-    def get_session(self) -> Session:
+    @contextmanager
+    def session_scope(self) -> Generator[Session]:
         """
-        Get a database session.
+        Run one unit of work in a transaction on a new session.
 
-        Returns:
-            Session: The database session.
+        MQTT threads get a session per call, never a shared one. Commits on
+        success and rolls back on error, and the connection goes back to
+        the pool when the session is closed.
+
+        Yields:
+            Session: The session of the unit of work.
         """
-        if not self._session:
-            self._session = self.SessionLocal()
-        return self._session
+        with self.SessionLocal() as session, session.begin():
+            yield session
 
     def add_new_measurement(self, measurement: PydanticMeasurement) -> bool:
         """
@@ -138,58 +176,81 @@ class PSGClient(IDBClient):
             bool: True if the measurement was added successfully,
             False otherwise.
         """
-        try:
-            session = self.get_session()
-            db_measurement = Measurement(
-                process_id=measurement.process_id,
-                sensor_id=measurement.sensor_id,
-                rh=measurement.rh,
-                soc=measurement.soc,
-                timestamp=measurement.timestamp,
-            )
-            session.add(db_measurement)
-            session.commit()
-            logger.info(
-                f"Added new measurement for process {measurement.process_id}, "
-                f"sensor {measurement.sensor_id}",
-            )
+        # Same statement as the batches, so redeliveries are skipped too
+        return self.add_new_measurements([measurement])
+
+    def add_new_measurements(
+        self,
+        measurements: list[PydanticMeasurement],
+    ) -> bool:
+        """
+        Add several measurements to the database in a single statement.
+
+        Uses ``INSERT_MEASUREMENTS`` on its own pooled connection, so it can
+        be called from the ingestion flusher thread.
+
+        Readings the database rejects (``REJECTED_ERRORS``) are dropped,
+        after splitting the batch so the others are stored.
+
+        Args:
+            measurements (list[PydanticMeasurement]): The measurements to add.
+
+        Returns:
+            bool: True if all measurements were added (or were already
+            stored, or were rejected), False if the database failed and the
+            batch can be retried.
+        """
+        if not measurements:
             return True
+
+        try:
+            with self.engine.begin() as conn:
+                # Readings whose (sensor_id, seq) is already stored are
+                # duplicated deliveries: skipped, unless the sensor restarted
+                # its sequence
+                conn.execute(RESET_SEQUENCES, reset_params(measurements))
+                conn.execute(INSERT_MEASUREMENTS, insert_params(measurements))
+        except REJECTED_ERRORS as e:
+            if len(measurements) == 1:
+                reject_measurement(measurements[0], e)
+                return True
+            first, second = split_batch(measurements)
+            if not self.add_new_measurements(first):
+                return False
+            return self.add_new_measurements(second)
         except SQLAlchemyError as e:
-            logger.error(f"Failed to add measurement: {e}")
-            session.rollback()
+            logger.error(f"Failed to add {len(measurements)} measurements: {e}")
             return False
 
+        logger.debug("Added %d new measurements in bulk", len(measurements))
+        return True
+
     def get_all_measurements_from_process_id(
         self,
         process_id: int,
+        window: MeasurementWindow | None = None,
     ) -> list[PydanticMeasurement]:
         """
         Get all measurements from a process id.
 
         Args:
             process_id (int): The id of the process.
+            window (MeasurementWindow | None): Time range and keyset page
+                of the readings; all of them if not given.
 
         Returns:
-            list[PydanticMeasurement]: The list of measurements.
+            list[PydanticMeasurement]: The list of measurements, ordered by
+            id.
         """
         try:
-            session = self.get_session()
-            measurements = (
-                session.query(Measurement)
-                .filter(Measurement.process_id == process_id)
-                .all()
-            )
-            return [
-                PydanticMeasurement(
-                    id=m.id,
-                    process_id=m.process_id,
-                    sensor_id=m.sensor_id,
-                    rh=m.rh,
-                    soc=m.soc,
-                    timestamp=m.timestamp,
+            with self.session_scope() as session:
+                rows = session.execute(
+                    measurement_rows_query(
+                        process_id=process_id,
+                        window=window,
+                    ),
                 )
-                for m in measurements
-            ]
+                return measurements_from_rows(rows)
         except SQLAlchemyError as e:
             logger.error(
                 f"Failed to get measurements for process {process_id}: {e}",
@@ -199,34 +260,29 @@ class PSGClient(IDBClient):
     def get_all_measurements_from_sensor_id(
         self,
         sensor_id: int,
+        window: MeasurementWindow | None = None,
     ) -> list[PydanticMeasurement]:
         """
         Get all measurements from a sensor id.
 
         Args:
             sensor_id (int): The id of the sensor.
+            window (MeasurementWindow | None): Time range and keyset page
+                of the readings; all of them if not given.
 
         Returns:
-            list[PydanticMeasurement]: The list of measurements.
+            list[PydanticMeasurement]: The list of measurements, ordered by
+            id.
         """
         try:
-            session = self.get_session()
-            measurements = (
-                session.query(Measurement)
-                .filter(Measurement.sensor_id == sensor_id)
-                .all()
-            )
-            return [
-                PydanticMeasurement(
-                    id=m.id,
-                    process_id=m.process_id,
-                    sensor_id=m.sensor_id,
-                    rh=m.rh,
-                    soc=m.soc,
-                    timestamp=m.timestamp,
+            with self.session_scope() as session:
+                rows = session.execute(
+                    measurement_rows_query(
+                        sensor_id=sensor_id,
+                        window=window,
+                    ),
                 )
-                for m in measurements
-            ]
+                return measurements_from_rows(rows)
         except SQLAlchemyError as e:
             logger.error(
                 f"Failed to get measurements for sensor {sensor_id}: {e}",
@@ -247,25 +303,24 @@ class PSGClient(IDBClient):
             or None if failed.
         """
         try:
-            session = self.get_session()
-            db_process = Process(
-                name=process.name,
-                started_at=process.started_at,
-                ended_at=process.ended_at,
-            )
-            session.add(db_process)
-            session.commit()
-            session.refresh(db_process)
-            logger.info(f"Created new process: {process.name}")
-            return PydanticProcess(
-                id=db_process.id,
-                name=db_process.name,
-                started_at=db_process.started_at,
-                ended_at=db_process.ended_at,
-            )
+            with self.session_scope() as session:
+                db_process = Process(
+                    name=process.name,
+                    started_at=process.started_at,
+                    ended_at=process.ended_at,
+                )
+                session.add(db_process)
+                session.flush()
+                session.refresh(db_process)
+                logger.info(f"Created new process: {process.name}")
+                return PydanticProcess(
+                    id=db_process.id,
+                    name=db_process.name,
+                    started_at=db_process.started_at,
+                    ended_at=db_process.ended_at,
+                )
         except SQLAlchemyError as e:
             logger.error(f"Failed to create process: {e}")
-            session.rollback()
             return None
 
     def get_process_by_id(self, process_id: int) -> PydanticProcess | None:
@@ -278,18 +333,23 @@ class PSGClient(IDBClient):
             PydanticProcess | None: The process, or None if not found.
         """
         try:
-            session = self.get_session()
-            process = (
-                session.query(Process).filter(Process.id == process_id).first()
-            )
-            if process:
-                return PydanticProcess(
-                    id=process.id,
-                    name=process.name,
-                    started_at=process.started_at,
-                    ended_at=process.ended_at,
+            with self.session_scope() as session:
+                process = (
+                    session.query(Process)
+                    .filter(
+                        Process.id == process_id,
+                        Process.deleted_at.is_(None),
+                    )
+                    .first()
                 )
-            return None
+                if process:
+                    return PydanticProcess(
+                        id=process.id,
+                        name=process.name,
+                        started_at=process.started_at,
+                        ended_at=process.ended_at,
+                    )
+                return None
         except SQLAlchemyError as e:
             logger.error(f"Failed to get process {process_id}: {e}")
             return None
@@ -301,21 +361,72 @@ class PSGClient(IDBClient):
             list[PydanticProcess]: The list of processes.
         """
         try:
-            session = self.get_session()
-            processes = session.query(Process).all()
-            return [
-                PydanticProcess(
-                    id=p.id,
-                    name=p.name,
-                    started_at=p.started_at,
-                    ended_at=p.ended_at,
+            with self.session_scope() as session:
+                processes = (
+                    session.query(Process)
+                    .filter(Process.deleted_at.is_(None))
+                    .all()
                 )
-                for p in processes
-            ]
+                return [
+                    PydanticProcess(
+                        id=p.id,
+                        name=p.name,
+                        started_at=p.started_at,
+                        ended_at=p.ended_at,
+                    )
+                    for p in processes
+                ]
         except SQLAlchemyError as e:
             logger.error(f"Failed to get all processes: {e}")
             return []
 
+    def get_active_process(self) -> PydanticProcess | None:
+        """Get the most recent process that has not ended.
+
+        Served from an in-memory copy while it is fresh; otherwise resolved
+        through the ``ix_processes_active`` partial index.
+
+        Returns:
+            PydanticProcess | None: The active process, or None if no
+            process is running.
+        """
+        fresh, active_process = self.active_process_cache.get()
+        if fresh:
+            return active_process
+        # Read before the lookup: a process started or ended meanwhile
+        # invalidates the cache and the result is not cached
+        generation = self.active_process_cache.generation
+
+        try:
+            with self.session_scope() as session:
+                process = (
+                    session.query(Process)
+                    .filter(
+                        Process.ended_at.is_(None),
+                        Process.deleted_at.is_(None),
+                    )
+                    .order_by(Process.id.desc())
+                    .first()
+                )
+                active_process = None
+                if process:
+                    active_process = PydanticProcess(
+                        id=process.id,
+                        name=process.name,
+                        started_at=process.started_at,
+                        ended_at=process.ended_at,
+                    )
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to get active process: {e}")
+            return None
+
+        self.active_process_cache.set(active_process, generation)
+        return active_process
+
+    def invalidate_active_process_cache(self) -> None:
+        """Drop the cached active process so the next lookup hits the DB."""
+        self.active_process_cache.invalidate()
+
     def end_process(self, process_id: int) -> bool:
         """End a process by updating ended_at.
 
@@ -326,21 +437,24 @@ class PSGClient(IDBClient):
             bool: True if the process was ended successfully, False otherwise.
         """
         try:
-            session = self.get_session()
-            process = (
-                session.query(Process).filter(Process.id == process_id).first()
-            )
-            if not process:
-                logger.warning(f"Process {process_id} not found")
-                return False
+            with self.session_scope() as session:
+                process = (
+                    session.query(Process)
+                    .filter(
+                        Process.id == process_id,
+                        Process.deleted_at.is_(None),
+                    )
+                    .first()
+                )
+                if not process:
+                    logger.warning(f"Process {process_id} not found")
+                    return False
 
-            process.ended_at = datetime.datetime.now(SAO_PAULO_TZ)
-            session.commit()
-            logger.info(f"Ended process {process_id}")
-            return True
+                process.ended_at = datetime.datetime.now(SAO_PAULO_TZ)
+                logger.info(f"Ended process {process_id}")
+                return True
         except SQLAlchemyError as e:
             logger.error(f"Failed to end process {process_id}: {e}")
-            session.rollback()
             return False
 
     def register_new_sensor(self, sensor_id: int, process_id: int) -> bool:
@@ -355,163 +469,158 @@ class PSGClient(IDBClient):
             False otherwise.
         """
         try:
-            session = self.get_session()
-            db_sensor = SensorRegistry(
-                process_id=process_id,
-                sensor_id=sensor_id,
-                position="unknown",  # Default position
-            )
-            session.add(db_sensor)
-            session.commit()
-            logger.info(
-                f"Registered sensor {sensor_id} for process {process_id}",
-            )
-            return True
+            with self.session_scope() as session:
+                db_sensor = SensorRegistry(
+                    process_id=process_id,
+                    sensor_id=sensor_id,
+                    position="unknown",  # Default position
+                )
+                session.add(db_sensor)
+                logger.info(
+                    f"Registered sensor {sensor_id} for process {process_id}",
+                )
+                return True
         except SQLAlchemyError as e:
             logger.error(f"Failed to register sensor: {e}")
-            session.rollback()
             return False
 
-    def get_all_sensors_from_process_id(
+    def register_new_sensors(
         self,
         process_id: int,
-    ) -> list[PydanticSensorRegistry]:
-        """Get all sensors from a process id.
+        count: int,
+    ) -> list[int] | None:
+        """Allocate ids and register several sensors in one transaction.
+
+        The ids come from ``sensor_id_seq`` in a single round trip, so
+        concurrent binds (also from other API replicas) never collide.
 
         Args:
             process_id (int): The id of the process.
+            count (int): Number of sensors to register.
 
         Returns:
-            list[PydanticSensorRegistry]: The list of sensors.
+            list[int] | None: The new sensor ids, or None if the sensors
+            could not be registered.
         """
+        if count <= 0:
+            return []
+
         try:
-            session = self.get_session()
-            sensors = (
-                session.query(SensorRegistry)
-                .filter(SensorRegistry.process_id == process_id)
-                .all()
-            )
-            return [
-                PydanticSensorRegistry(
-                    process_id=s.process_id,
-                    sensor_id=s.sensor_id,
-                    position=s.position,
+            with self.engine.begin() as conn:
+                sensor_ids = list(
+                    conn.scalars(
+                        select(SENSOR_ID_SEQUENCE.next_value()).select_from(
+                            func.generate_series(1, count),
+                        ),
+                    ),
+                )
+                conn.execute(
+                    insert(SensorRegistry),
+                    [
+                        {
+                            "sensor_id": sensor_id,
+                            "process_id": process_id,
+                            "position": "unknown",  # Default position
+                        }
+                        for sensor_id in sensor_ids
+                    ],
                 )
-                for s in sensors
-            ]
+            logger.info(
+                f"Registered {count} sensors for process {process_id}",
+            )
+            return sensor_ids
         except SQLAlchemyError as e:
-            logger.error(f"Failed to get sensors for process {process_id}: {e}")
-            return []
+            logger.error(f"Failed to register {count} sensors: {e}")
+            return None
 
-    def get_sensor_by_id(self, sensor_id: int) -> PydanticSensorRegistry | None:
-        """Get a sensor by id.
+    def get_all_sensors_from_process_id(
+        self,
+        process_id: int,
+    ) -> list[PydanticSensorRegistry]:
+        """Get all sensors from a process id.
 
         Args:
-            sensor_id (int): The id of the sensor.
+            process_id (int): The id of the process.
 
         Returns:
-            PydanticSensorRegistry | None: The sensor, or None if not found.
+            list[PydanticSensorRegistry]: The list of sensors.
         """
         try:
-            session = self.get_session()
-            sensor = (
-                session.query(SensorRegistry)
-                .filter(SensorRegistry.sensor_id == sensor_id)
-                .first()
-            )
-            if sensor:
-                return PydanticSensorRegistry(
-                    process_id=sensor.process_id,
-                    sensor_id=sensor.sensor_id,
-                    position=sensor.position,
+            with self.session_scope() as session:
+                sensors = (
+                    session.query(SensorRegistry)
+                    .filter(
+                        SensorRegistry.process_id == process_id,
+                        SensorRegistry.deleted_at.is_(None),
+                    )
+                    .all()
                 )
-            return None
+                return [
+                    PydanticSensorRegistry(
+                        process_id=s.process_id,
+                        sensor_id=s.sensor_id,
+                        position=s.position,
+                    )
+                    for s in sensors
+                ]
         except SQLAlchemyError as e:
-            logger.error(f"Failed to get sensor {sensor_id}: {e}")
-            return None
-
-    def delete_process(self, process_id: int) -> bool:
-        """Delete a process and all related data.
-
-        Deletes in cascade order: measurements → sensor_registry → process.
+            logger.error(f"Failed to get sensors for process {process_id}: {e}")
+            return []
 
-        Args:
-            process_id (int): The id of the process to delete.
+    def get_all_sensors(self) -> list[PydanticSensorRegistry]:
+        """Get all registered sensors.
 
         Returns:
-            bool: True if the process was deleted successfully,
-            False otherwise.
+            list[PydanticSensorRegistry]: The list of sensors.
         """
         try:
-            session = self.get_session()
-            # Verify process exists
-            process = (
-                session.query(Process).filter(Process.id == process_id).first()
-            )
-            if not process:
-                logger.warning(f"Process {process_id} not found")
-                return False
-
-            # Delete measurements first
-            session.query(Measurement).filter(
-                Measurement.process_id == process_id,
-            ).delete()
-
-            # Delete sensor_registry
-            session.query(SensorRegistry).filter(
-                SensorRegistry.process_id == process_id,
-            ).delete()
-
-            # Delete process
-            session.delete(process)
-            session.commit()
-            logger.info(f"Deleted process {process_id} and all related data")
-            return True
+            with self.session_scope() as session:
+                sensors = (
+                    session.query(SensorRegistry)
+                    .filter(SensorRegistry.deleted_at.is_(None))
+                    .all()
+                )
+                return [
+                    PydanticSensorRegistry(
+                        process_id=s.process_id,
+                        sensor_id=s.sensor_id,
+                        position=s.position,
+                    )
+                    for s in sensors
+                ]
         except SQLAlchemyError as e:
-            logger.error(f"Failed to delete process {process_id}: {e}")
-            session.rollback()
-            return False
-
-    def delete_sensor(self, sensor_id: int) -> bool:
-        """Delete a sensor and all related measurements.
+            logger.error(f"Failed to get all sensors: {e}")
+            return []
 
-        Deletes in cascade order: measurements → sensor_registry.
+    def get_sensor_by_id(self, sensor_id: int) -> PydanticSensorRegistry | None:
+        """Get a sensor by id.
 
         Args:
-            sensor_id (int): The id of the sensor to delete.
+            sensor_id (int): The id of the sensor.
 
         Returns:
-            bool: True if the sensor was deleted successfully,
-            False otherwise.
+            PydanticSensorRegistry | None: The sensor, or None if not found.
         """
         try:
-            session = self.get_session()
-            # Verify sensor exists
-            sensor = (
-                session.query(SensorRegistry)
-                .filter(SensorRegistry.sensor_id == sensor_id)
-                .first()
-            )
-            if not sensor:
-                logger.warning(f"Sensor {sensor_id} not found")
-                return False
-
-            # Delete measurements first
-            session.query(Measurement).filter(
-                Measurement.sensor_id == sensor_id,
-            ).delete()
-
-            # Delete sensor_registry
-            session.delete(sensor)
-            session.commit()
-            logger.info(
-                f"Deleted sensor {sensor_id} and all related measurements",
-            )
-            return True
+            with self.session_scope() as session:
+                sensor = (
+                    session.query(SensorRegistry)
+                    .filter(
+                        SensorRegistry.sensor_id == sensor_id,
+                        SensorRegistry.deleted_at.is_(None),
+                    )
+                    .first()
+                )
+                if sensor:
+                    return PydanticSensorRegistry(
+                        process_id=sensor.process_id,
+                        sensor_id=sensor.sensor_id,
+                        position=sensor.position,
+                    )
+                return None
         except SQLAlchemyError as e:
-            logger.error(f"Failed to delete sensor {sensor_id}: {e}")
-            session.rollback()
-            return False
+            logger.error(f"Failed to get sensor {sensor_id}: {e}")
+            return None
 
     def delete_measurement(self, measurement_id: int) -> bool:
         """Delete a measurement by id.
@@ -524,23 +633,30 @@ class PSGClient(IDBClient):
             False otherwise.
         """
         try:
-            session = self.get_session()
-            # Verify measurement exists
-            measurement = (
-                session.query(Measurement)
-                .filter(Measurement.id == measurement_id)
-                .first()
-            )
-            if not measurement:
-                logger.warning(f"Measurement {measurement_id} not found")
-                return False
-
-            # Delete measurement
-            session.delete(measurement)
-            session.commit()
-            logger.info(f"Deleted measurement {measurement_id}")
-            return True
+            with self.session_scope() as session:
+                # Verify measurement exists
+                measurement = (
+                    session.query(Measurement)
+                    .filter(Measurement.id == measurement_id)
+                    .first()
+                )
+                if not measurement:
+                    logger.warning(f"Measurement {measurement_id} not found")
+                    return False
+
+                # Delete measurement and recompute the rollups it was in
+                session.delete(measurement)
+                session.flush()
+                for statement in REBUILD_ROLLUPS:
+                    session.execute(
+                        statement,
+                        {
+                            "sensor_id": measurement.sensor_id,
+                            "timestamp": measurement.timestamp,
+                        },
+                    )
+                logger.info(f"Deleted measurement {measurement_id}")
+                return True
         except SQLAlchemyError as e:
             logger.error(f"Failed to delete measurement {measurement_id}: {e}")
-            session.rollback()
             return False
@@ -0,0 +1,172 @@
+"""
+SQL that keeps the measurement rollups up to date.
+
+The rollups store count, min, max and sum, which merge: a batch of new
+measurements is aggregated per sensor and bucket and added to the stored
+rows with ``INSERT ... ON CONFLICT DO UPDATE``, in the statement that
+inserts the measurements (see ``measurement_insert.py``), so the rollups
+never lag behind the raw data. Removing a measurement cannot be undone on
+a min or a max, so the buckets it belonged to are recomputed from
+``measurements`` instead.
+"""
+
+from sqlalchemy import Delete, Select, TextClause, delete, select, text
+
+from app.services.database.measurement_queries import hidden_sensor_ids
+from app.services.database.tables.measurement_rollups import (
+    ROLLUP_TABLES,
+    Resolution,
+)
+
+ROLLUP_COLUMNS = (
+    "sensor_id, bucket, process_id, count, "
+    "rh_min, rh_max, rh_sum, soc_min, soc_max, soc_sum"
+)
+
+
+def rollup_select(resolution: Resolution, source: str, where: str = "") -> str:
+    """
+    Aggregate rows of measurements into the rollup columns.
+
+    Args:
+        resolution (Resolution): Bucket size.
+        source (str): Table or CTE with the measurement columns.
+        where (str): Optional ``WHERE`` clause body.
+
+    Returns:
+        str: A ``SELECT`` of ``ROLLUP_COLUMNS``, one row per bucket.
+    """
+    return (
+        f"SELECT sensor_id, date_trunc('{resolution.value}', \"timestamp\"), "  # noqa: S608
+        # A sensor belongs to one process
+        "max(process_id), count(*), min(rh), max(rh), sum(rh), "
+        f"min(soc), max(soc), sum(soc) FROM {source} "
+        f"{f'WHERE {where} ' if where else ''}"
+        "GROUP BY 1, 2 "
+        # Same lock order in concurrent batches
+        "ORDER BY 1, 2"
+    )
+
+
+def merge_rollups_ctes(source: str) -> str:
+    """
+    CTEs that merge new measurements into every rollup table.
+
+    Args:
+        source (str): CTE with the inserted measurements.
+
+    Returns:
+        str: Comma-separated CTEs to append to a ``WITH`` clause.
+    """
+    ctes = []
+    for resolution, table in ROLLUP_TABLES.items():
+        sums = ", ".join(
+            f"{column} = COALESCE(r.{column} + EXCLUDED.{column}, "
+            f"r.{column}, EXCLUDED.{column})"
+            for column in ("rh_sum", "soc_sum")
+        )
+        ctes.append(
+            f"rollup_{resolution.value} AS ("
+            f"INSERT INTO {table.__tablename__} AS r ({ROLLUP_COLUMNS}) "
+            f"{rollup_select(resolution, source)} "
+            "ON CONFLICT (sensor_id, bucket) DO UPDATE SET "
+            "count = r.count + EXCLUDED.count, "
+            "rh_min = LEAST(r.rh_min, EXCLUDED.rh_min), "
+            "rh_max = GREATEST(r.rh_max, EXCLUDED.rh_max), "
+            "soc_min = LEAST(r.soc_min, EXCLUDED.soc_min), "
+            "soc_max = GREATEST(r.soc_max, EXCLUDED.soc_max), "
+            f"{sums})",
+        )
+    return ", ".join(ctes)
+
+
+def _rebuild_statements() -> list[TextClause]:
+    statements = []
+    for resolution, table in ROLLUP_TABLES.items():
+        bucket = (
+            f"date_trunc('{resolution.value}', CAST(:timestamp AS timestamp))"
+        )
+        statements += [
+            text(
+                f"DELETE FROM {table.__tablename__} "  # noqa: S608
+                f"WHERE sensor_id = :sensor_id AND bucket = {bucket}",
+            ),
+            text(
+                f"INSERT INTO {table.__tablename__} ({ROLLUP_COLUMNS}) "
+                + rollup_select(
+                    resolution,
+                    "measurements",
+                    f'sensor_id = :sensor_id AND "timestamp" >= {bucket} '
+                    f'AND "timestamp" < {bucket} + interval '
+                    f"'1 {resolution.value}'",
+                ),
+            ),
+        ]
+    return statements
+
+
+# Recompute the buckets of a sensor that contain a timestamp (parameters
+# ``sensor_id`` and ``timestamp``), e.g. after a measurement was deleted
+REBUILD_ROLLUPS = _rebuild_statements()
+
+
+def rollup_query(
+    process_id: int,
+    resolution: Resolution,
+    sensor_id: int | None = None,
+) -> Select:
+    """
+    Build the query of the rollups of a process.
+
+    Args:
+        process_id (int): The id of the process.
+        resolution (Resolution): Bucket size.
+        sensor_id (int | None): Only this sensor of the process, if given.
+
+    Returns:
+        Select: Rows with the ``PydanticMeasurementRollup`` fields, by
+        sensor and bucket.
+    """
+    table = ROLLUP_TABLES[resolution]
+    query = select(
+        table.sensor_id,
+        table.bucket,
+        table.count,
+        table.rh_min,
+        table.rh_max,
+        (table.rh_sum / table.count).label("rh_avg"),
+        table.soc_min,
+        table.soc_max,
+        (table.soc_sum / table.count).label("soc_avg"),
+    ).where(
+        table.process_id == process_id,
+        table.sensor_id.not_in(hidden_sensor_ids()),
+    )
+    if sensor_id is not None:
+        query = query.where(table.sensor_id == sensor_id)
+    return query.order_by(table.sensor_id, table.bucket)
+
+
+def delete_rollups(
+    process_id: int | None = None,
+    sensor_id: int | None = None,
+) -> list[Delete]:
+    """
+    Build the deletes of the rollups of a process or a sensor.
+
+    Args:
+        process_id (int | None): The id of the process.
+        sensor_id (int | None): The id of the sensor.
+
+    Returns:
+        list[Delete]: One delete per rollup table.
+    """
+    statements = []
+    for table in ROLLUP_TABLES.values():
+        statement = delete(table)
+        if process_id is not None:
+            statement = statement.where(table.process_id == process_id)
+        if sensor_id is not None:
+            statement = statement.where(table.sensor_id == sensor_id)
+        statements.append(statement)
+    return statements
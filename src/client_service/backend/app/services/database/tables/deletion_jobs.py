@@ -0,0 +1,77 @@
+"""
+Background deletions of processes and sensors.
+
+A delete request hides its target right away (``deleted_at``) and queues a
+job; ``DeletionWorker`` removes the data in bounded batches and records
+its progress here, so clients can follow the job.
+"""
+
+import datetime as dt
+from enum import Enum
+
+from pydantic import BaseModel
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    DateTime,
+    Index,
+    Integer,
+    String,
+    text,
+)
+
+from app.services.database.tables.base import Base
+
+
+class DeletionTarget(str, Enum):
+    """What a deletion job removes."""
+
+    PROCESS = "process"
+    SENSOR = "sensor"
+
+
+class JobStatus(str, Enum):
+    """State of a deletion job."""
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class DeletionJob(Base):
+    """Deletion job table."""
+
+    __tablename__ = "deletion_jobs"
+
+    id = Column(Integer, primary_key=True)
+    target = Column(String, nullable=False)
+    target_id = Column(Integer, nullable=False)
+    status = Column(String, nullable=False, default=JobStatus.PENDING.value)
+    # Rows removed so far (measurements and rollups)
+    deleted_rows = Column(BigInteger, nullable=False, default=0)
+    # Runs started; a job that keeps failing is given up after a few
+    attempts = Column(Integer, nullable=False, default=0)
+    error = Column(String)
+    created_at = Column(DateTime, nullable=False)
+    finished_at = Column(DateTime)
+
+    __table_args__ = (
+        # Partial index: only the jobs the worker still has to run
+        Index(
+            "ix_deletion_jobs_unfinished",
+            "id",
+            postgresql_where=text("status IN ('pending', 'running')"),
+        ),
+    )
+
+
+class PydanticDeletionJob(BaseModel):
+    id: int
+    target: DeletionTarget
+    target_id: int
+    status: JobStatus
+    deleted_rows: int
+    error: str | None = None
+    created_at: dt.datetime
+    finished_at: dt.datetime | None = None
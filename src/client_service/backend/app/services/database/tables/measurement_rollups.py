@@ -0,0 +1,98 @@
+"""
+Per-sensor aggregates of measurements by minute, hour and day.
+
+Kept up to date by the statement that inserts measurements (see
+``app/services/database/rollups.py``), so charts over a long process read
+one row per sensor and bucket instead of every measurement.
+"""
+
+import datetime as dt
+from enum import Enum
+
+from pydantic import BaseModel
+from sqlalchemy import BigInteger, Column, DateTime, Float, Index, Integer
+
+from app.services.database.tables.base import Base
+
+
+class Resolution(str, Enum):
+    """Bucket size of a rollup (a ``date_trunc`` unit)."""
+
+    MINUTE = "minute"
+    HOUR = "hour"
+    DAY = "day"
+
+
+class _MeasurementRollup:
+    """Columns shared by the rollup tables."""
+
+    sensor_id = Column(Integer, primary_key=True)
+    # Start of the bucket (date_trunc of the measurement timestamps)
+    bucket = Column(DateTime, primary_key=True)
+    process_id = Column(Integer, nullable=False)
+    # Sums instead of averages, so new measurements can be merged in
+    count = Column(BigInteger, nullable=False)
+    rh_min = Column(Float)
+    rh_max = Column(Float)
+    rh_sum = Column(Float)
+    soc_min = Column(Float)
+    soc_max = Column(Float)
+    soc_sum = Column(Float)
+
+
+class MeasurementRollupMinute(_MeasurementRollup, Base):
+    """Measurements aggregated per sensor and minute."""
+
+    __tablename__ = "measurement_rollups_minute"
+    __table_args__ = (
+        Index(
+            "ix_measurement_rollups_minute_process_bucket",
+            "process_id",
+            "bucket",
+        ),
+    )
+
+
+class MeasurementRollupHour(_MeasurementRollup, Base):
+    """Measurements aggregated per sensor and hour."""
+
+    __tablename__ = "measurement_rollups_hour"
+    __table_args__ = (
+        Index(
+            "ix_measurement_rollups_hour_process_bucket",
+            "process_id",
+            "bucket",
+        ),
+    )
+
+
+class MeasurementRollupDay(_MeasurementRollup, Base):
+    """Measurements aggregated per sensor and day."""
+
+    __tablename__ = "measurement_rollups_day"
+    __table_args__ = (
+        Index(
+            "ix_measurement_rollups_day_process_bucket",
+            "process_id",
+            "bucket",
+        ),
+    )
+
+
+ROLLUP_TABLES: dict[Resolution, type[_MeasurementRollup]] = {
+    Resolution.MINUTE: MeasurementRollupMinute,
+    Resolution.HOUR: MeasurementRollupHour,
+    Resolution.DAY: MeasurementRollupDay,
+}
+
+
+class PydanticMeasurementRollup(BaseModel):
+    sensor_id: int
+    bucket: dt.datetime
+    count: int
+    rh_min: float | None
+    rh_max: float | None
+    rh_avg: float | None
+    soc_min: float | None
+    soc_max: float | None
+    soc_avg: float | None
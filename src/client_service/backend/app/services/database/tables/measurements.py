@@ -11,20 +11,24 @@ import datetime
 
 from pydantic import BaseModel
 from sqlalchemy import (
+    BigInteger,
     Column,
     DateTime,
     Float,
     ForeignKey,
+    Index,
     Integer,
+    func,
 )
 
 from app.services.database.tables.base import Base
 
 
 class Measurement(Base):
-    """Measurement table."""
+    """Measurement table, partitioned by month of ``timestamp``."""
 
     __tablename__ = "measurements"
+    # The partition key is part of the primary key
     id = Column(Integer, primary_key=True, autoincrement=True)
     process_id = Column(Integer, ForeignKey("processes.id"), nullable=False)
     sensor_id = Column(
@@ -34,7 +38,49 @@ class Measurement(Base):
     )
     rh = Column(Float)
     soc = Column(Float)
-    timestamp = Column(DateTime)
+    timestamp = Column(DateTime, primary_key=True)
+    # Sequence number sent by the sensor (optional), used for deduplication
+    # through MeasurementSeq
+    seq = Column(BigInteger, nullable=True)
+
+    # Created by the migrations in app/services/database/migrations; the
+    # monthly partitions by app/services/database/partitions.py
+    __table_args__ = (
+        Index("ix_measurements_process_timestamp", "process_id", "timestamp"),
+        Index("ix_measurements_sensor_timestamp", "sensor_id", "timestamp"),
+        # Keyset pagination (after_id) of a process's or sensor's readings
+        Index("ix_measurements_process_keyset", "process_id", "id"),
+        Index("ix_measurements_sensor_keyset", "sensor_id", "id"),
+        # Rows arrive in time order: a tiny BRIN index covers time ranges
+        Index(
+            "ix_measurements_timestamp_brin",
+            "timestamp",
+            postgresql_using="brin",
+        ),
+        {"postgresql_partition_by": 'RANGE ("timestamp")'},
+    )
+
+
+class MeasurementSeq(Base):
+    """(sensor_id, seq) pairs of stored measurements, for deduplication."""
+
+    __tablename__ = "measurement_seqs"
+    sensor_id = Column(Integer, primary_key=True)
+    seq = Column(BigInteger, primary_key=True)
+    recorded_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+    )
+
+    __table_args__ = (
+        # Pairs older than MEASUREMENT_DEDUP_DAYS are deleted by time
+        Index(
+            "ix_measurement_seqs_recorded_at",
+            "recorded_at",
+            postgresql_using="brin",
+        ),
+    )
 
 
 class PydanticMeasurement(BaseModel):
@@ -44,3 +90,4 @@ class PydanticMeasurement(BaseModel):
     rh: float
     soc: float
     timestamp: datetime.datetime
+    seq: int | None = None
@@ -10,7 +10,7 @@ Copyright (c) 2025 replace with company name. All rights reserved.
 import datetime
 
 from pydantic import BaseModel
-from sqlalchemy import Column, DateTime, Integer, String
+from sqlalchemy import Column, DateTime, Index, Integer, String, text
 
 from app.services.database.tables.base import Base
 
@@ -23,6 +23,17 @@ class Process(Base):
     name = Column(String)
     started_at = Column(DateTime)
     ended_at = Column(DateTime)
+    # Set when a deletion job is queued: hidden from reads from then on
+    deleted_at = Column(DateTime)
+
+    __table_args__ = (
+        # Partial index: only open processes (ended_at IS NULL) are indexed
+        Index(
+            "ix_processes_active",
+            "id",
+            postgresql_where=text("ended_at IS NULL"),
+        ),
+    )
 
 
 class PydanticProcess(BaseModel):
@@ -8,18 +8,33 @@ Copyright (c) 2025 replace with company name. All rights reserved.
 """
 
 from pydantic import BaseModel
-from sqlalchemy import Column, ForeignKey, Integer, String
+from sqlalchemy import (
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    Sequence,
+    String,
+)
 
 from app.services.database.tables.base import Base
 
+# New sensor ids are allocated from this sequence, in blocks during binds
+SENSOR_ID_SEQUENCE = Sequence("sensor_id_seq")
+
 
 class SensorRegistry(Base):
     """Sensor registry table."""
 
     __tablename__ = "sensor_registry"
-    sensor_id = Column(Integer, primary_key=True)
+    sensor_id = Column(Integer, SENSOR_ID_SEQUENCE, primary_key=True)
     process_id = Column(Integer, ForeignKey("processes.id"))
     position = Column(String)
+    # Set when a deletion job is queued: hidden from reads from then on
+    deleted_at = Column(DateTime)
+
+    __table_args__ = (Index("ix_sensor_registry_process_id", "process_id"),)
 
 
 class PydanticSensorRegistry(BaseModel):
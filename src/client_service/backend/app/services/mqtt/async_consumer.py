@@ -0,0 +1,603 @@
+"""
+MQTT Consumer implementation using aiomqtt on the application event loop.
+"""
+
+import asyncio
+import contextlib
+import datetime as dt
+import json
+import time
+from collections.abc import Callable, Coroutine
+from typing import Any
+
+import aiomqtt
+
+from app.config.timezone_config import SAO_PAULO_TZ
+from app.services.database.async_psg_client import AsyncPSGClient
+from app.services.mqtt import messages, metrics
+from app.services.mqtt.async_publisher import AsyncMQTTPublisher
+from app.services.mqtt.bind_coordinator import AsyncBindCoordinator
+from app.services.mqtt.consumer_settings import ConsumerSettings
+from app.services.mqtt.interfaces import IMQTTConsumer
+from app.services.mqtt.measurement_buffer import AsyncMeasurementBuffer
+from app.services.mqtt.measurement_spool import MeasurementSpool
+from app.services.mqtt.sensor_cache import SensorCache
+from app.services.mqtt.sequence_dedup import SequenceDeduplicator
+from app.utils.logger import RateSummary, logger
+
+
+class _IncomingQueue(asyncio.Queue):
+    """Queue of received messages that reports the ones it discards.
+
+    aiomqtt puts every received message with ``put_nowait`` and silently
+    discards it when the queue is full; this queue hands it to ``on_drop``
+    instead.
+    """
+
+    def __init__(
+        self,
+        on_drop: Callable[[aiomqtt.Message], None],
+        maxsize: int = 0,
+    ) -> None:
+        super().__init__(maxsize=maxsize)
+        self._on_drop = on_drop
+
+    def put_nowait(self, item: aiomqtt.Message) -> None:
+        try:
+            super().put_nowait(item)
+        except asyncio.QueueFull:
+            self._on_drop(item)
+
+
+class AsyncMQTTConsumer(IMQTTConsumer):
+    """MQTT Consumer implementation using the asyncio aiomqtt library.
+
+    Runs as a task on the FastAPI event loop and stores data through the
+    async database client, so no thread handoff happens per message. Like
+    the publisher, the coroutine methods are the native API and the
+    synchronous ``IMQTTConsumer`` methods schedule them.
+    """
+
+    RECONNECT_DELAY = 2.0
+    # Minimum seconds between two warnings about dropped messages
+    DROP_LOG_INTERVAL = 10.0
+
+    def __init__(
+        self,
+        db_client: AsyncPSGClient,
+        publisher: AsyncMQTTPublisher,
+        settings: ConsumerSettings,
+        *,
+        sensor_cache: SensorCache,
+        spool: MeasurementSpool | None = None,
+    ) -> None:
+        """
+        Initialize the MQTT consumer.
+
+        Args:
+            db_client (AsyncPSGClient): Async database client for storing
+                data.
+            publisher (AsyncMQTTPublisher): Publisher for sending responses.
+            settings (ConsumerSettings): Broker address and tuning knobs
+                (``ingestion_workers``, ``backpressure`` and ``spill_dir``
+                are not used).
+            sensor_cache (SensorCache): Sensor → process cache shared with
+                the API.
+            spool (MeasurementSpool | None): Local spool for measurements
+                the database does not accept, replayed when it recovers.
+        """
+        self.db_client = db_client
+        self.publisher = publisher
+        self.settings = settings
+        self.broker_host = settings.broker_host
+        self.broker_port = settings.broker_port
+        self.sensor_cache = sensor_cache
+        self.dedup = SequenceDeduplicator(settings.dedup_window)
+        self.queue_size = settings.queue_size
+        # Received messages discarded because the queue was full
+        self.dropped = 0
+        self._drop_logged_at = -self.DROP_LOG_INTERVAL
+        self.shared_group = settings.shared_group
+        self.bind_response_mode = settings.bind_response_mode
+        self.client: aiomqtt.Client | None = None
+        self._exit_stack = contextlib.AsyncExitStack()
+        self._connected = False
+        self._task: asyncio.Task | None = None
+        self._in_flight: set[asyncio.Task] = set()
+        # Tasks started by the synchronous methods, kept so they are not
+        # garbage collected while running
+        self._scheduled: set[asyncio.Task] = set()
+        self._received = RateSummary(logger, "[MQTT-CONSUMER] Received on")
+        self._decode_seconds = metrics.DECODE_SECONDS.labels(
+            messages.TOPIC_MEASUREMENT,
+        )
+        self._batch_decode_seconds = metrics.DECODE_SECONDS.labels(
+            messages.TOPIC_MEASUREMENT_BATCH,
+        )
+        self.spool = spool
+        self._semaphore = asyncio.Semaphore(max(1, settings.max_concurrency))
+        self._buffer = AsyncMeasurementBuffer(
+            db_client,
+            flush_size=settings.flush_size,
+            flush_interval=settings.flush_interval,
+            spool=spool,
+            max_pending=settings.max_pending,
+        )
+        self._binds = AsyncBindCoordinator(
+            db_client,
+            self.sensor_cache,
+            self._send_bind_response,
+            max_batch=settings.bind_batch_size,
+            window=settings.bind_window,
+        )
+
+    async def aconnect(self) -> bool:
+        """
+        Connect to the MQTT broker and subscribe to topics.
+
+        Returns:
+            bool: True if connection successful, False otherwise.
+        """
+        try:
+            self.client = aiomqtt.Client(
+                self.broker_host,
+                self.broker_port,
+                queue_type=self._incoming_queue,
+                max_queued_incoming_messages=self.queue_size or None,
+                # MQTT v5 for shared subscriptions and the Response Topic
+                # and Correlation Data of bind requests
+                protocol=aiomqtt.ProtocolVersion.V5,
+            )
+            await self._exit_stack.enter_async_context(self.client)
+            self._connected = True
+
+            # Subscribe to all required topics
+            for topic in messages.CONSUMER_TOPICS:
+                await self.asubscribe(
+                    messages.subscription(topic, self.shared_group),
+                )
+
+            logger.info(
+                f"MQTT Consumer (asyncio) connected to "
+                f"{self.broker_host}:{self.broker_port}",
+            )
+            return True
+        except aiomqtt.MqttError as e:
+            logger.error(f"Failed to connect MQTT Consumer (asyncio): {e}")
+            await self._disconnect()
+            return False
+
+    async def asubscribe(self, topic: str) -> bool:
+        """
+        Subscribe to a topic.
+
+        Args:
+            topic (str): The MQTT topic to subscribe to.
+
+        Returns:
+            bool: True if subscription successful, False otherwise.
+        """
+        try:
+            await self.client.subscribe(topic)
+            logger.info(f"Subscribed to topic: {topic}")
+            return True
+        except aiomqtt.MqttError as e:
+            logger.error(f"Error subscribing to {topic}: {e}")
+            return False
+
+    async def aclose(self) -> None:
+        """Stop consuming, drain in-flight work and buffered measurements."""
+        self.stop()
+        if self._task is not None:
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+        await self._binds.stop()
+        await self._buffer.stop()
+        if self.spool is not None:
+            await asyncio.to_thread(self.spool.stop)
+        await self._disconnect()
+        logger.info("MQTT Consumer (asyncio) stopped")
+
+    def connect(self) -> bool:
+        """
+        Schedule the connection on the running event loop.
+
+        Returns:
+            bool: True if the connection was scheduled, False if there is no
+            running event loop.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            logger.error("AsyncMQTTConsumer.connect needs a running loop")
+            return False
+        self._schedule(self.aconnect())
+        return True
+
+    def disconnect(self) -> None:
+        """Schedule the disconnection on the running event loop."""
+        self._schedule(self._disconnect())
+
+    def subscribe(self, topic: str) -> bool:
+        """
+        Schedule a subscription on the running event loop.
+
+        Args:
+            topic (str): The MQTT topic to subscribe to.
+
+        Returns:
+            bool: True if the subscription was scheduled, False otherwise.
+        """
+        if not self._connected:
+            return False
+        self._schedule(self.asubscribe(topic))
+        return True
+
+    def start(self) -> None:
+        """Start the consumer loop as a task on the running event loop."""
+        if self._task is not None and not self._task.done():
+            logger.warning("[MQTT-CONSUMER] Already running")
+            return
+
+        self._buffer.start()
+        if self.spool is not None:
+            self.spool.start()
+        self._binds.start()
+        self._task = asyncio.get_running_loop().create_task(self._run_loop())
+        logger.info("[MQTT-CONSUMER] Task started and listening for messages")
+
+    def stop(self) -> None:
+        """Cancel the consumer loop (use ``aclose`` to also drain)."""
+        if self._task is not None:
+            self._task.cancel()
+
+    def stats(self) -> dict:
+        """
+        Get ingestion pipeline statistics.
+
+        Returns:
+            dict: Sensor cache, dedup and bind counters, buffered and
+            spooled measurements and messages dropped on a full queue.
+        """
+        return {
+            "sensor_cache": self.sensor_cache.stats(),
+            "dedup": self.dedup.stats(),
+            "bind": self._binds.stats(),
+            "buffered_measurements": self._buffer.pending,
+            "spool": self.spool.stats() if self.spool is not None else None,
+            "executor": None,
+            "dropped_messages": self.dropped,
+        }
+
+    def _incoming_queue(self, maxsize: int = 0) -> _IncomingQueue:
+        """
+        Create the queue aiomqtt puts received messages on.
+
+        Args:
+            maxsize (int): Maximum number of queued messages (0 for
+                unbounded).
+
+        Returns:
+            _IncomingQueue: The queue, reporting drops to
+            ``_drop_message``.
+        """
+        return _IncomingQueue(self._drop_message, maxsize)
+
+    def _drop_message(self, message: aiomqtt.Message) -> None:
+        """
+        Count a message discarded because the incoming queue was full.
+
+        Logs a warning at most once per ``DROP_LOG_INTERVAL``.
+
+        Args:
+            message (aiomqtt.Message): The discarded message.
+        """
+        self.dropped += 1
+        metrics.MESSAGES_DROPPED.labels(message.topic.value).inc()
+        now = time.monotonic()
+        if now - self._drop_logged_at >= self.DROP_LOG_INTERVAL:
+            self._drop_logged_at = now
+            logger.warning(
+                f"[MQTT-CONSUMER] Incoming queue full ({self.queue_size} "
+                f"messages): dropped a message on {message.topic.value} "
+                f"({self.dropped} dropped so far)",
+            )
+
+    async def _disconnect(self) -> None:
+        """Leave the aiomqtt client context."""
+        self._connected = False
+        with contextlib.suppress(aiomqtt.MqttError):
+            await self._exit_stack.aclose()
+
+    async def _run_loop(self) -> None:
+        """Dispatch incoming messages, reconnecting on broker errors."""
+        while True:
+            if not self._connected and not await self.aconnect():
+                await asyncio.sleep(self.RECONNECT_DELAY)
+                continue
+            try:
+                await self._receive_messages()
+            except aiomqtt.MqttError as e:
+                logger.warning(f"[MQTT-CONSUMER] Connection lost: {e}")
+                await self._disconnect()
+                await asyncio.sleep(self.RECONNECT_DELAY)
+
+    async def _receive_messages(self) -> None:
+        """Hand each incoming message to a task, until the connection ends."""
+        async for message in self.client.messages:
+            received_at = dt.datetime.now(SAO_PAULO_TZ)
+            self._received.record(message.topic.value)
+            metrics.MESSAGES_RECEIVED.labels(message.topic.value).inc()
+            if message.topic.value == messages.TOPIC_BIND_REQUEST:
+                # Only queued on the bind coordinator
+                self._handle_bind_request(
+                    message.payload,
+                    messages.bind_reply_to(message.properties),
+                )
+                continue
+            await self._semaphore.acquire()
+            task = asyncio.create_task(
+                self._process_message(
+                    message.topic.value,
+                    message.payload,
+                    received_at,
+                ),
+            )
+            self._in_flight.add(task)
+            task.add_done_callback(self._on_task_done)
+
+    def _schedule(self, coro: Coroutine[Any, Any, object]) -> None:
+        """Run a coroutine as a task on the running loop."""
+        task = asyncio.get_running_loop().create_task(coro)
+        self._scheduled.add(task)
+        task.add_done_callback(self._scheduled.discard)
+
+    def _on_task_done(self, task: asyncio.Task) -> None:
+        self._in_flight.discard(task)
+        self._semaphore.release()
+
+    async def _process_message(
+        self,
+        topic: str,
+        raw_payload: bytes,
+        received_at: dt.datetime,
+    ) -> None:
+        """
+        Decode a message and route it to its handler.
+
+        Args:
+            topic (str): The MQTT topic the message arrived on.
+            raw_payload (bytes): The raw message payload.
+            received_at (datetime.datetime): When the message was received.
+        """
+        logger.debug(
+            "[MQTT-CONSUMER] Received message on %s: %r",
+            topic,
+            raw_payload,
+        )
+        try:
+            await self._route_message(topic, raw_payload, received_at)
+        except Exception as e:
+            logger.error(f"[MQTT-CONSUMER] Error processing message: {e}")
+
+    async def _route_message(
+        self,
+        topic: str,
+        raw_payload: bytes,
+        received_at: dt.datetime,
+    ) -> None:
+        """Call the handler of the message's topic."""
+        if topic == messages.TOPIC_MEASUREMENT:
+            await self._handle_measurement(raw_payload, received_at)
+        elif topic == messages.TOPIC_MEASUREMENT_BATCH:
+            await self._handle_measurement_batch(raw_payload, received_at)
+        elif topic == messages.TOPIC_BIND_REQUEST:
+            self._handle_bind_request(raw_payload)
+        elif topic == messages.TOPIC_UNBIND:
+            self._handle_unbind(raw_payload.decode("utf-8"))
+        else:
+            logger.warning(f"[MQTT-CONSUMER] Unhandled topic: {topic}")
+
+    async def _handle_measurement(
+        self,
+        payload: bytes,
+        received_at: dt.datetime,
+    ) -> None:
+        """
+        Handle measurement messages (JSON or binary, see ``messages``).
+
+        Args:
+            payload (bytes): Raw payload.
+            received_at (datetime.datetime): When the message was received,
+                stored as the measurement timestamp.
+        """
+        started_at = time.perf_counter()
+        try:
+            sensor_id, medicao, seq = messages.parse_measurement(payload)
+        except (KeyError, ValueError, json.JSONDecodeError) as e:
+            logger.error(f"Invalid measurement payload: {e}")
+            return
+        self._decode_seconds.observe(time.perf_counter() - started_at)
+        if seq is not None and self.dedup.seen(sensor_id, seq):
+            logger.debug(
+                "Duplicate measurement dropped: sensor=%s, seq=%s",
+                sensor_id,
+                seq,
+            )
+            return
+
+        process_id = await self._resolve_process(sensor_id)
+        if process_id is None:
+            logger.error(f"Sensor {sensor_id} not found in registry")
+            return
+
+        self._buffer.add(
+            messages.build_measurement(
+                sensor_id,
+                process_id,
+                medicao,
+                received_at,
+                seq,
+            ),
+        )
+        if seq is not None:
+            self.dedup.remember(sensor_id, seq)
+        logger.debug(
+            "Measurement buffered: sensor=%s, process=%s, rh=%s",
+            sensor_id,
+            process_id,
+            medicao,
+        )
+
+    async def _handle_measurement_batch(
+        self,
+        payload: bytes,
+        received_at: dt.datetime,
+    ) -> None:
+        """
+        Handle a batch of readings buffered by a sensor.
+
+        The batch bypasses the measurement buffer and is written with a
+        single bulk insert.
+
+        Args:
+            payload (bytes): Raw payload (JSON or binary, see ``messages``).
+            received_at (datetime.datetime): When the batch was received.
+        """
+        started_at = time.perf_counter()
+        try:
+            sensor_id, readings = messages.parse_measurement_batch(payload)
+        except (KeyError, TypeError, ValueError) as e:
+            logger.error(f"Invalid measurement batch payload: {e}")
+            return
+        self._batch_decode_seconds.observe(
+            time.perf_counter() - started_at,
+        )
+        readings = [
+            reading
+            for reading in readings
+            if reading[2] is None or not self.dedup.seen(sensor_id, reading[2])
+        ]
+        if not readings:
+            return
+
+        process_id = await self._resolve_process(sensor_id)
+        if process_id is None:
+            logger.error(f"Sensor {sensor_id} not found in registry")
+            return
+
+        batch = messages.build_batch_measurements(
+            sensor_id,
+            process_id,
+            readings,
+            received_at,
+        )
+        if not await self._buffer.write(batch):
+            logger.error(
+                f"Failed to store batch of {len(batch)} measurements "
+                f"from sensor {sensor_id}",
+            )
+            return
+        for reading in readings:
+            if reading[2] is not None:
+                self.dedup.remember(sensor_id, reading[2])
+        logger.debug(
+            "Measurement batch stored: sensor=%s, process=%s, readings=%d",
+            sensor_id,
+            process_id,
+            len(batch),
+        )
+
+    async def _resolve_process(self, sensor_id: int) -> int | None:
+        """
+        Resolve the process of a sensor (cached, falls back to database).
+
+        Args:
+            sensor_id (int): The id of the sensor.
+
+        Returns:
+            int | None: The process id, or None if the sensor is unknown.
+        """
+        started_at = time.perf_counter()
+        process_id = self.sensor_cache.lookup(sensor_id)
+        if process_id is None:
+            sensor = await self.db_client.get_sensor_by_id(sensor_id)
+            if sensor:
+                process_id = sensor.process_id
+                self.sensor_cache.put(sensor_id, process_id)
+        metrics.SENSOR_LOOKUP_SECONDS.observe(time.perf_counter() - started_at)
+        return process_id
+
+    def _handle_bind_request(
+        self,
+        payload: bytes,
+        reply_to: tuple[str, bytes | None] | None = None,
+    ) -> None:
+        """
+        Handle bind request messages.
+
+        The request is queued on the bind coordinator, which registers
+        concurrent requests in one transaction and answers each of them.
+
+        Args:
+            payload (bytes): JSON payload.
+            reply_to (tuple[str, bytes | None] | None): MQTT v5 Response
+                Topic and Correlation Data of the request.
+        """
+        try:
+            req_id, nome = messages.parse_bind_request(payload)
+            self._binds.submit(req_id, reply_to)
+            logger.debug("Bind request %s queued for %s", req_id, nome)
+
+        except (KeyError, ValueError, json.JSONDecodeError) as e:
+            logger.error(f"Invalid bind request payload: {e}")
+
+    async def _send_bind_response(
+        self,
+        req_id: str,
+        sensor_id: int | None,
+        reply_to: tuple[str, bytes | None] | None,
+    ) -> None:
+        """
+        Answer a bind request on its reply topic(s) only.
+
+        Args:
+            req_id (str): The request id.
+            sensor_id (int | None): The new sensor id, or None on failure.
+            reply_to (tuple[str, bytes | None] | None): MQTT v5 Response
+                Topic and Correlation Data of the request.
+        """
+        response = messages.bind_response(req_id, sensor_id)
+        for topic, correlation_data in messages.bind_response_targets(
+            req_id,
+            self.bind_response_mode,
+            reply_to,
+        ):
+            await self.publisher.apublish(
+                topic,
+                response,
+                correlation_data=correlation_data,
+            )
+
+    def _handle_unbind(self, payload: str) -> None:
+        """
+        Handle unbind messages.
+
+        Data is preserved in the database; the sensor is only dropped from
+        the routing cache.
+
+        Args:
+            payload (str): JSON payload string.
+        """
+        try:
+            sensor_id = messages.parse_unbind(payload)
+            self.sensor_cache.evict(sensor_id)
+            self.dedup.forget(sensor_id)
+            logger.info(
+                f"Sensor {sensor_id} unbound (data preserved for history)",
+            )
+        except (KeyError, ValueError, json.JSONDecodeError) as e:
+            logger.error(f"Invalid unbind payload: {e}")
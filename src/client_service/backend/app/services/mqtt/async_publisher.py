@@ -0,0 +1,223 @@
+"""
+MQTT Publisher implementation using aiomqtt on the application event loop.
+"""
+
+import asyncio
+import contextlib
+import time
+
+import aiomqtt
+from paho.mqtt.packettypes import PacketTypes
+from paho.mqtt.properties import Properties
+
+from app.services.mqtt import metrics
+from app.services.mqtt.interfaces import IMQTTPublisher
+from app.services.mqtt.messages import TOPIC_PROCESS
+from app.utils.logger import logger
+
+
+class AsyncMQTTPublisher(IMQTTPublisher):
+    """MQTT Publisher implementation using the asyncio aiomqtt library.
+
+    The coroutine methods (``aconnect``, ``apublish``, ``aclose``) are the
+    native API. The synchronous ``IMQTTPublisher`` methods schedule them on
+    the event loop the publisher was connected on, so routers can keep
+    calling ``publish`` without awaiting.
+
+    A publish that fails with a broker error marks the publisher as
+    disconnected and starts a task that connects again every
+    ``RECONNECT_DELAY`` seconds; publishes fail fast until it succeeds.
+    """
+
+    RECONNECT_DELAY = 2.0
+
+    def __init__(self, broker_host: str, broker_port: int) -> None:
+        """
+        Initialize the MQTT publisher.
+
+        Args:
+            broker_host (str): MQTT broker hostname.
+            broker_port (int): MQTT broker port.
+        """
+        self.broker_host = broker_host
+        self.broker_port = broker_port
+        self.client: aiomqtt.Client | None = None
+        self._exit_stack = contextlib.AsyncExitStack()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._connected = False
+        self._closing = False
+        self._reconnect_task: asyncio.Task | None = None
+
+    async def aconnect(self) -> bool:
+        """
+        Connect to the MQTT broker.
+
+        Returns:
+            bool: True if connection successful, False otherwise.
+        """
+        try:
+            self._loop = asyncio.get_running_loop()
+            # MQTT v5 so responses can carry Correlation Data
+            self.client = aiomqtt.Client(
+                self.broker_host,
+                self.broker_port,
+                protocol=aiomqtt.ProtocolVersion.V5,
+            )
+            await self._exit_stack.enter_async_context(self.client)
+            self._connected = True
+            logger.info(
+                f"MQTT Publisher (asyncio) connected to "
+                f"{self.broker_host}:{self.broker_port}",
+            )
+            return True
+        except aiomqtt.MqttError as e:
+            logger.error(f"Failed to connect MQTT Publisher (asyncio): {e}")
+            self._connected = False
+            return False
+
+    async def aclose(self) -> None:
+        """Disconnect from the MQTT broker."""
+        self._closing = True
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._reconnect_task
+            self._reconnect_task = None
+        if self._connected:
+            self._connected = False
+            with contextlib.suppress(aiomqtt.MqttError):
+                await self._exit_stack.aclose()
+            logger.info("MQTT Publisher (asyncio) disconnected")
+
+    async def apublish(
+        self,
+        topic: str,
+        payload: str,
+        retained: bool = False,
+        correlation_data: bytes | None = None,
+    ) -> bool:
+        """
+        Publish a message to a topic.
+
+        Args:
+            topic (str): The MQTT topic to publish to.
+            payload (str): The message payload.
+            retained (bool): Whether to retain the message.
+            correlation_data (bytes | None): MQTT v5 Correlation Data of the
+                request being answered.
+
+        Returns:
+            bool: True if publish successful, False otherwise.
+        """
+        if not self._connected:
+            logger.error("Cannot publish: MQTT Publisher not connected")
+            return False
+
+        properties = None
+        if correlation_data is not None:
+            properties = Properties(PacketTypes.PUBLISH)
+            properties.CorrelationData = correlation_data
+        started_at = time.perf_counter()
+        try:
+            await self.client.publish(
+                topic,
+                payload,
+                retain=retained,
+                properties=properties,
+            )
+        except aiomqtt.MqttError as e:
+            logger.error(f"Error publishing to {topic}: {e}")
+            self._connection_lost()
+            return False
+        metrics.PUBLISH_SECONDS.observe(time.perf_counter() - started_at)
+        logger.debug("Published to %s: %s", topic, payload)
+        return True
+
+    def connect(self) -> bool:
+        """
+        Schedule the connection on the running event loop.
+
+        Returns:
+            bool: True if the connection was scheduled, False if there is no
+            running event loop.
+        """
+        try:
+            self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            logger.error("AsyncMQTTPublisher.connect needs a running loop")
+            return False
+        self._schedule(self.aconnect())
+        return True
+
+    def disconnect(self) -> None:
+        """Schedule the disconnection on the event loop."""
+        if self._loop is not None:
+            self._schedule(self.aclose())
+
+    def publish(
+        self,
+        topic: str,
+        payload: str,
+        retained: bool = False,
+        correlation_data: bytes | None = None,
+    ) -> bool:
+        """
+        Schedule a publish on the event loop.
+
+        Args:
+            topic (str): The MQTT topic to publish to.
+            payload (str): The message payload.
+            retained (bool): Whether to retain the message.
+            correlation_data (bytes | None): MQTT v5 Correlation Data of the
+                request being answered.
+
+        Returns:
+            bool: True if the publish was scheduled, False otherwise.
+        """
+        if not self._connected:
+            logger.error("Cannot publish: MQTT Publisher not connected")
+            return False
+        self._schedule(
+            self.apublish(topic, payload, retained, correlation_data),
+        )
+        return True
+
+    def publish_process_command(
+        self, command: str, retained: bool = False
+    ) -> bool:
+        """
+        Publish a process command to the sensors.
+
+        Args:
+            command (str): Command to send ("iniciar" or "finalizar").
+            retained (bool): Whether to retain the message.
+
+        Returns:
+            bool: True if the publish was scheduled, False otherwise.
+        """
+        return self.publish(TOPIC_PROCESS, command, retained=retained)
+
+    def _connection_lost(self) -> None:
+        """Mark the publisher as disconnected and start reconnecting."""
+        if not self._connected or self._closing:
+            return
+        self._connected = False
+        self._reconnect_task = asyncio.get_running_loop().create_task(
+            self._reconnect(),
+        )
+
+    async def _reconnect(self) -> None:
+        """Connect again until the broker accepts the connection."""
+        with contextlib.suppress(aiomqtt.MqttError):
+            await self._exit_stack.aclose()
+        logger.warning(
+            "MQTT Publisher (asyncio) lost the connection, reconnecting",
+        )
+        while True:
+            if await self.aconnect():
+                return
+            await asyncio.sleep(self.RECONNECT_DELAY)
+
+    def _schedule(self, coro: object) -> None:
+        """Run a coroutine on the publisher's loop from any thread."""
+        asyncio.run_coroutine_threadsafe(coro, self._loop)
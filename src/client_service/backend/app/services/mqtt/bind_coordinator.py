@@ -0,0 +1,340 @@
+"""
+Coalesced sensor registration for bind requests.
+
+``publish_process_command("iniciar")`` wakes every sensor at once and each
+one sends a bind request. Instead of one transaction per request, bind
+requests are queued and a single flusher registers everything that is
+pending at once: one active process lookup, one block of ids from the
+``sensor_id_seq`` sequence and one multi-row insert per batch. While a
+batch is being written the next one accumulates, so batches grow with the
+request rate without delaying a lone bind.
+
+Each request is answered through the ``respond`` callback with the new
+sensor id (None when there is no active process or the registration
+failed) and the reply address the request was submitted with.
+"""
+
+import asyncio
+import itertools
+import threading
+from collections.abc import Awaitable, Callable
+
+from app.services.database.async_psg_client import AsyncPSGClient
+from app.services.database.base_client._dbclient import IDBClient
+from app.services.mqtt.sensor_cache import SensorCache
+from app.utils.logger import logger
+
+# MQTT v5 Response Topic and Correlation Data of a request, if it had them
+ReplyTo = tuple[str, bytes | None] | None
+
+
+class _BindStats:
+    """Counters shared by both coordinators."""
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.batches = 0
+        self.largest_batch = 0
+        self.failed = 0
+
+    def batch(self, size: int) -> None:
+        self.batches += 1
+        self.largest_batch = max(self.largest_batch, size)
+
+    def as_dict(self, pending: int) -> dict[str, int]:
+        return {
+            "pending": pending,
+            "requests": self.requests,
+            "batches": self.batches,
+            "largest_batch": self.largest_batch,
+            "failed": self.failed,
+        }
+
+
+class BindCoordinator:
+    """Registers pending bind requests in batches on a flusher thread."""
+
+    def __init__(
+        self,
+        db_client: IDBClient,
+        sensor_cache: SensorCache,
+        respond: Callable[[str, int | None, ReplyTo], None],
+        max_batch: int = 500,
+        window: float = 0.0,
+    ) -> None:
+        """
+        Initialize the bind coordinator.
+
+        Args:
+            db_client (IDBClient): Database client used to register sensors.
+            sensor_cache (SensorCache): Routing cache the new sensors are
+                added to.
+            respond (Callable[[str, int | None, ReplyTo], None]): Called
+                with the request id, the new sensor id (None on failure)
+                and the reply address of the request.
+            max_batch (int): Maximum bind requests registered per
+                transaction.
+            window (float): Extra seconds to wait for more requests after
+                the first one of a batch arrives (0 only batches what
+                piles up while the previous batch is written).
+        """
+        self.db_client = db_client
+        self.sensor_cache = sensor_cache
+        self.respond = respond
+        self.max_batch = max(1, max_batch)
+        self.window = max(0.0, window)
+        # req_id -> reply address; a retried request is registered once
+        self._pending: dict[str, ReplyTo] = {}
+        self._condition = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._stats = _BindStats()
+
+    @property
+    def pending(self) -> int:
+        """Number of bind requests waiting to be registered."""
+        with self._condition:
+            return len(self._pending)
+
+    def start(self) -> None:
+        """Start the flusher thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run_loop,
+            name="bind-coordinator",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the flusher thread and answer the pending requests."""
+        self._stop_event.set()
+        with self._condition:
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+        while self._register_pending():
+            pass
+
+    def submit(self, req_id: str, reply_to: ReplyTo = None) -> None:
+        """
+        Queue a bind request for the next batch.
+
+        Args:
+            req_id (str): The request id echoed in the response.
+            reply_to (ReplyTo): MQTT v5 Response Topic and Correlation Data
+                of the request, passed back to ``respond``.
+        """
+        with self._condition:
+            self._stats.requests += 1
+            self._pending[req_id] = reply_to
+            self._condition.notify_all()
+
+    def stats(self) -> dict[str, int]:
+        """
+        Get bind counters.
+
+        Returns:
+            dict[str, int]: Pending and total requests, batches written,
+            largest batch and requests answered with a failure.
+        """
+        with self._condition:
+            return self._stats.as_dict(len(self._pending))
+
+    def _run_loop(self) -> None:
+        """Wait for bind requests and register them in batches."""
+        while not self._stop_event.is_set():
+            with self._condition:
+                while not self._pending and not self._stop_event.is_set():
+                    self._condition.wait()
+            if self.window:
+                self._stop_event.wait(self.window)
+            while self._register_pending():
+                pass
+
+    def _register_pending(self) -> bool:
+        """
+        Register up to ``max_batch`` pending requests and answer them.
+
+        Returns:
+            bool: True if a batch was processed, False if nothing was
+            pending.
+        """
+        with self._condition:
+            if not self._pending:
+                return False
+            req_ids = list(self._pending)[: self.max_batch]
+            replies = [self._pending.pop(req_id) for req_id in req_ids]
+            self._stats.batch(len(req_ids))
+
+        sensor_ids: list[int] | None = None
+        active_process = self.db_client.get_active_process()
+        if active_process is None:
+            logger.warning(
+                f"No active process found for {len(req_ids)} bind requests",
+            )
+        else:
+            sensor_ids = self.db_client.register_new_sensors(
+                active_process.id,
+                len(req_ids),
+            )
+            if sensor_ids is None:
+                logger.error("Failed to create sensors in database")
+            else:
+                for sensor_id in sensor_ids:
+                    self.sensor_cache.put(sensor_id, active_process.id)
+
+        if sensor_ids is None:
+            with self._condition:
+                self._stats.failed += len(req_ids)
+            sensor_ids = [None] * len(req_ids)
+        for req_id, sensor_id, reply_to in zip(
+            req_ids,
+            sensor_ids,
+            replies,
+            strict=True,
+        ):
+            self.respond(req_id, sensor_id, reply_to)
+        return True
+
+
+class AsyncBindCoordinator:
+    """asyncio counterpart of BindCoordinator for the asyncio consumer."""
+
+    def __init__(
+        self,
+        db_client: AsyncPSGClient,
+        sensor_cache: SensorCache,
+        respond: Callable[[str, int | None, ReplyTo], Awaitable[None]],
+        max_batch: int = 500,
+        window: float = 0.0,
+    ) -> None:
+        """
+        Initialize the bind coordinator.
+
+        Args:
+            db_client (AsyncPSGClient): Async database client used to
+                register sensors.
+            sensor_cache (SensorCache): Routing cache the new sensors are
+                added to.
+            respond (Callable[[str, int | None, ReplyTo], Awaitable[None]]):
+                Awaited with the request id, the new sensor id (None on
+                failure) and the reply address of the request.
+            max_batch (int): Maximum bind requests registered per
+                transaction.
+            window (float): Extra seconds to wait for more requests after
+                the first one of a batch arrives.
+        """
+        self.db_client = db_client
+        self.sensor_cache = sensor_cache
+        self.respond = respond
+        self.max_batch = max(1, max_batch)
+        self.window = max(0.0, window)
+        self._pending: dict[str, ReplyTo] = {}
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+        self._stats = _BindStats()
+
+    @property
+    def pending(self) -> int:
+        """Number of bind requests waiting to be registered."""
+        return len(self._pending)
+
+    def start(self) -> None:
+        """Start the flusher task on the running event loop."""
+        if self._task is not None and not self._task.done():
+            return
+        self._stopping = False
+        self._task = asyncio.get_running_loop().create_task(self._run_loop())
+
+    async def stop(self) -> None:
+        """Stop the flusher task and answer the pending requests."""
+        if self._task is not None:
+            # Not cancelled: the requests of a batch in progress are already
+            # out of ``_pending``, so the loop answers them and exits
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        while await self._register_pending():
+            pass
+
+    def submit(self, req_id: str, reply_to: ReplyTo = None) -> None:
+        """
+        Queue a bind request for the next batch.
+
+        Args:
+            req_id (str): The request id echoed in the response.
+            reply_to (ReplyTo): MQTT v5 Response Topic and Correlation Data
+                of the request, passed back to ``respond``.
+        """
+        self._stats.requests += 1
+        self._pending[req_id] = reply_to
+        self._wakeup.set()
+
+    def stats(self) -> dict[str, int]:
+        """
+        Get bind counters.
+
+        Returns:
+            dict[str, int]: Pending and total requests, batches written,
+            largest batch and requests answered with a failure.
+        """
+        return self._stats.as_dict(len(self._pending))
+
+    async def _run_loop(self) -> None:
+        """Wait for bind requests and register them in batches."""
+        while not self._stopping:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            if self.window and not self._stopping:
+                await asyncio.sleep(self.window)
+            while await self._register_pending():
+                pass
+
+    async def _register_pending(self) -> bool:
+        """
+        Register up to ``max_batch`` pending requests and answer them.
+
+        Returns:
+            bool: True if a batch was processed, False if nothing was
+            pending.
+        """
+        if not self._pending:
+            return False
+        req_ids = list(self._pending)[: self.max_batch]
+        replies = [self._pending.pop(req_id) for req_id in req_ids]
+        self._stats.batch(len(req_ids))
+
+        sensor_ids: list[int] | None = None
+        active_process = await self.db_client.get_active_process()
+        if active_process is None:
+            logger.warning(
+                f"No active process found for {len(req_ids)} bind requests",
+            )
+        else:
+            sensor_ids = await self.db_client.register_new_sensors(
+                active_process.id,
+                len(req_ids),
+            )
+            if sensor_ids is None:
+                logger.error("Failed to create sensors in database")
+            else:
+                for sensor_id in sensor_ids:
+                    self.sensor_cache.put(sensor_id, active_process.id)
+
+        if sensor_ids is None:
+            self._stats.failed += len(req_ids)
+            sensor_ids = [None] * len(req_ids)
+        await asyncio.gather(
+            *itertools.starmap(
+                self.respond,
+                zip(req_ids, sensor_ids, replies, strict=True),
+            ),
+        )
+        return True
@@ -4,7 +4,6 @@ MQTT Consumer implementation using paho-mqtt.
 
 import datetime
 import json
-import random
 import threading
 import time
 
@@ -12,26 +11,36 @@ import paho.mqtt.client as mqtt
 
 from app.config.timezone_config import SAO_PAULO_TZ
 from app.services.database.psg_client import PSGClient
-from app.services.database.tables.measurements import PydanticMeasurement
+from app.services.mqtt import messages, metrics
+from app.services.mqtt.bind_coordinator import BindCoordinator
+from app.services.mqtt.consumer_settings import ConsumerSettings
+from app.services.mqtt.ingestion_executor import IngestionExecutor
 from app.services.mqtt.interfaces import IMQTTConsumer, IMQTTPublisher
-from app.utils.logger import logger
+from app.services.mqtt.measurement_buffer import MeasurementBuffer
+from app.services.mqtt.measurement_spool import MeasurementSpool
+from app.services.mqtt.sensor_cache import SensorCache
+from app.services.mqtt.sequence_dedup import SequenceDeduplicator
+from app.utils.logger import RateSummary, logger
 
 
 class PahoMQTTConsumer(IMQTTConsumer):
     """MQTT Consumer implementation using paho-mqtt library."""
 
     # MQTT Topics
-    TOPIC_MEASUREMENT = "sensores/medicao"
-    TOPIC_BIND_REQUEST = "sensores/bind/request"
-    TOPIC_BIND_RESPONSE = "sensores/bind/response"
-    TOPIC_UNBIND = "sensores/bind/unbind"
+    TOPIC_MEASUREMENT = messages.TOPIC_MEASUREMENT
+    TOPIC_MEASUREMENT_BATCH = messages.TOPIC_MEASUREMENT_BATCH
+    TOPIC_BIND_REQUEST = messages.TOPIC_BIND_REQUEST
+    TOPIC_BIND_RESPONSE = messages.TOPIC_BIND_RESPONSE
+    TOPIC_UNBIND = messages.TOPIC_UNBIND
 
     def __init__(
         self,
         db_client: PSGClient,
         publisher: IMQTTPublisher,
-        broker_host: str,
-        broker_port: int,
+        settings: ConsumerSettings,
+        *,
+        sensor_cache: SensorCache | None = None,
+        spool: MeasurementSpool | None = None,
     ) -> None:
         """
         Initialize the MQTT consumer.
@@ -39,24 +48,77 @@ class PahoMQTTConsumer(IMQTTConsumer):
         Args:
             db_client (PSGClient): Database client for storing data.
             publisher (IMQTTPublisher): Publisher for sending responses.
-            broker_host (str): MQTT broker hostname.
-            broker_port (int): MQTT broker port.
+            settings (ConsumerSettings): Broker address and tuning knobs
+                (``max_concurrency`` is not used).
+            sensor_cache (SensorCache | None): Sensor → process cache shared
+                with the API. A private one is created if not given.
+            spool (MeasurementSpool | None): Local spool for measurements
+                the database does not accept, replayed when it recovers.
         """
         self.db_client = db_client
         self.publisher = publisher
-        self.broker_host = broker_host
-        self.broker_port = broker_port
-        self.client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+        self.settings = settings
+        self.broker_host = settings.broker_host
+        self.broker_port = settings.broker_port
+        self.sensor_cache = sensor_cache or SensorCache(db_client)
+        self.dedup = SequenceDeduplicator(settings.dedup_window)
+        self.shared_group = settings.shared_group
+        self.bind_response_mode = settings.bind_response_mode
+        # MQTT v5 for shared subscriptions and the Response Topic and
+        # Correlation Data of bind requests
+        self.client = mqtt.Client(
+            mqtt.CallbackAPIVersion.VERSION2,
+            protocol=mqtt.MQTTv5,
+        )
         self.client.on_message = self._on_message
         self.client.on_connect = self._on_connect
         self.client.on_disconnect = self._on_disconnect
         self._connected = False
         self._thread: threading.Thread | None = None
         self._stop_event = threading.Event()
+        self._received = RateSummary(logger, "[MQTT-CONSUMER] Received on")
+        self._decode_seconds = metrics.DECODE_SECONDS.labels(
+            self.TOPIC_MEASUREMENT,
+        )
+        self._batch_decode_seconds = metrics.DECODE_SECONDS.labels(
+            self.TOPIC_MEASUREMENT_BATCH,
+        )
+        self.spool = spool
+        self._buffer = MeasurementBuffer(
+            db_client,
+            flush_size=settings.flush_size,
+            flush_interval=settings.flush_interval,
+            spool=spool,
+            max_pending=settings.max_pending,
+        )
+        self._binds = BindCoordinator(
+            db_client,
+            self.sensor_cache,
+            self._send_bind_response,
+            max_batch=settings.bind_batch_size,
+            window=settings.bind_window,
+        )
+        self._executor: IngestionExecutor | None = None
+        if settings.ingestion_workers > 0:
+            self._executor = IngestionExecutor(
+                self._process_message,
+                workers=settings.ingestion_workers,
+                max_queue=settings.queue_size,
+                policy=settings.backpressure,
+                spill_dir=settings.spill_dir,
+            )
+
+    @property
+    def executor(self) -> IngestionExecutor | None:
+        """The ingestion worker pool, or None when processing inline."""
+        return self._executor
 
     def connect(self) -> bool:
         """
-        Connect to the MQTT broker and subscribe to topics.
+        Connect to the MQTT broker.
+
+        Topics are subscribed in ``_on_connect``, so subscriptions are
+        restored whenever paho reconnects.
 
         Returns:
             bool: True if connection successful, False otherwise.
@@ -65,11 +127,6 @@ class PahoMQTTConsumer(IMQTTConsumer):
             self.client.connect(self.broker_host, self.broker_port, 60)
             self._connected = True
 
-            # Subscribe to all required topics
-            self.subscribe(self.TOPIC_MEASUREMENT)
-            self.subscribe(self.TOPIC_BIND_REQUEST)
-            self.subscribe(self.TOPIC_UNBIND)
-
             logger.info(
                 f"MQTT Consumer connected to "
                 f"{self.broker_host}:{self.broker_port}",
@@ -115,6 +172,12 @@ class PahoMQTTConsumer(IMQTTConsumer):
             return
 
         self._stop_event.clear()
+        self._buffer.start()
+        if self.spool is not None:
+            self.spool.start()
+        self._binds.start()
+        if self._executor is not None:
+            self._executor.start()
         self._thread = threading.Thread(target=self._run_loop, daemon=True)
         self._thread.start()
         logger.info("[MQTT-CONSUMER] Thread started and listening for messages")
@@ -128,6 +191,34 @@ class PahoMQTTConsumer(IMQTTConsumer):
             self._thread.join(timeout=5)
             logger.info("MQTT Consumer thread stopped")
 
+        # Drain queued messages, then buffered measurements, once no more
+        # messages can arrive
+        if self._executor is not None:
+            self._executor.stop()
+        self._binds.stop()
+        self._buffer.stop()
+        if self.spool is not None:
+            self.spool.stop()
+
+    def stats(self) -> dict:
+        """
+        Get ingestion pipeline statistics.
+
+        Returns:
+            dict: Sensor cache, dedup and bind counters, buffered and
+            spooled measurements and worker pool statistics.
+        """
+        return {
+            "sensor_cache": self.sensor_cache.stats(),
+            "dedup": self.dedup.stats(),
+            "bind": self._binds.stats(),
+            "buffered_measurements": self._buffer.pending,
+            "spool": self.spool.stats() if self.spool is not None else None,
+            "executor": (
+                self._executor.stats() if self._executor is not None else None
+            ),
+        }
+
     def _run_loop(self) -> None:
         """Internal method to run the MQTT loop."""
         try:
@@ -148,6 +239,12 @@ class PahoMQTTConsumer(IMQTTConsumer):
         if reason_code == 0:
             logger.info("[MQTT-CONSUMER] Connected to broker successfully")
             self._connected = True
+
+            # Subscribe to all required topics
+            for topic in messages.CONSUMER_TOPICS:
+                self.subscribe(
+                    messages.subscription(topic, self.shared_group),
+                )
         else:
             logger.error(
                 f"[MQTT-CONSUMER] Failed to connect: {reason_code}",
@@ -177,160 +274,265 @@ class PahoMQTTConsumer(IMQTTConsumer):
         """
         Callback when a message is received.
 
+        Runs on the paho network thread, so it only stamps the arrival time
+        and hands the message over to the ingestion workers (or processes it
+        inline if there are none). Bind requests are only queued on the bind
+        coordinator, so they are handled here, where the MQTT v5 properties
+        of the request are still at hand. Shared subscription deliveries
+        carry the original topic, so routing is the same in both modes.
+
         Args:
             client (mqtt.Client): The MQTT client instance.
             userdata: User data (not used).
             msg (mqtt.MQTTMessage): The received message.
         """
+        received_at = datetime.datetime.now(SAO_PAULO_TZ)
+        self._received.record(msg.topic)
+        metrics.MESSAGES_RECEIVED.labels(msg.topic).inc()
+        if msg.topic == self.TOPIC_BIND_REQUEST:
+            self._handle_bind_request(
+                msg.payload,
+                messages.bind_reply_to(msg.properties),
+            )
+        elif self._executor is not None:
+            self._executor.submit(msg.topic, msg.payload, received_at)
+        else:
+            self._process_message(msg.topic, msg.payload, received_at)
+
+    def _process_message(
+        self,
+        topic: str,
+        raw_payload: bytes,
+        received_at: datetime.datetime,
+    ) -> None:
+        """
+        Decode a message and route it to its handler.
+
+        Args:
+            topic (str): The MQTT topic the message arrived on.
+            raw_payload (bytes): The raw message payload.
+            received_at (datetime.datetime): When the message was received.
+        """
         try:
-            payload = msg.payload.decode("utf-8")
-            logger.info(
-                f"[MQTT-CONSUMER] Received message on {msg.topic}: {payload}"
+            logger.debug(
+                "[MQTT-CONSUMER] Received message on %s: %r",
+                topic,
+                raw_payload,
             )
 
-            if msg.topic == self.TOPIC_MEASUREMENT:
-                logger.info("[MQTT-CONSUMER] Routing to measurement handler")
-                self._handle_measurement(payload)
-            elif msg.topic == self.TOPIC_BIND_REQUEST:
-                logger.info("[MQTT-CONSUMER] Routing to bind request handler")
-                self._handle_bind_request(payload)
-            elif msg.topic == self.TOPIC_UNBIND:
-                logger.info("[MQTT-CONSUMER] Routing to unbind handler")
-                self._handle_unbind(payload)
+            if topic == self.TOPIC_MEASUREMENT:
+                logger.debug("[MQTT-CONSUMER] Routing to measurement handler")
+                self._handle_measurement(raw_payload, received_at)
+            elif topic == self.TOPIC_MEASUREMENT_BATCH:
+                logger.debug("[MQTT-CONSUMER] Routing to batch handler")
+                self._handle_measurement_batch(raw_payload, received_at)
+            elif topic == self.TOPIC_BIND_REQUEST:
+                logger.debug("[MQTT-CONSUMER] Routing to bind request handler")
+                self._handle_bind_request(raw_payload)
+            elif topic == self.TOPIC_UNBIND:
+                logger.debug("[MQTT-CONSUMER] Routing to unbind handler")
+                self._handle_unbind(raw_payload.decode("utf-8"))
             else:
-                logger.warning(f"[MQTT-CONSUMER] Unhandled topic: {msg.topic}")
+                logger.warning(f"[MQTT-CONSUMER] Unhandled topic: {topic}")
 
         except Exception as e:
             logger.error(f"[MQTT-CONSUMER] Error processing message: {e}")
 
-    def _handle_measurement(self, payload: str) -> None:
+    def _handle_measurement(
+        self,
+        payload: bytes,
+        received_at: datetime.datetime,
+    ) -> None:
         """
-        Handle measurement messages.
-
-        Expected payload: {"medicao": float, "id": str}
+        Handle measurement messages (JSON or binary, see ``messages``).
 
         Args:
-            payload (str): JSON payload string.
+            payload (bytes): Raw payload.
+            received_at (datetime.datetime): When the message was received,
+                stored as the measurement timestamp.
         """
         try:
-            data = json.loads(payload)
-            sensor_id = int(data["id"])
-            medicao = float(data["medicao"])
+            started_at = time.perf_counter()
+            sensor_id, medicao, seq = messages.parse_measurement(payload)
+            self._decode_seconds.observe(time.perf_counter() - started_at)
+            if seq is not None and self.dedup.seen(sensor_id, seq):
+                logger.debug(
+                    "Duplicate measurement dropped: sensor=%s, seq=%s",
+                    sensor_id,
+                    seq,
+                )
+                return
 
-            # Get sensor to find active process
-            sensor = self.db_client.get_sensor_by_id(sensor_id)
-            if not sensor:
+            process_id = self._resolve_process(sensor_id)
+            if process_id is None:
                 logger.error(f"Sensor {sensor_id} not found in registry")
                 return
 
-            # Create measurement
-            measurement = PydanticMeasurement(
-                process_id=sensor.process_id,
-                sensor_id=sensor_id,
-                rh=medicao,  # Using medicao as rh for now
-                soc=100.0,  # Default SOC, can be added to payload later
-                timestamp=datetime.datetime.now(SAO_PAULO_TZ),
+            measurement = messages.build_measurement(
+                sensor_id,
+                process_id,
+                medicao,
+                received_at,
+                seq,
+            )
+            self._buffer.add(measurement)
+            if seq is not None:
+                self.dedup.remember(sensor_id, seq)
+            logger.debug(
+                "Measurement buffered: sensor=%s, process=%s, rh=%s",
+                sensor_id,
+                process_id,
+                medicao,
             )
-
-            saved = self.db_client.add_new_measurement(measurement)
-            if saved:
-                logger.info(
-                    f"Measurement saved: sensor={sensor_id}, "
-                    f"process={sensor.process_id}, rh={medicao}",
-                )
-            else:
-                logger.error("Failed to save measurement to database")
 
         except (KeyError, ValueError, json.JSONDecodeError) as e:
             logger.error(f"Invalid measurement payload: {e}")
 
-    def _handle_bind_request(self, payload: str) -> None:
+    def _handle_measurement_batch(
+        self,
+        payload: bytes,
+        received_at: datetime.datetime,
+    ) -> None:
         """
-        Handle bind request messages.
+        Handle a batch of readings buffered by a sensor.
 
-        Expected payload: {"req_id": str, "nome": str}
+        The batch bypasses the measurement buffer and is written with a
+        single bulk insert.
 
         Args:
-            payload (str): JSON payload string.
+            payload (bytes): Raw payload (JSON or binary, see ``messages``).
+            received_at (datetime.datetime): When the batch was received.
         """
+        started_at = time.perf_counter()
         try:
-            data = json.loads(payload)
-            req_id = data["req_id"]
-            nome = data["nome"]
-
-            # Get the most recent active process (not ended)
-            processes = self.db_client.get_all_processes()
-            active_process = None
-            for process in processes:
-                if process.ended_at is None:
-                    active_process = process
-                    break
-
-            if not active_process:
-                logger.warning(
-                    f"No active process found for bind request from {nome}",
-                )
-                # Send failure response
-                response = json.dumps({
-                    "req_id": req_id,
-                    "id": "",
-                    "status": "fail",
-                })
-                self.publisher.publish(self.TOPIC_BIND_RESPONSE, response)
-                return
+            sensor_id, readings = messages.parse_measurement_batch(payload)
+        except (KeyError, TypeError, ValueError) as e:
+            logger.error(f"Invalid measurement batch payload: {e}")
+            return
+        self._batch_decode_seconds.observe(
+            time.perf_counter() - started_at,
+        )
+        readings = [
+            reading
+            for reading in readings
+            if reading[2] is None or not self.dedup.seen(sensor_id, reading[2])
+        ]
+        if not readings:
+            return
 
-            # Create sensor in registry
-            # Generate a simple sensor_id using timestamp + random component
-            new_sensor_id = int(time.time() * 1000) % 1000000 + random.randint(  # noqa: S311
-                1,
-                1000,
-            )
+        process_id = self._resolve_process(sensor_id)
+        if process_id is None:
+            logger.error(f"Sensor {sensor_id} not found in registry")
+            return
 
-            created = self.db_client.register_new_sensor(
-                new_sensor_id,
-                active_process.id,
+        batch = messages.build_batch_measurements(
+            sensor_id,
+            process_id,
+            readings,
+            received_at,
+        )
+        if not self._buffer.write(batch):
+            logger.error(
+                f"Failed to store batch of {len(batch)} measurements "
+                f"from sensor {sensor_id}",
             )
-            if created:
-                logger.info(
-                    f"Sensor {new_sensor_id} registered "
-                    f"for process {active_process.id}",
-                )
+            return
+        for reading in readings:
+            if reading[2] is not None:
+                self.dedup.remember(sensor_id, reading[2])
+        logger.debug(
+            "Measurement batch stored: sensor=%s, process=%s, readings=%d",
+            sensor_id,
+            process_id,
+            len(batch),
+        )
 
-                # Send success response
-                response = json.dumps({
-                    "req_id": req_id,
-                    "id": str(new_sensor_id),
-                    "status": "ok",
-                })
-                self.publisher.publish(self.TOPIC_BIND_RESPONSE, response)
-            else:
-                logger.error("Failed to create sensor in database")
-                # Send failure response
-                response = json.dumps({
-                    "req_id": req_id,
-                    "id": "",
-                    "status": "fail",
-                })
-                self.publisher.publish(self.TOPIC_BIND_RESPONSE, response)
+    def _resolve_process(self, sensor_id: int) -> int | None:
+        """
+        Resolve the process of a sensor (cached, falls back to database).
+
+        Args:
+            sensor_id (int): The id of the sensor.
+
+        Returns:
+            int | None: The process id, or None if the sensor is unknown.
+        """
+        started_at = time.perf_counter()
+        process_id = self.sensor_cache.get_process_id(sensor_id)
+        metrics.SENSOR_LOOKUP_SECONDS.observe(time.perf_counter() - started_at)
+        return process_id
+
+    def _handle_bind_request(
+        self,
+        payload: bytes,
+        reply_to: tuple[str, bytes | None] | None = None,
+    ) -> None:
+        """
+        Handle bind request messages.
+
+        Expected payload: {"req_id": str, "nome": str}
+
+        The request is queued on the bind coordinator, which registers
+        concurrent requests in one transaction and answers each of them.
+
+        Args:
+            payload (bytes): JSON payload.
+            reply_to (tuple[str, bytes | None] | None): MQTT v5 Response
+                Topic and Correlation Data of the request.
+        """
+        try:
+            req_id, nome = messages.parse_bind_request(payload)
+            self._binds.submit(req_id, reply_to)
+            logger.debug("Bind request %s queued for %s", req_id, nome)
 
         except (KeyError, ValueError, json.JSONDecodeError) as e:
             logger.error(f"Invalid bind request payload: {e}")
 
-    def _handle_unbind(self, payload: str) -> None:  # noqa: PLR6301
+    def _send_bind_response(
+        self,
+        req_id: str,
+        sensor_id: int | None,
+        reply_to: tuple[str, bytes | None] | None,
+    ) -> None:
+        """
+        Answer a bind request on its reply topic(s) only.
+
+        Args:
+            req_id (str): The request id.
+            sensor_id (int | None): The new sensor id, or None on failure.
+            reply_to (tuple[str, bytes | None] | None): MQTT v5 Response
+                Topic and Correlation Data of the request.
+        """
+        response = messages.bind_response(req_id, sensor_id)
+        for topic, correlation_data in messages.bind_response_targets(
+            req_id,
+            self.bind_response_mode,
+            reply_to,
+        ):
+            self.publisher.publish(
+                topic,
+                response,
+                correlation_data=correlation_data,
+            )
+
+    def _handle_unbind(self, payload: str) -> None:
         """
         Handle unbind messages.
 
         Expected payload: {"id": str}
 
         Note: Unbind does NOT delete data from database.
-        All sensor data and measurements are preserved for historical records.
+        All sensor data and measurements are preserved for historical records;
+        the sensor is only dropped from the routing cache.
 
         Args:
             payload (str): JSON payload string.
         """
         try:
-            data = json.loads(payload)
-            sensor_id = int(data["id"])
+            sensor_id = messages.parse_unbind(payload)
+
+            self.sensor_cache.evict(sensor_id)
+            self.dedup.forget(sensor_id)
 
             # Log unbind event but preserve all data in database
             logger.info(
@@ -0,0 +1,66 @@
+"""
+Settings of the MQTT consumers.
+
+Both consumers (``PahoMQTTConsumer`` and ``AsyncMQTTConsumer``) take the
+broker address and their tuning knobs as one ``ConsumerSettings``. Knobs
+that only apply to one of them are ignored by the other.
+"""
+
+from dataclasses import dataclass
+
+from app.services.mqtt.ingestion_executor import BackpressurePolicy
+from app.services.mqtt.messages import BindResponseMode
+
+
+@dataclass(frozen=True)
+class ConsumerSettings:
+    """
+    Broker address and tuning knobs of an MQTT consumer.
+
+    Attributes:
+        broker_host (str): MQTT broker hostname.
+        broker_port (int): MQTT broker port.
+        flush_size (int): Number of buffered measurements that triggers a
+            bulk insert.
+        flush_interval (float): Maximum time in seconds a measurement waits
+            in the buffer before being written.
+        ingestion_workers (int): Worker threads processing messages off the
+            paho network thread. 0 processes messages inline (paho only).
+        max_concurrency (int): Maximum number of messages processed at the
+            same time (asyncio only).
+        queue_size (int): Maximum number of received messages waiting to be
+            processed (0 for unbounded with asyncio).
+        backpressure (BackpressurePolicy): What to do when the queue of the
+            worker pool is full (paho only).
+        spill_dir (str | None): Spill directory for the ``spill`` policy
+            (paho only).
+        shared_group (str | None): MQTT v5 shared subscription group.
+            Consumers in the same group split the messages between them
+            instead of each receiving a copy.
+        dedup_window (int): Recent sequence numbers remembered per sensor
+            to drop duplicated deliveries.
+        max_pending (int): Buffered measurements above which the buffer is
+            moved to the spool.
+        bind_batch_size (int): Maximum bind requests registered in one
+            transaction.
+        bind_window (float): Seconds to wait for more bind requests before
+            registering a batch.
+        bind_response_mode (BindResponseMode): Where bind requests without
+            an MQTT v5 Response Topic are answered.
+    """
+
+    broker_host: str = "localhost"
+    broker_port: int = 1883
+    flush_size: int = 100
+    flush_interval: float = 1.0
+    ingestion_workers: int = 4
+    max_concurrency: int = 64
+    queue_size: int = 1000
+    backpressure: BackpressurePolicy = BackpressurePolicy.BLOCK
+    spill_dir: str | None = None
+    shared_group: str | None = None
+    dedup_window: int = 1024
+    max_pending: int = 10000
+    bind_batch_size: int = 500
+    bind_window: float = 0.0
+    bind_response_mode: BindResponseMode = BindResponseMode.BOTH
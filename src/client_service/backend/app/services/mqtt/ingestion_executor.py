@@ -0,0 +1,404 @@
+"""
+Bounded worker pool for MQTT message processing.
+
+Decouples the paho network thread from JSON decoding and database work:
+messages are put on a bounded queue and processed by N worker threads.
+When the queue is full a backpressure policy decides what happens:
+
+- ``block``: the network thread waits for room (the broker buffers the rest)
+- ``drop_oldest``: the oldest queued message is discarded
+- ``spill``: the message is appended to a file on disk and re-queued later
+
+Every message carries the time it was received on the network thread, so
+measurements keep their arrival order even when workers finish out of order.
+"""
+
+import base64
+import datetime as dt
+import queue
+import threading
+import time
+from collections.abc import Callable
+from enum import Enum
+from pathlib import Path
+from typing import IO
+
+from app.config.timezone_config import SAO_PAULO_TZ
+from app.utils.directory_lock import lock_directory
+from app.utils.logger import logger
+
+MessageHandler = Callable[[str, bytes, dt.datetime], None]
+_QueueItem = tuple[str, bytes, dt.datetime, float]
+
+
+class BackpressurePolicy(str, Enum):
+    """What to do with a new message when the queue is full."""
+
+    BLOCK = "block"
+    DROP_OLDEST = "drop_oldest"
+    SPILL = "spill"
+
+
+class _TopicStats:
+    """Wait/processing time accumulators for one topic."""
+
+    __slots__ = (
+        "messages",
+        "processing_max",
+        "processing_total",
+        "wait_max",
+        "wait_total",
+    )
+
+    def __init__(self) -> None:
+        self.messages = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.processing_total = 0.0
+        self.processing_max = 0.0
+
+    def record(self, wait: float, processing: float) -> None:
+        self.messages += 1
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+        self.processing_total += processing
+        self.processing_max = max(self.processing_max, processing)
+
+    def as_dict(self) -> dict[str, float]:
+        count = self.messages or 1
+        return {
+            "messages": self.messages,
+            "wait_avg_ms": self.wait_total / count * 1000,
+            "wait_max_ms": self.wait_max * 1000,
+            "processing_avg_ms": self.processing_total / count * 1000,
+            "processing_max_ms": self.processing_max * 1000,
+        }
+
+
+class IngestionExecutor:
+    """Bounded queue + worker threads with a configurable overflow policy."""
+
+    SPILL_FILE = "spill.log"
+    SPILL_READING_FILE = "spill.reading"
+
+    def __init__(
+        self,
+        handler: MessageHandler,
+        workers: int = 4,
+        max_queue: int = 1000,
+        policy: BackpressurePolicy = BackpressurePolicy.BLOCK,
+        spill_dir: str | None = None,
+    ) -> None:
+        """
+        Initialize the executor.
+
+        Args:
+            handler (MessageHandler): Called as
+                ``handler(topic, payload, received_at)`` on a worker thread
+                for every message.
+            workers (int): Number of worker threads.
+            max_queue (int): Maximum number of queued messages.
+            policy (BackpressurePolicy): Behaviour when the queue is full.
+            spill_dir (str | None): Directory for the spill file, required
+                by the ``spill`` policy.
+
+        Raises:
+            ValueError: If the ``spill`` policy is used without spill_dir.
+        """
+        if policy == BackpressurePolicy.SPILL and not spill_dir:
+            raise ValueError("spill_dir is required by the spill policy")
+
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.max_queue = max(1, max_queue)
+        self.policy = policy
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        self._queue: queue.Queue[_QueueItem | None] = queue.Queue(
+            maxsize=self.max_queue,
+        )
+        self._threads: list[threading.Thread] = []
+        self._spill_thread: threading.Thread | None = None
+        self._spill_dir_lock: IO[bytes] | None = None
+        self._spill_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._stats_lock = threading.Lock()
+        self._topic_stats: dict[str, _TopicStats] = {}
+        self._max_depth = 0
+        self.dropped = 0
+        self.spilled = 0
+
+    def start(self) -> None:
+        """Start the worker threads (and the spill reader if needed)."""
+        if self._threads:
+            return
+
+        if self.spill_dir is not None:
+            # One process per directory: the spill file is not shared
+            self._spill_dir_lock = lock_directory(self.spill_dir)
+
+        self._stop_event.clear()
+        for index in range(self.workers):
+            thread = threading.Thread(
+                target=self._worker_loop,
+                name=f"ingestion-worker-{index}",
+                daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+
+        if self.spill_dir is not None:
+            self._spill_thread = threading.Thread(
+                target=self._spill_reader_loop,
+                name="ingestion-spill-reader",
+                daemon=True,
+            )
+            self._spill_thread.start()
+
+        logger.info(
+            f"[INGESTION] Started {self.workers} workers "
+            f"(max_queue={self.max_queue}, policy={self.policy.value})",
+        )
+
+    def stop(self) -> None:
+        """Process every queued message, then stop the workers."""
+        self._stop_event.set()
+        if self._spill_thread is not None:
+            self._spill_thread.join(timeout=5)
+            self._spill_thread = None
+
+        # One sentinel per worker, queued after the remaining messages
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout=10)
+        self._threads = []
+        if self._spill_dir_lock is not None:
+            self._spill_dir_lock.close()
+            self._spill_dir_lock = None
+        logger.info("[INGESTION] Workers stopped")
+
+    def submit(
+        self,
+        topic: str,
+        payload: bytes,
+        received_at: dt.datetime | None = None,
+    ) -> bool:
+        """
+        Queue a message for processing, applying the backpressure policy.
+
+        Args:
+            topic (str): The MQTT topic the message arrived on.
+            payload (bytes): The raw message payload.
+            received_at (datetime.datetime | None): When the message was
+                received. Defaults to now.
+
+        Returns:
+            bool: True if the message was queued (or spilled to disk),
+            False if it had to be discarded.
+        """
+        if received_at is None:
+            received_at = dt.datetime.now(SAO_PAULO_TZ)
+        item = (topic, payload, received_at, time.monotonic())
+
+        if self.policy == BackpressurePolicy.BLOCK:
+            self._queue.put(item)
+            self._track_depth()
+            return True
+
+        try:
+            self._queue.put_nowait(item)
+            self._track_depth()
+            return True
+        except queue.Full:
+            pass
+
+        if self.policy == BackpressurePolicy.SPILL:
+            return self._spill(topic, payload, received_at)
+
+        # DROP_OLDEST: make room by discarding the head of the queue
+        while True:
+            try:
+                self._queue.get_nowait()
+                with self._stats_lock:
+                    self.dropped += 1
+            except queue.Empty:
+                pass
+            try:
+                self._queue.put_nowait(item)
+                self._track_depth()
+                return True
+            except queue.Full:
+                continue
+
+    def stats(self) -> dict:
+        """
+        Get queue and per-topic timing statistics.
+
+        Returns:
+            dict: Queue depth, drop/spill counters and per-topic wait and
+            processing times.
+        """
+        with self._stats_lock:
+            return {
+                "workers": self.workers,
+                "policy": self.policy.value,
+                "max_queue": self.max_queue,
+                "queue_depth": self._queue.qsize(),
+                "max_queue_depth": self._max_depth,
+                "dropped": self.dropped,
+                "spilled": self.spilled,
+                "topics": {
+                    topic: stats.as_dict()
+                    for topic, stats in self._topic_stats.items()
+                },
+            }
+
+    def _track_depth(self) -> None:
+        depth = self._queue.qsize()
+        if depth > self._max_depth:
+            with self._stats_lock:
+                self._max_depth = max(self._max_depth, depth)
+
+    def _worker_loop(self) -> None:
+        """Take messages from the queue and run the handler."""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+
+            topic, payload, received_at, enqueued_at = item
+            started_at = time.monotonic()
+            try:
+                self.handler(topic, payload, received_at)
+            except Exception as e:
+                logger.error(f"[INGESTION] Error processing {topic}: {e}")
+            finished_at = time.monotonic()
+
+            with self._stats_lock:
+                stats = self._topic_stats.get(topic)
+                if stats is None:
+                    stats = self._topic_stats[topic] = _TopicStats()
+                stats.record(
+                    started_at - enqueued_at,
+                    finished_at - started_at,
+                )
+
+    def _spill(
+        self,
+        topic: str,
+        payload: bytes,
+        received_at: dt.datetime,
+    ) -> bool:
+        """
+        Append a message to the spill file.
+
+        Returns:
+            bool: True if the message was written, False otherwise.
+        """
+        encoded = base64.b64encode(payload).decode("ascii")
+        line = f"{topic}\t{received_at.isoformat()}\t{encoded}\n"
+        try:
+            with (
+                self._spill_lock,
+                (self.spill_dir / self.SPILL_FILE).open(
+                    "a",
+                    encoding="utf-8",
+                ) as spill,
+            ):
+                spill.write(line)
+        except OSError as e:
+            logger.error(f"[INGESTION] Failed to spill message: {e}")
+            with self._stats_lock:
+                self.dropped += 1
+            return False
+
+        with self._stats_lock:
+            self.spilled += 1
+        return True
+
+    def _spill_reader_loop(self) -> None:
+        """Move spilled messages back into the queue once it has room."""
+        spill_path = self.spill_dir / self.SPILL_FILE
+        reading_path = self.spill_dir / self.SPILL_READING_FILE
+
+        while not self._stop_event.wait(0.5):
+            if self._queue.qsize() > self.max_queue // 2:
+                continue
+
+            # Take ownership of the current spill file
+            if not reading_path.exists():
+                with self._spill_lock:
+                    if not spill_path.exists():
+                        continue
+                    spill_path.rename(reading_path)
+
+            self._requeue_spilled(reading_path)
+
+    def _requeue_spilled(self, reading_path: Path) -> None:
+        """Queue every message from a spill file and delete it."""
+        try:
+            lines = reading_path.read_text(encoding="utf-8").splitlines()
+        except OSError as e:
+            logger.error(f"[INGESTION] Failed to read spilled data: {e}")
+            return
+        try:
+            if self._requeue_lines(lines, reading_path):
+                reading_path.unlink()
+        except OSError as e:
+            logger.error(f"[INGESTION] Failed to re-queue spilled data: {e}")
+
+    def _requeue_lines(self, lines: list[str], reading_path: Path) -> bool:
+        """
+        Queue spilled lines, stopping early if the executor stops.
+
+        A line that cannot be parsed (e.g. torn by a crash while it was
+        written) is logged and skipped, so it never holds back the lines
+        after it nor makes the ones before it be queued again.
+
+        Returns:
+            bool: True if every line was queued, False if the rest was kept
+            in the spill file for the next start.
+        """
+        for index, line in enumerate(lines):
+            item = self._parse_spilled(line)
+            if item is None:
+                continue
+            while not self._stop_event.is_set():
+                try:
+                    self._queue.put(item, timeout=0.5)
+                    break
+                except queue.Full:
+                    continue
+            else:
+                # Stopping: keep what was not re-queued for the next start,
+                # replacing the file atomically so a crash cannot lose it
+                remaining = "".join(f"{rest}\n" for rest in lines[index:])
+                tmp_path = reading_path.with_suffix(".tmp")
+                tmp_path.write_text(remaining, encoding="utf-8")
+                tmp_path.replace(reading_path)
+                return False
+        return True
+
+    @staticmethod
+    def _parse_spilled(line: str) -> _QueueItem | None:
+        """
+        Parse a line of the spill file.
+
+        Returns:
+            _QueueItem | None: The queue item, or None if the line is
+            malformed.
+        """
+        try:
+            topic, received_at, encoded = line.split("\t")
+            return (
+                topic,
+                base64.b64decode(encoded, validate=True),
+                dt.datetime.fromisoformat(received_at),
+                time.monotonic(),
+            )
+        except ValueError as e:
+            logger.error(
+                f"[INGESTION] Skipped malformed spilled line {line[:80]!r}: "
+                f"{e}",
+            )
+            return None
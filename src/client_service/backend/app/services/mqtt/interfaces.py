@@ -25,7 +25,13 @@ class IMQTTPublisher(ABC):
         """Disconnect from the MQTT broker."""
 
     @abstractmethod
-    def publish(self, topic: str, payload: str, retained: bool = False) -> bool:
+    def publish(
+        self,
+        topic: str,
+        payload: str,
+        retained: bool = False,
+        correlation_data: bytes | None = None,
+    ) -> bool:
         """
         Publish a message to a topic.
 
@@ -33,6 +39,23 @@ class IMQTTPublisher(ABC):
             topic (str): The MQTT topic to publish to.
             payload (str): The message payload.
             retained (bool): Whether to retain the message on broker.
+            correlation_data (bytes | None): MQTT v5 Correlation Data of the
+                request being answered.
+
+        Returns:
+            bool: True if publish successful, False otherwise.
+        """
+
+    @abstractmethod
+    def publish_process_command(
+        self, command: str, retained: bool = False
+    ) -> bool:
+        """
+        Publish a process command to the sensors.
+
+        Args:
+            command (str): Command to send ("iniciar" or "finalizar").
+            retained (bool): Whether to retain the message on broker.
 
         Returns:
             bool: True if publish successful, False otherwise.
@@ -74,3 +97,12 @@ class IMQTTConsumer(ABC):
     @abstractmethod
     def stop(self) -> None:
         """Stop the consumer loop and cleanup resources."""
+
+    @abstractmethod
+    def stats(self) -> dict:
+        """
+        Get ingestion pipeline statistics.
+
+        Returns:
+            dict: Counters and timings of the consumer's ingestion pipeline.
+        """
@@ -0,0 +1,357 @@
+"""
+Buffered measurement writer used by the MQTT consumers.
+
+Measurements are gathered in memory and written to the database in bulk
+whenever the buffer reaches ``flush_size`` items or the oldest pending
+measurement is older than ``flush_interval`` seconds.
+
+With a spool configured, batches the database rejects are written to local
+disk and replayed later, and a buffer that grows past ``max_pending``
+because the database is slow hands its contents to the spool instead of
+growing without bound.
+"""
+
+import asyncio
+import contextlib
+import datetime as dt
+import threading
+import time
+
+from app.services.database.async_psg_client import AsyncPSGClient
+from app.services.database.base_client._dbclient import IDBClient
+from app.services.database.tables.measurements import PydanticMeasurement
+from app.services.mqtt import metrics
+from app.services.mqtt.measurement_spool import MeasurementSpool
+from app.utils.logger import logger
+
+
+def _arrival_order(measurement: PydanticMeasurement) -> dt.datetime:
+    return measurement.timestamp
+
+
+class MeasurementBuffer:
+    """Size/latency bounded buffer that flushes measurements in bulk."""
+
+    def __init__(
+        self,
+        db_client: IDBClient,
+        flush_size: int = 100,
+        flush_interval: float = 1.0,
+        spool: MeasurementSpool | None = None,
+        max_pending: int = 10000,
+    ) -> None:
+        """
+        Initialize the measurement buffer.
+
+        Args:
+            db_client (IDBClient): Database client used for bulk inserts.
+            flush_size (int): Number of pending measurements that triggers
+                a flush.
+            flush_interval (float): Maximum time in seconds a measurement
+                may wait in the buffer before being flushed.
+            spool (MeasurementSpool | None): Local spool for measurements
+                the database does not accept.
+            max_pending (int): Pending measurements above which the buffer
+                is moved to the spool (only with a spool).
+        """
+        self.db_client = db_client
+        self.flush_size = max(1, flush_size)
+        self.flush_interval = max(0.0, flush_interval)
+        self.spool = spool
+        self.max_pending = max(self.flush_size, max_pending)
+        self._pending: list[PydanticMeasurement] = []
+        self._oldest_at: float | None = None
+        self._condition = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def pending(self) -> int:
+        """Number of measurements waiting to be flushed."""
+        with self._condition:
+            return len(self._pending)
+
+    def start(self) -> None:
+        """Start the background flusher thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run_loop, daemon=True)
+        self._thread.start()
+        logger.info(
+            f"[MEASUREMENT-BUFFER] Started (flush_size={self.flush_size}, "
+            f"flush_interval={self.flush_interval}s)",
+        )
+
+    def stop(self) -> None:
+        """Stop the flusher thread and drain any pending measurements."""
+        self._stop_event.set()
+        with self._condition:
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+        # Drain whatever is left (also covers a buffer that never started)
+        self.flush()
+        logger.info("[MEASUREMENT-BUFFER] Stopped")
+
+    def add(self, measurement: PydanticMeasurement) -> None:
+        """
+        Queue a measurement for the next bulk insert.
+
+        Args:
+            measurement (PydanticMeasurement): The measurement to store.
+        """
+        overflow = None
+        with self._condition:
+            if not self._pending:
+                self._oldest_at = time.monotonic()
+            self._pending.append(measurement)
+            if (
+                self.spool is not None
+                and len(self._pending) >= self.max_pending
+            ):
+                # The flusher is stuck on a slow database
+                overflow = self._pending
+                self._pending = []
+                self._oldest_at = None
+            elif len(self._pending) >= self.flush_size:
+                self._condition.notify_all()
+
+        if overflow is not None:
+            self.spool.append(overflow)
+
+    def flush(self) -> bool:
+        """
+        Write all pending measurements to the database.
+
+        Returns:
+            bool: True if the buffer was empty or the measurements were
+            stored (or spooled), False otherwise.
+        """
+        with self._condition:
+            batch = self._pending
+            self._pending = []
+            self._oldest_at = None
+
+        if not batch:
+            return True
+
+        # Workers may finish out of order: insert in arrival order
+        batch.sort(key=_arrival_order)
+        return self.write(batch)
+
+    def write(self, batch: list[PydanticMeasurement]) -> bool:
+        """
+        Bulk insert measurements now, spooling them if the database fails.
+
+        Args:
+            batch (list[PydanticMeasurement]): The measurements to store.
+
+        Returns:
+            bool: True if the measurements were stored or spooled, False
+            otherwise.
+        """
+        if self.spool is not None and self.spool.pending:
+            # Still draining an outage: queue behind it to keep the order
+            return self.spool.append(batch)
+        started_at = time.perf_counter()
+        stored = self.db_client.add_new_measurements(batch)
+        metrics.COMMIT_SECONDS.observe(time.perf_counter() - started_at)
+        if stored:
+            metrics.MEASUREMENTS_STORED.inc(len(batch))
+            return True
+
+        logger.error(
+            f"[MEASUREMENT-BUFFER] Failed to flush {len(batch)} "
+            "measurements to database",
+        )
+        return self.spool is not None and self.spool.append(batch)
+
+    def _run_loop(self) -> None:
+        """Wait for a size or time threshold and flush the buffer."""
+        while not self._stop_event.is_set():
+            with self._condition:
+                timeout = self._time_until_due()
+                if timeout is None or timeout > 0:
+                    self._condition.wait(timeout)
+                due = len(self._pending) >= self.flush_size or (
+                    self._time_until_due() == 0
+                )
+            if due and not self._stop_event.is_set():
+                self.flush()
+
+    def _time_until_due(self) -> float | None:
+        """
+        Seconds until the oldest pending measurement must be flushed.
+
+        Must be called with the condition held.
+
+        Returns:
+            float | None: Remaining time (0 when due), or None if the buffer
+            is empty.
+        """
+        if self._oldest_at is None:
+            return None
+        elapsed = time.monotonic() - self._oldest_at
+        return max(0.0, self.flush_interval - elapsed)
+
+
+class AsyncMeasurementBuffer:
+    """asyncio counterpart of MeasurementBuffer for the asyncio consumer."""
+
+    def __init__(
+        self,
+        db_client: AsyncPSGClient,
+        flush_size: int = 100,
+        flush_interval: float = 1.0,
+        spool: MeasurementSpool | None = None,
+        max_pending: int = 10000,
+    ) -> None:
+        """
+        Initialize the measurement buffer.
+
+        Args:
+            db_client (AsyncPSGClient): Async database client used for bulk
+                inserts.
+            flush_size (int): Number of pending measurements that triggers
+                a flush.
+            flush_interval (float): Maximum time in seconds a measurement
+                may wait in the buffer before being flushed.
+            spool (MeasurementSpool | None): Local spool for measurements
+                the database does not accept.
+            max_pending (int): Pending measurements above which the buffer
+                is moved to the spool (only with a spool).
+        """
+        self.db_client = db_client
+        self.flush_size = max(1, flush_size)
+        self.flush_interval = max(0.0, flush_interval)
+        self.spool = spool
+        self.max_pending = max(self.flush_size, max_pending)
+        self._pending: list[PydanticMeasurement] = []
+        self._oldest_at: float | None = None
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+        # Overflows being written to the spool on worker threads
+        self._spooling: set[asyncio.Task] = set()
+
+    @property
+    def pending(self) -> int:
+        """Number of measurements waiting to be flushed."""
+        return len(self._pending)
+
+    def start(self) -> None:
+        """Start the flusher task on the running event loop."""
+        if self._task is not None and not self._task.done():
+            return
+        self._stopping = False
+        self._task = asyncio.get_running_loop().create_task(self._run_loop())
+
+    async def stop(self) -> None:
+        """Stop the flusher task and drain any pending measurements."""
+        if self._task is not None:
+            # Not cancelled: a flush in progress has taken the batch out of
+            # the buffer and would lose it, so the loop finishes it and exits
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await asyncio.gather(*self._spooling)
+        await self.flush()
+
+    def add(self, measurement: PydanticMeasurement) -> None:
+        """
+        Queue a measurement for the next bulk insert.
+
+        Args:
+            measurement (PydanticMeasurement): The measurement to store.
+        """
+        if not self._pending:
+            self._oldest_at = time.monotonic()
+            self._wakeup.set()
+        self._pending.append(measurement)
+        if self.spool is not None and len(self._pending) >= self.max_pending:
+            # The flusher is stuck on a slow database; the file writes run
+            # on a worker thread, off the event loop
+            overflow = self._pending
+            self._pending = []
+            self._oldest_at = None
+            task = asyncio.create_task(
+                asyncio.to_thread(self.spool.append, overflow),
+            )
+            self._spooling.add(task)
+            task.add_done_callback(self._spooling.discard)
+        elif len(self._pending) >= self.flush_size:
+            self._wakeup.set()
+
+    async def flush(self) -> bool:
+        """
+        Write all pending measurements to the database.
+
+        Returns:
+            bool: True if the buffer was empty or the measurements were
+            stored (or spooled), False otherwise.
+        """
+        batch = self._pending
+        self._pending = []
+        self._oldest_at = None
+        if not batch:
+            return True
+
+        # Tasks may finish out of order: insert in arrival order
+        batch.sort(key=_arrival_order)
+        return await self.write(batch)
+
+    async def write(self, batch: list[PydanticMeasurement]) -> bool:
+        """
+        Bulk insert measurements now, spooling them if the database fails.
+
+        Args:
+            batch (list[PydanticMeasurement]): The measurements to store.
+
+        Returns:
+            bool: True if the measurements were stored or spooled, False
+            otherwise.
+        """
+        if self.spool is not None and self.spool.pending:
+            # Still draining an outage: queue behind it to keep the order
+            return await asyncio.to_thread(self.spool.append, batch)
+        started_at = time.perf_counter()
+        stored = await self.db_client.add_new_measurements(batch)
+        metrics.COMMIT_SECONDS.observe(time.perf_counter() - started_at)
+        if stored:
+            metrics.MEASUREMENTS_STORED.inc(len(batch))
+            return True
+
+        logger.error(
+            f"[MEASUREMENT-BUFFER] Failed to flush {len(batch)} "
+            "measurements to database",
+        )
+        if self.spool is None:
+            return False
+        return await asyncio.to_thread(self.spool.append, batch)
+
+    async def _run_loop(self) -> None:
+        """Wait for a size or time threshold and flush the buffer."""
+        while not self._stopping:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+
+            # Wait until the oldest measurement is due or the batch is full
+            while (
+                self._pending
+                and len(self._pending) < self.flush_size
+                and not self._stopping
+            ):
+                remaining = self.flush_interval - (
+                    time.monotonic() - self._oldest_at
+                )
+                if remaining <= 0:
+                    break
+                with contextlib.suppress(TimeoutError):
+                    await asyncio.wait_for(self._wakeup.wait(), remaining)
+                self._wakeup.clear()
+
+            await self.flush()
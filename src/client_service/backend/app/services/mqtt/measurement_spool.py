@@ -0,0 +1,368 @@
+"""
+Local write-ahead spool for measurements the database did not accept.
+
+When a bulk insert fails (or the in-memory buffer grows past its limit
+because the database is slow), the measurements are appended to segment
+files on local disk instead of being dropped. A replayer thread drains the
+segments in bulk, oldest first, once the database accepts writes again.
+
+Records have a fixed size, so a segment is a plain array of structs that is
+read back through ``mmap`` and ``struct.iter_unpack``::
+
+    process_id uint32 | sensor_id uint32 | timestamp int64 | rh float64 |
+    soc float64 | seq int64 | has_seq uint8
+
+(timestamp in microseconds since the Unix epoch, little-endian throughout)
+
+Segments are named ``segment-<n>.spool``; the replay position is kept in a
+``cursor`` file, so a restart resumes where the previous run stopped. The
+directory belongs to one process (``lock_directory``) and must be on
+persistent storage.
+Delivery is at-least-once: a crash between an insert and the cursor update
+replays that batch again (readings with ``seq`` are then skipped, their
+pairs being already claimed in ``measurement_seqs``).
+
+Only database failures keep a batch at the head of the spool: readings the
+database rejects on their own are dropped by the client
+(``add_new_measurements``), so they cannot block the replay.
+"""
+
+import datetime as dt
+import mmap
+import os
+import struct
+import threading
+import time
+from pathlib import Path
+
+from app.config.timezone_config import SAO_PAULO_TZ
+from app.services.database.base_client._dbclient import IDBClient
+from app.services.database.tables.measurements import PydanticMeasurement
+from app.services.mqtt import metrics
+from app.utils.directory_lock import lock_directory
+from app.utils.logger import logger
+
+_RECORD = struct.Struct("<IIqddqB")
+_EPOCH = dt.datetime(1970, 1, 1, tzinfo=dt.UTC)
+
+
+def _encode(measurement: PydanticMeasurement) -> bytes:
+    timestamp = measurement.timestamp
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=SAO_PAULO_TZ)
+    return _RECORD.pack(
+        measurement.process_id,
+        measurement.sensor_id,
+        (timestamp - _EPOCH) // dt.timedelta(microseconds=1),
+        measurement.rh,
+        measurement.soc,
+        measurement.seq or 0,
+        measurement.seq is not None,
+    )
+
+
+def _decode(record: tuple) -> PydanticMeasurement:
+    process_id, sensor_id, micros, rh, soc, seq, has_seq = record
+    timestamp = _EPOCH + dt.timedelta(microseconds=micros)
+    return PydanticMeasurement(
+        process_id=process_id,
+        sensor_id=sensor_id,
+        rh=rh,
+        soc=soc,
+        timestamp=timestamp.astimezone(SAO_PAULO_TZ),
+        seq=seq if has_seq else None,
+    )
+
+
+class MeasurementSpool:
+    """Append-only segment files plus a background replayer thread."""
+
+    SEGMENT_PREFIX = "segment-"
+    SEGMENT_SUFFIX = ".spool"
+    CURSOR_FILE = "cursor"
+    # Seconds between replay attempts while the spool is empty or the
+    # database is healthy
+    REPLAY_INTERVAL = 1.0
+    MAX_BACKOFF = 30.0
+
+    def __init__(
+        self,
+        directory: str,
+        db_client: IDBClient,
+        segment_records: int = 65536,
+        replay_batch: int = 1000,
+        fsync: bool = False,
+    ) -> None:
+        """
+        Initialize the spool.
+
+        Args:
+            directory (str): Directory holding the segment files.
+            db_client (IDBClient): Database client the replayer writes to.
+            segment_records (int): Records per segment before a new one is
+                started.
+            replay_batch (int): Records written per bulk insert on replay.
+            fsync (bool): Whether to fsync every append (survives a host
+                crash, not only a process crash).
+        """
+        self.directory = Path(directory)
+        self.db_client = db_client
+        self.segment_records = max(1, segment_records)
+        self.replay_batch = max(1, replay_batch)
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+        # Segment number -> records written, oldest first
+        self._segments: dict[int, int] = {}
+        self._cursor = (0, 0)
+        self.spooled = 0
+        self.replayed = 0
+        self.replay_rate = 0.0
+        self.last_error: str | None = None
+
+        # One process per directory: the cursor and segments are not shared
+        self._directory_lock = lock_directory(self.directory)
+        self._load()
+
+    @property
+    def pending(self) -> int:
+        """Number of spooled records not replayed yet."""
+        with self._lock:
+            return self._pending_locked()
+
+    def start(self) -> None:
+        """Start the replayer thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._replay_loop,
+            name="measurement-spool-replayer",
+            daemon=True,
+        )
+        self._thread.start()
+        pending = self.pending
+        if pending:
+            logger.warning(
+                f"[SPOOL] {pending} measurements pending from a previous run",
+            )
+
+    def stop(self) -> None:
+        """Stop the replayer thread (spooled records stay on disk)."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def append(self, measurements: list[PydanticMeasurement]) -> bool:
+        """
+        Append measurements to the current segment.
+
+        Args:
+            measurements (list[PydanticMeasurement]): The measurements the
+                database did not accept.
+
+        Returns:
+            bool: True if every measurement was written to disk, False
+            otherwise.
+        """
+        try:
+            with self._lock:
+                self._append_locked(measurements)
+        except OSError as e:
+            logger.error(
+                f"[SPOOL] Failed to spool {len(measurements)} "
+                f"measurements: {e}",
+            )
+            return False
+
+        logger.debug(
+            "[SPOOL] Spooled %d measurements to disk",
+            len(measurements),
+        )
+        return True
+
+    def stats(self) -> dict:
+        """
+        Get spool statistics.
+
+        Returns:
+            dict: Pending records and bytes, segment count, totals spooled
+            and replayed, last replay throughput and last error.
+        """
+        with self._lock:
+            pending = self._pending_locked()
+            return {
+                "pending": pending,
+                "pending_bytes": pending * _RECORD.size,
+                "segments": len(self._segments),
+                "spooled": self.spooled,
+                "replayed": self.replayed,
+                "replay_rate": self.replay_rate,
+                "last_error": self.last_error,
+            }
+
+    def _append_locked(
+        self,
+        measurements: list[PydanticMeasurement],
+    ) -> None:
+        """Write measurements to the segments; the caller holds the lock."""
+        remaining = measurements
+        while remaining:
+            current = next(reversed(self._segments), None)
+            if (
+                current is None
+                or self._segments[current] >= self.segment_records
+            ):
+                current = 0 if current is None else current + 1
+                self._segments[current] = 0
+
+            room = self.segment_records - self._segments[current]
+            chunk, remaining = remaining[:room], remaining[room:]
+            path = self._segment_path(current)
+            with path.open("ab") as segment:
+                segment.write(b"".join(_encode(m) for m in chunk))
+                segment.flush()
+                if self.fsync:
+                    os.fsync(segment.fileno())
+            self._segments[current] += len(chunk)
+            self.spooled += len(chunk)
+
+    def _segment_path(self, number: int) -> Path:
+        return self.directory / (
+            f"{self.SEGMENT_PREFIX}{number:08d}{self.SEGMENT_SUFFIX}"
+        )
+
+    def _pending_locked(self) -> int:
+        if not self._segments:
+            return 0
+        return sum(self._segments.values()) - self._cursor[1]
+
+    def _load(self) -> None:
+        """Find existing segments and the saved replay position."""
+        numbers = sorted(
+            int(path.name[len(self.SEGMENT_PREFIX) : -len(self.SEGMENT_SUFFIX)])
+            for path in self.directory.glob(
+                f"{self.SEGMENT_PREFIX}*{self.SEGMENT_SUFFIX}",
+            )
+        )
+        # A record torn by a crash in the middle of a write is ignored
+        self._segments = {
+            number: self._segment_path(number).stat().st_size // _RECORD.size
+            for number in numbers
+        }
+
+        cursor_path = self.directory / self.CURSOR_FILE
+        if numbers and cursor_path.exists():
+            segment, offset = map(
+                int,
+                cursor_path.read_text(encoding="utf-8").split(),
+            )
+            if segment == numbers[0]:
+                self._cursor = (segment, offset)
+        if numbers and self._cursor[0] != numbers[0]:
+            self._cursor = (numbers[0], 0)
+
+    def _save_cursor(self) -> None:
+        """Persist the replay position atomically."""
+        cursor_path = self.directory / self.CURSOR_FILE
+        tmp_path = cursor_path.with_suffix(".tmp")
+        segment, offset = self._cursor
+        tmp_path.write_text(f"{segment} {offset}", encoding="utf-8")
+        tmp_path.replace(cursor_path)
+
+    def _read_batch(self) -> tuple[list[PydanticMeasurement], bool]:
+        """
+        Read the next records from the oldest segment.
+
+        Returns:
+            tuple[list[PydanticMeasurement], bool]: The records, and whether
+            they end a sealed segment (which can then be deleted).
+        """
+        with self._lock:
+            if not self._segments:
+                return [], False
+            segment, offset = self._cursor
+            is_active = segment == next(reversed(self._segments))
+            available = self._segments[segment]
+
+        count = min(self.replay_batch, available - offset)
+        if count <= 0:
+            return [], not is_active
+
+        with (
+            self._segment_path(segment).open("rb") as file,
+            mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped,
+        ):
+            start = offset * _RECORD.size
+            records = mapped[start : start + count * _RECORD.size]
+        measurements = [_decode(r) for r in _RECORD.iter_unpack(records)]
+        return measurements, not is_active and offset + count == available
+
+    def _advance(self, count: int, segment_done: bool) -> None:
+        """Move the cursor past replayed records."""
+        with self._lock:
+            segment, offset = self._cursor
+            if segment_done:
+                del self._segments[segment]
+                self._segment_path(segment).unlink(missing_ok=True)
+                self._cursor = (next(iter(self._segments)), 0)
+            elif (
+                offset + count
+                == self._segments[segment]
+                == sum(self._segments.values())
+            ):
+                # Caught up with the writer: start over with an empty spool
+                del self._segments[segment]
+                self._segment_path(segment).unlink(missing_ok=True)
+                self._cursor = (0, 0)
+            else:
+                self._cursor = (segment, offset + count)
+            self._save_cursor()
+
+    def _replay_loop(self) -> None:
+        """Drain the spool into the database, backing off on failures."""
+        delay = self.REPLAY_INTERVAL
+        while not self._stop_event.wait(delay):
+            try:
+                batch, segment_done = self._read_batch()
+            except (OSError, ValueError) as e:
+                logger.error(f"[SPOOL] Failed to read spool: {e}")
+                delay = min(delay * 2, self.MAX_BACKOFF)
+                continue
+
+            if not batch:
+                if segment_done:
+                    self._advance(0, segment_done=True)
+                    delay = 0.0
+                else:
+                    delay = self.REPLAY_INTERVAL
+                continue
+
+            started_at = time.monotonic()
+            # False only when the database failed: retried after a pause
+            if not self.db_client.add_new_measurements(batch):
+                self.last_error = "database insert failed"
+                delay = min(
+                    max(delay, self.REPLAY_INTERVAL) * 2,
+                    self.MAX_BACKOFF,
+                )
+                continue
+
+            elapsed = max(time.monotonic() - started_at, 1e-6)
+            metrics.COMMIT_SECONDS.observe(elapsed)
+            metrics.MEASUREMENTS_STORED.inc(len(batch))
+            self._advance(len(batch), segment_done)
+            self.replayed += len(batch)
+            self.replay_rate = len(batch) / elapsed
+            self.last_error = None
+            logger.info(
+                "[SPOOL] Replayed %d measurements (%.0f/s), %d pending",
+                len(batch),
+                self.replay_rate,
+                self.pending,
+            )
+            # Keep draining while there is a backlog
+            delay = 0.0
@@ -0,0 +1,420 @@
+"""
+MQTT topics and payload helpers shared by the MQTT consumers.
+
+Keeps the wire format (topic names and payloads) in one place so the paho
+and asyncio consumers behave identically.
+
+Measurements are accepted in two encodings on the same topic:
+
+- JSON: ``{"medicao": float, "id": str | int, "seq": int}``, decoded with
+  orjson when it is installed (``speedups`` extra) and the standard library
+  otherwise.
+- Binary v1: header byte ``0x01``, then the sensor id as a little-endian
+  uint32, the value as a little-endian float64 and optionally the sequence
+  number as a little-endian uint32 (13 or 17 bytes). A JSON payload never
+  starts with ``0x01``, so the header byte selects the decoder.
+
+``seq`` is an optional per-sensor sequence number used to drop duplicated
+deliveries (see ``sequence_dedup``).
+
+Sensors that buffer readings during deep sleep publish them together on
+``sensores/medicao/lote``. Each reading carries its age in milliseconds at
+publish time, so no clock synchronisation is needed on the device:
+
+- JSON: ``{"id": str | int, "leituras": [{"medicao": float,
+  "idade_ms": int, "seq": int}, ...]}``
+- Binary v2: header byte ``0x02``, uint32 sensor id, uint16 reading count,
+  then per reading a float64 value and a uint32 age in ms (little-endian).
+  Binary batches carry no sequence numbers.
+"""
+
+import datetime as dt
+import itertools
+import json
+import struct
+from enum import Enum
+
+from app.config.timezone_config import SAO_PAULO_TZ
+from app.services.database.tables.measurements import PydanticMeasurement
+
+# MQTT Topics
+TOPIC_MEASUREMENT = "sensores/medicao"
+TOPIC_MEASUREMENT_BATCH = "sensores/medicao/lote"
+TOPIC_BIND_REQUEST = "sensores/bind/request"
+TOPIC_BIND_RESPONSE = "sensores/bind/response"
+# Per-request reply topic: f"{TOPIC_BIND_RESPONSE}/{req_id}"
+TOPIC_BIND_RESPONSE_PREFIX = f"{TOPIC_BIND_RESPONSE}/"
+TOPIC_UNBIND = "sensores/bind/unbind"
+TOPIC_PROCESS = "sensores/processo"
+
+# Binary measurement encoding (header byte + struct body)
+MEASUREMENT_BINARY_V1 = 0x01
+_MEASUREMENT_V1 = struct.Struct("<Id")
+_MEASUREMENT_V1_SEQ = struct.Struct("<IdI")
+MEASUREMENT_BATCH_BINARY_V2 = 0x02
+_BATCH_V2_HEADER = struct.Struct("<IH")
+_BATCH_V2_READING = struct.Struct("<dI")
+
+# orjson.JSONDecodeError subclasses ValueError, like json's
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    from json import loads as _json_loads
+
+# Topics the ingestion consumers subscribe to
+CONSUMER_TOPICS = (
+    TOPIC_MEASUREMENT,
+    TOPIC_MEASUREMENT_BATCH,
+    TOPIC_BIND_REQUEST,
+    TOPIC_UNBIND,
+)
+
+
+def subscription(topic: str, shared_group: str | None = None) -> str:
+    """
+    Get the topic filter a consumer subscribes with.
+
+    With a shared group, the broker delivers each message to only one of the
+    consumers subscribed with that group (MQTT v5 shared subscription).
+
+    Args:
+        topic (str): The MQTT topic.
+        shared_group (str | None): Shared subscription group, or None to
+            receive every message.
+
+    Returns:
+        str: ``$share/<group>/<topic>`` or the topic itself.
+    """
+    if shared_group:
+        return f"$share/{shared_group}/{topic}"
+    return topic
+
+
+def parse_measurement(
+    payload: bytes | str,
+) -> tuple[int, float, int | None]:
+    """
+    Parse a measurement message in either encoding.
+
+    Expected payload: {"medicao": float, "id": str, "seq": int} or
+    binary v1. A JSON payload without a required field raises ``KeyError``.
+
+    Args:
+        payload (bytes | str): Raw payload (binary or JSON) or JSON string.
+
+    Returns:
+        tuple[int, float, int | None]: The sensor id, the measured value and
+        the sequence number (None if the sensor does not send one).
+
+    Raises:
+        ValueError: If the payload is malformed or a field has the wrong
+            type.
+    """
+    if payload[:1] == b"\x01":
+        if len(payload) == 1 + _MEASUREMENT_V1_SEQ.size:
+            return _MEASUREMENT_V1_SEQ.unpack_from(payload, 1)
+        if len(payload) != 1 + _MEASUREMENT_V1.size:
+            msg = (
+                f"Binary measurement must be {1 + _MEASUREMENT_V1.size} or "
+                f"{1 + _MEASUREMENT_V1_SEQ.size} bytes, got {len(payload)}"
+            )
+            raise ValueError(msg)
+        return (*_MEASUREMENT_V1.unpack_from(payload, 1), None)
+
+    data = _json_loads(payload)
+    sensor_id = data["id"]
+    if type(sensor_id) is not int:
+        sensor_id = int(sensor_id)
+    seq = data.get("seq")
+    return (
+        sensor_id,
+        float(data["medicao"]),
+        int(seq) if seq is not None else None,
+    )
+
+
+def encode_measurement(
+    sensor_id: int,
+    medicao: float,
+    seq: int | None = None,
+) -> bytes:
+    """
+    Encode a measurement in the binary v1 format.
+
+    A sensor id or seq that does not fit in a uint32 raises
+    ``struct.error``.
+
+    Args:
+        sensor_id (int): The id of the sensor (uint32).
+        medicao (float): The measured value.
+        seq (int | None): The sequence number (uint32), if any.
+
+    Returns:
+        bytes: The 13-byte payload, or 17 bytes with a sequence number.
+    """
+    header = bytes((MEASUREMENT_BINARY_V1,))
+    if seq is None:
+        return header + _MEASUREMENT_V1.pack(sensor_id, medicao)
+    return header + _MEASUREMENT_V1_SEQ.pack(sensor_id, medicao, seq)
+
+
+def parse_measurement_batch(
+    payload: bytes | str,
+) -> tuple[int, list[tuple[float, int, int | None]]]:
+    """
+    Parse a batch of buffered readings in either encoding.
+
+    A JSON payload without a required field raises ``KeyError``.
+
+    Args:
+        payload (bytes | str): Raw payload (binary v2 or JSON) or JSON
+            string.
+
+    Returns:
+        tuple[int, list[tuple[float, int, int | None]]]: The sensor id and
+        its readings as ``(medicao, idade_ms, seq)`` tuples.
+
+    Raises:
+        ValueError: If the payload is malformed, a field has the wrong type
+            or an age is negative.
+    """
+    if payload[:1] == b"\x02":
+        if len(payload) < 1 + _BATCH_V2_HEADER.size:
+            raise ValueError("Binary batch header is truncated")
+        sensor_id, count = _BATCH_V2_HEADER.unpack_from(payload, 1)
+        expected = 1 + _BATCH_V2_HEADER.size + count * _BATCH_V2_READING.size
+        if len(payload) != expected:
+            msg = (
+                f"Binary batch of {count} readings must be {expected} bytes, "
+                f"got {len(payload)}"
+            )
+            raise ValueError(msg)
+        readings = [
+            (medicao, age_ms, None)
+            for medicao, age_ms in _BATCH_V2_READING.iter_unpack(
+                payload[1 + _BATCH_V2_HEADER.size :],
+            )
+        ]
+        return sensor_id, readings
+
+    data = _json_loads(payload)
+    readings = [
+        (
+            float(reading["medicao"]),
+            int(reading["idade_ms"]),
+            int(reading["seq"]) if reading.get("seq") is not None else None,
+        )
+        for reading in data["leituras"]
+    ]
+    if any(age < 0 for _, age, _ in readings):
+        raise ValueError("idade_ms must not be negative")
+    return int(data["id"]), readings
+
+
+def encode_measurement_batch(
+    sensor_id: int,
+    readings: list[tuple[float, int]],
+) -> bytes:
+    """
+    Encode a batch of readings in the binary v2 format.
+
+    A value that does not fit its field raises ``struct.error``.
+
+    Args:
+        sensor_id (int): The id of the sensor (uint32).
+        readings (list[tuple[float, int]]): ``(medicao, idade_ms)`` pairs,
+            at most 65535.
+
+    Returns:
+        bytes: The encoded payload.
+    """
+    return b"".join((
+        bytes((MEASUREMENT_BATCH_BINARY_V2,)),
+        _BATCH_V2_HEADER.pack(sensor_id, len(readings)),
+        *itertools.starmap(_BATCH_V2_READING.pack, readings),
+    ))
+
+
+def parse_bind_request(payload: str | bytes) -> tuple[str, str]:
+    """
+    Parse a bind request message.
+
+    Expected payload: {"req_id": str, "nome": str}. A missing field raises
+    ``KeyError`` and invalid JSON ``ValueError``.
+
+    Args:
+        payload (str | bytes): JSON payload.
+
+    Returns:
+        tuple[str, str]: The request id and the sensor name.
+    """
+    data = json.loads(payload)
+    return data["req_id"], data["nome"]
+
+
+def parse_unbind(payload: str) -> int:
+    """
+    Parse an unbind message.
+
+    Expected payload: {"id": str}. A missing id raises ``KeyError``, invalid
+    JSON or an invalid id ``ValueError``.
+
+    Args:
+        payload (str): JSON payload string.
+
+    Returns:
+        int: The id of the sensor being unbound.
+    """
+    data = json.loads(payload)
+    return int(data["id"])
+
+
+class BindResponseMode(str, Enum):
+    """Where bind requests without an MQTT v5 Response Topic are answered."""
+
+    # Only the shared topic every waiting sensor listens to (old firmware)
+    LEGACY = "legacy"
+    # The per-request topic and the shared topic (migration)
+    BOTH = "both"
+    # Only sensores/bind/response/{req_id}
+    PER_REQUEST = "per_request"
+
+
+def bind_reply_to(properties: object) -> tuple[str, bytes | None] | None:
+    """
+    Get the MQTT v5 reply address of a bind request.
+
+    Args:
+        properties (object): The paho ``Properties`` of the message (None
+            for MQTT 3.1.1 messages).
+
+    Returns:
+        tuple[str, bytes | None] | None: The Response Topic and Correlation
+        Data, or None if the request has no Response Topic.
+    """
+    response_topic = getattr(properties, "ResponseTopic", None)
+    if not response_topic:
+        return None
+    return response_topic, getattr(properties, "CorrelationData", None)
+
+
+def bind_response_targets(
+    req_id: str,
+    mode: BindResponseMode,
+    reply_to: tuple[str, bytes | None] | None = None,
+) -> list[tuple[str, bytes | None]]:
+    """
+    Get the topics a bind response is published to.
+
+    A request published with an MQTT v5 Response Topic (under
+    ``sensores/bind/response/``) is answered there only, echoing its
+    Correlation Data. Other requests are answered according to ``mode``; a
+    ``req_id`` that is not a valid topic level falls back to the shared
+    topic.
+
+    Args:
+        req_id (str): The id of the bind request.
+        mode (BindResponseMode): Answer mode for requests without a
+            Response Topic.
+        reply_to (tuple[str, bytes | None] | None): MQTT v5 Response Topic
+            and Correlation Data of the request (see ``bind_reply_to``).
+
+    Returns:
+        list[tuple[str, bytes | None]]: (topic, correlation data) pairs.
+    """
+    if reply_to is not None and reply_to[0].startswith(
+        TOPIC_BIND_RESPONSE_PREFIX,
+    ):
+        return [reply_to]
+
+    targets: list[tuple[str, bytes | None]] = []
+    if (
+        mode is not BindResponseMode.LEGACY
+        and req_id
+        and not any(char in req_id for char in "/+#")
+    ):
+        targets.append((f"{TOPIC_BIND_RESPONSE_PREFIX}{req_id}", None))
+    if mode is not BindResponseMode.PER_REQUEST or not targets:
+        targets.append((TOPIC_BIND_RESPONSE, None))
+    return targets
+
+
+def bind_response(req_id: str, sensor_id: int | None) -> str:
+    """
+    Build a bind response message.
+
+    Args:
+        req_id (str): The id of the bind request being answered.
+        sensor_id (int | None): The assigned sensor id, or None on failure.
+
+    Returns:
+        str: JSON payload string.
+    """
+    return json.dumps({
+        "req_id": req_id,
+        "id": str(sensor_id) if sensor_id is not None else "",
+        "status": "ok" if sensor_id is not None else "fail",
+    })
+
+
+def build_measurement(
+    sensor_id: int,
+    process_id: int,
+    medicao: float,
+    received_at: dt.datetime | None = None,
+    seq: int | None = None,
+) -> PydanticMeasurement:
+    """
+    Build a measurement.
+
+    Args:
+        sensor_id (int): The id of the sensor.
+        process_id (int): The id of the process the sensor is bound to.
+        medicao (float): The measured value.
+        received_at (datetime.datetime | None): When the message was
+            received. Defaults to now.
+        seq (int | None): The sensor's sequence number, if any.
+
+    Returns:
+        PydanticMeasurement: The measurement to store.
+    """
+    return PydanticMeasurement(
+        process_id=process_id,
+        sensor_id=sensor_id,
+        rh=medicao,  # Using medicao as rh for now
+        soc=100.0,  # Default SOC, can be added to payload later
+        timestamp=received_at or dt.datetime.now(SAO_PAULO_TZ),
+        seq=seq,
+    )
+
+
+def build_batch_measurements(
+    sensor_id: int,
+    process_id: int,
+    readings: list[tuple[float, int, int | None]],
+    received_at: dt.datetime,
+) -> list[PydanticMeasurement]:
+    """
+    Build the measurements of a batch, oldest first.
+
+    Args:
+        sensor_id (int): The id of the sensor.
+        process_id (int): The id of the process the sensor is bound to.
+        readings (list[tuple[float, int, int | None]]):
+            ``(medicao, idade_ms, seq)`` tuples.
+        received_at (datetime.datetime): When the batch was received; each
+            reading is stamped ``idade_ms`` before it.
+
+    Returns:
+        list[PydanticMeasurement]: The measurements to store.
+    """
+    return [
+        build_measurement(
+            sensor_id,
+            process_id,
+            medicao,
+            received_at - dt.timedelta(milliseconds=age_ms),
+            seq,
+        )
+        for medicao, age_ms, seq in sorted(readings, key=lambda r: -r[1])
+    ]
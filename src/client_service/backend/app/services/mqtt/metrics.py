@@ -0,0 +1,40 @@
+"""
+Metrics of the MQTT ingestion pipeline (see ``app.utils.metrics``).
+
+Shared by the paho and asyncio implementations, so both report under the
+same names.
+"""
+
+from app.utils.metrics import Counter, Histogram
+
+MESSAGES_RECEIVED = Counter(
+    "estufa_mqtt_messages_received_total",
+    "MQTT messages received, per topic.",
+    ("topic",),
+)
+MESSAGES_DROPPED = Counter(
+    "estufa_mqtt_messages_dropped_total",
+    "MQTT messages discarded because the incoming queue was full, per topic.",
+    ("topic",),
+)
+DECODE_SECONDS = Histogram(
+    "estufa_mqtt_decode_seconds",
+    "Time to decode a measurement payload, per topic.",
+    ("topic",),
+)
+SENSOR_LOOKUP_SECONDS = Histogram(
+    "estufa_mqtt_sensor_lookup_seconds",
+    "Time to resolve the process of a sensor (cache or database).",
+)
+COMMIT_SECONDS = Histogram(
+    "estufa_db_commit_seconds",
+    "Time of a bulk measurement insert, including the commit.",
+)
+MEASUREMENTS_STORED = Counter(
+    "estufa_measurements_stored_total",
+    "Measurements written to the database by bulk inserts.",
+)
+PUBLISH_SECONDS = Histogram(
+    "estufa_mqtt_publish_seconds",
+    "Time to hand a message to the MQTT client for publishing.",
+)
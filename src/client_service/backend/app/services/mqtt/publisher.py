@@ -2,9 +2,15 @@
 MQTT Publisher implementation using paho-mqtt.
 """
 
+import time
+
 import paho.mqtt.client as mqtt
+from paho.mqtt.packettypes import PacketTypes
+from paho.mqtt.properties import Properties
 
+from app.services.mqtt import metrics
 from app.services.mqtt.interfaces import IMQTTPublisher
+from app.services.mqtt.messages import TOPIC_PROCESS
 from app.utils.logger import logger
 
 
@@ -21,7 +27,11 @@ class PahoMQTTPublisher(IMQTTPublisher):
         """
         self.broker_host = broker_host
         self.broker_port = broker_port
-        self.client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+        # MQTT v5 so responses can carry Correlation Data
+        self.client = mqtt.Client(
+            mqtt.CallbackAPIVersion.VERSION2,
+            protocol=mqtt.MQTTv5,
+        )
         self._connected = False
 
     def connect(self) -> bool:
@@ -53,7 +63,13 @@ class PahoMQTTPublisher(IMQTTPublisher):
             self._connected = False
             logger.info("MQTT Publisher disconnected")
 
-    def publish(self, topic: str, payload: str, retained: bool = False) -> bool:
+    def publish(
+        self,
+        topic: str,
+        payload: str,
+        retained: bool = False,
+        correlation_data: bytes | None = None,
+    ) -> bool:
         """
         Publish a message to a topic.
 
@@ -61,6 +77,8 @@ class PahoMQTTPublisher(IMQTTPublisher):
             topic (str): The MQTT topic to publish to.
             payload (str): The message payload.
             retained (bool): Whether to retain the message.
+            correlation_data (bytes | None): MQTT v5 Correlation Data of the
+                request being answered.
         Returns:
             bool: True if publish successful, False otherwise.
         """
@@ -68,16 +86,27 @@ class PahoMQTTPublisher(IMQTTPublisher):
             logger.error("Cannot publish: MQTT Publisher not connected")
             return False
 
+        properties = None
+        if correlation_data is not None:
+            properties = Properties(PacketTypes.PUBLISH)
+            properties.CorrelationData = correlation_data
+        started_at = time.perf_counter()
         try:
-            result = self.client.publish(topic, payload, retain=retained)
-            if result.rc == mqtt.MQTT_ERR_SUCCESS:
-                logger.info(f"Published to {topic}: {payload}")
-                return True
-            logger.error(f"Failed to publish to {topic}: {result.rc}")
-            return False
+            result = self.client.publish(
+                topic,
+                payload,
+                retain=retained,
+                properties=properties,
+            )
         except Exception as e:
             logger.error(f"Error publishing to {topic}: {e}")
             return False
+        metrics.PUBLISH_SECONDS.observe(time.perf_counter() - started_at)
+        if result.rc == mqtt.MQTT_ERR_SUCCESS:
+            logger.debug("Published to %s: %s", topic, payload)
+            return True
+        logger.error(f"Failed to publish to {topic}: {result.rc}")
+        return False
 
     def publish_process_command(
         self, command: str, retained: bool = False
@@ -91,4 +120,4 @@ class PahoMQTTPublisher(IMQTTPublisher):
         Returns:
             bool: True if publish successful, False otherwise.
         """
-        return self.publish("sensores/processo", command, retained=retained)
+        return self.publish(TOPIC_PROCESS, command, retained=retained)
@@ -0,0 +1,135 @@
+"""
+In-memory sensor → process routing cache.
+
+Keeps the ``sensor_registry`` mapping in memory so the measurement hot path
+does not need a database read per message. Misses fall back to the database
+and populate the cache.
+"""
+
+import threading
+
+from app.services.database.base_client._dbclient import IDBClient
+from app.utils.logger import logger
+
+
+class SensorCache:
+    """Thread-safe cache mapping sensor ids to their process id."""
+
+    def __init__(self, db_client: IDBClient) -> None:
+        """
+        Initialize the sensor cache.
+
+        Args:
+            db_client (IDBClient): Database client used to warm the cache
+                and to resolve misses.
+        """
+        self.db_client = db_client
+        self._process_by_sensor: dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def warm(self) -> int:
+        """
+        Load every registered sensor from the database.
+
+        Returns:
+            int: Number of sensors loaded.
+        """
+        sensors = self.db_client.get_all_sensors()
+        with self._lock:
+            self._process_by_sensor = {
+                s.sensor_id: s.process_id for s in sensors
+            }
+        logger.info(f"[SENSOR-CACHE] Warmed with {len(sensors)} sensors")
+        return len(sensors)
+
+    def get_process_id(self, sensor_id: int) -> int | None:
+        """
+        Resolve the process a sensor is bound to.
+
+        Args:
+            sensor_id (int): The id of the sensor.
+
+        Returns:
+            int | None: The process id, or None if the sensor is unknown.
+        """
+        process_id = self.lookup(sensor_id)
+        if process_id is not None:
+            return process_id
+
+        sensor = self.db_client.get_sensor_by_id(sensor_id)
+        if not sensor:
+            return None
+        self.put(sensor.sensor_id, sensor.process_id)
+        return sensor.process_id
+
+    def lookup(self, sensor_id: int) -> int | None:
+        """
+        Resolve a sensor from memory only, counting the hit or miss.
+
+        Used directly by callers that resolve misses themselves (e.g. with
+        an async database client).
+
+        Args:
+            sensor_id (int): The id of the sensor.
+
+        Returns:
+            int | None: The cached process id, or None on a miss.
+        """
+        with self._lock:
+            process_id = self._process_by_sensor.get(sensor_id)
+            if process_id is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+            return process_id
+
+    def put(self, sensor_id: int, process_id: int) -> None:
+        """
+        Add or update a sensor binding.
+
+        Args:
+            sensor_id (int): The id of the sensor.
+            process_id (int): The id of the process.
+        """
+        with self._lock:
+            self._process_by_sensor[sensor_id] = process_id
+
+    def evict(self, sensor_id: int) -> None:
+        """
+        Remove a sensor from the cache.
+
+        Args:
+            sensor_id (int): The id of the sensor.
+        """
+        with self._lock:
+            self._process_by_sensor.pop(sensor_id, None)
+
+    def evict_process(self, process_id: int) -> None:
+        """
+        Remove every sensor bound to a process.
+
+        Args:
+            process_id (int): The id of the process.
+        """
+        with self._lock:
+            self._process_by_sensor = {
+                sensor_id: pid
+                for sensor_id, pid in self._process_by_sensor.items()
+                if pid != process_id
+            }
+
+    def stats(self) -> dict[str, int]:
+        """
+        Get cache counters.
+
+        Returns:
+            dict[str, int]: Cache size, hits and misses.
+        """
+        with self._lock:
+            return {
+                "size": len(self._process_by_sensor),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -0,0 +1,147 @@
+"""
+Per-sensor sequence number deduplication.
+
+Sensors may send an optional ``seq`` with every reading. Retries after a
+missed ack and QoS 1 redeliveries repeat a ``seq`` that was just seen, so a
+small window of the most recent sequence numbers per sensor is enough to
+drop them without a database round trip. Older duplicates (or duplicates
+handled by another API replica) are dropped by the insert, which claims
+each ``(sensor_id, seq)`` pair in the ``measurement_seqs`` table (see
+``measurement_insert``).
+
+A sensor that reboots starts counting again, and a uint32 ``seq`` wraps
+around to zero. A ``seq`` more than the window size below the highest one
+seen for the sensor is therefore taken as the start of a new epoch rather
+than as a duplicate: the reading is accepted and, once remembered, replaces
+the sensor's window. The insert applies the same rule to the stored pairs
+(``SEQ_RESET_GAP``).
+
+A sequence number is checked (``seen``) when the reading arrives but only
+remembered (``remember``) once the reading was buffered or stored: a
+reading dropped before that (unknown sensor, failed insert) must not make
+its retry look like a duplicate.
+"""
+
+import threading
+from collections import deque
+
+
+class _SensorWindow:
+    """The most recent sequence numbers of one sensor."""
+
+    __slots__ = ("high", "order", "seen")
+
+    def __init__(self, size: int) -> None:
+        self.order: deque[int] = deque(maxlen=size)
+        self.seen: set[int] = set()
+        self.high = 0
+
+
+class SequenceDeduplicator:
+    """Thread-safe bounded window of recent sequence numbers per sensor."""
+
+    def __init__(self, window: int = 1024) -> None:
+        """
+        Initialize the deduplicator.
+
+        Args:
+            window (int): Sequence numbers remembered per sensor.
+        """
+        self.window = max(1, window)
+        self._sensors: dict[int, _SensorWindow] = {}
+        self._lock = threading.Lock()
+        self.checked = 0
+        self.duplicates = 0
+        self.resets = 0
+
+    def _is_reset(self, window: _SensorWindow, seq: int) -> bool:
+        """
+        Check whether a sequence number starts a new epoch of the sensor.
+
+        Args:
+            window (_SensorWindow): The window of the sensor.
+            seq (int): The sequence number of the reading.
+
+        Returns:
+            bool: True if ``seq`` is more than the window size below the
+            highest sequence number of the window.
+        """
+        return seq < window.high - self.window
+
+    def seen(self, sensor_id: int, seq: int) -> bool:
+        """
+        Check whether a reading was already accepted.
+
+        Args:
+            sensor_id (int): The id of the sensor.
+            seq (int): The sequence number of the reading.
+
+        Returns:
+            bool: True if the sequence number is in the sensor's window
+            (the reading must be dropped), False otherwise (also when it
+            starts a new epoch).
+        """
+        with self._lock:
+            self.checked += 1
+            window = self._sensors.get(sensor_id)
+            if (
+                window is not None
+                and seq in window.seen
+                and not self._is_reset(window, seq)
+            ):
+                self.duplicates += 1
+                return True
+            return False
+
+    def remember(self, sensor_id: int, seq: int) -> None:
+        """
+        Add the sequence number of an accepted reading to the window.
+
+        A sequence number that starts a new epoch replaces the window.
+
+        Args:
+            sensor_id (int): The id of the sensor.
+            seq (int): The sequence number of the reading.
+        """
+        with self._lock:
+            window = self._sensors.get(sensor_id)
+            if window is not None and self._is_reset(window, seq):
+                self.resets += 1
+                window = None
+            if window is None:
+                window = self._sensors[sensor_id] = _SensorWindow(self.window)
+            elif seq in window.seen:
+                return
+
+            window.high = max(window.high, seq)
+            if len(window.order) == self.window:
+                window.seen.discard(window.order[0])
+            window.order.append(seq)
+            window.seen.add(seq)
+
+    def forget(self, sensor_id: int) -> None:
+        """
+        Drop the window of a sensor (e.g. after it is unbound).
+
+        Args:
+            sensor_id (int): The id of the sensor.
+        """
+        with self._lock:
+            self._sensors.pop(sensor_id, None)
+
+    def stats(self) -> dict[str, int]:
+        """
+        Get deduplication counters.
+
+        Returns:
+            dict[str, int]: Window size, tracked sensors, checked readings,
+            dropped duplicates and sequence resets.
+        """
+        with self._lock:
+            return {
+                "window": self.window,
+                "sensors": len(self._sensors),
+                "checked": self.checked,
+                "duplicates": self.duplicates,
+                "resets": self.resets,
+            }
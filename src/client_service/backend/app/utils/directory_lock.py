@@ -0,0 +1,50 @@
+"""
+Exclusive ownership of a local data directory.
+
+The measurement spool and the ingestion spill file keep their state
+(segments, replay cursor, spilled messages) in a directory. Two API
+processes sharing it would replay the same records twice and overwrite
+each other's cursor, so each one takes an ``flock`` on a lock file in the
+directory and refuses to start if another process holds it. The lock is
+released by the kernel when the process exits, also after a crash.
+"""
+
+from pathlib import Path
+from typing import IO
+
+try:
+    import fcntl
+except ImportError:
+    # No flock (Windows): the directory is not protected
+    fcntl = None
+
+LOCK_FILE = ".lock"
+
+
+def lock_directory(directory: Path) -> IO[bytes]:
+    """
+    Take the exclusive lock of a data directory.
+
+    Args:
+        directory (Path): The directory (created if missing).
+
+    Returns:
+        IO[bytes]: The open lock file; the lock lasts until it is closed.
+
+    Raises:
+        RuntimeError: If another process holds the lock.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    lock_file = (directory / LOCK_FILE).open("ab")
+    if fcntl is None:
+        return lock_file
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock_file.close()
+        msg = (
+            f"{directory} is used by another process: give each API "
+            "instance its own directory"
+        )
+        raise RuntimeError(msg) from None
+    return lock_file
@@ -0,0 +1,103 @@
+"""
+Largest-Triangle-Three-Buckets downsampling of measurement series.
+
+LTTB keeps the first and last point and, from each of ``max_points - 2``
+equal buckets in between, the point forming the largest triangle with the
+point kept from the previous bucket and the average of the next bucket.
+Unlike averaging or taking every n-th point, peaks and valleys survive,
+so a chart of a few thousand points looks like the full series.
+"""
+
+from collections import defaultdict
+
+import numpy as np
+
+from app.services.database.tables.measurements import PydanticMeasurement
+
+# First point, last point and one bucket
+MIN_POINTS = 3
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Select the points of a series to keep.
+
+    The bucket averages and every triangle area of a bucket are computed
+    with array operations; only the walk over the buckets, where each
+    choice depends on the previous one, is a Python loop.
+
+    Args:
+        x (np.ndarray): Increasing x values (e.g. timestamps in seconds).
+        y (np.ndarray): Values of the series.
+        max_points (int): Number of points to keep (at least 3).
+
+    Returns:
+        np.ndarray: Increasing indices of the points kept (all of them when
+        the series has at most ``max_points`` points).
+    """
+    n = len(x)
+    if n <= max_points or max_points < MIN_POINTS:
+        return np.arange(n)
+
+    buckets = max_points - 2
+    # Bucket i is [edges[i], edges[i + 1]), between the first and last point
+    edges = np.linspace(1, n - 1, buckets + 1).astype(np.intp)
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x[: n - 1], edges[:-1]) / counts
+    avg_y = np.add.reduceat(y[: n - 1], edges[:-1]) / counts
+    # The last bucket looks ahead to the last point
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+
+    selected = np.empty(max_points, dtype=np.intp)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(buckets):
+        start, end = edges[i], edges[i + 1]
+        ax, ay = x[a], y[a]
+        # Twice the area of the triangles (a, candidate, next average)
+        areas = np.abs(
+            (ax - next_x[i]) * (y[start:end] - ay)
+            - (ax - x[start:end]) * (next_y[i] - ay),
+        )
+        a = start + int(np.argmax(areas))
+        selected[i + 1] = a
+    return selected
+
+
+def downsample_measurements(
+    measurements: list[PydanticMeasurement],
+    max_points: int,
+) -> list[PydanticMeasurement]:
+    """
+    Downsample the relative humidity series of each sensor with LTTB.
+
+    Args:
+        measurements (list[PydanticMeasurement]): Measurements of one or
+            more sensors, in any order.
+        max_points (int): Maximum measurements kept per sensor.
+
+    Returns:
+        list[PydanticMeasurement]: The measurements kept, by sensor and in
+        time order. Each one is a stored measurement, not an average.
+    """
+    by_sensor: dict[int, list[PydanticMeasurement]] = defaultdict(list)
+    for measurement in measurements:
+        by_sensor[measurement.sensor_id].append(measurement)
+
+    downsampled: list[PydanticMeasurement] = []
+    for sensor_id in sorted(by_sensor):
+        series = sorted(by_sensor[sensor_id], key=lambda m: m.timestamp)
+        x = np.fromiter(
+            (m.timestamp.timestamp() for m in series),
+            dtype=np.float64,
+            count=len(series),
+        )
+        y = np.fromiter(
+            (m.rh for m in series),
+            dtype=np.float64,
+            count=len(series),
+        )
+        downsampled += [series[i] for i in lttb_indices(x, y, max_points)]
+    return downsampled
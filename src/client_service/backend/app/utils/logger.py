@@ -1,7 +1,30 @@
+import atexit
 import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+
+# Writer threads of the queue mode, stopped by ``stop_logging``
+_listeners: list[logging.handlers.QueueListener] = []
 
 
 def get_logger(name: str = "estufa") -> logging.Logger:
+    """
+    Get the application logger.
+
+    ``LOG_LEVEL`` sets the level (``INFO`` by default). ``LOG_MODE=queue``
+    (the default) only puts records on an in-memory queue in the calling
+    thread; a ``QueueListener`` thread formats and writes them to stderr.
+    ``LOG_MODE=sync`` writes from the calling thread.
+
+    Args:
+        name (str): The logger name.
+
+    Returns:
+        logging.Logger: The configured logger.
+    """
     logger = logging.getLogger(name)
     if not logger.hasHandlers():
         handler = logging.StreamHandler()
@@ -9,9 +32,88 @@ def get_logger(name: str = "estufa") -> logging.Logger:
             "[%(asctime)s] %(levelname)s %(name)s: %(message)s",
         )
         handler.setFormatter(formatter)
-        logger.addHandler(handler)
-    logger.setLevel(logging.INFO)
+
+        if os.getenv("LOG_MODE", "queue") == "queue":
+            log_queue: queue.SimpleQueue = queue.SimpleQueue()
+            listener = logging.handlers.QueueListener(log_queue, handler)
+            listener.start()
+            _listeners.append(listener)
+            atexit.register(stop_logging)
+            logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        else:
+            logger.addHandler(handler)
+    logger.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
     return logger
 
 
+def stop_logging() -> None:
+    """Write the queued records and stop the background log writer."""
+    while _listeners:
+        _listeners.pop().stop()
+
+
+class RateSummary:
+    """Counts events per key and logs one summary line per interval.
+
+    Replaces per-message INFO logs on hot paths: ``record`` only bumps a
+    counter, and at most once per ``interval`` seconds a line with the
+    count and rate for each key is logged.
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        prefix: str,
+        interval: float | None = None,
+    ) -> None:
+        """
+        Initialize the summary.
+
+        Args:
+            logger (logging.Logger): Logger the summaries are written to.
+            prefix (str): Prefix of every summary line.
+            interval (float | None): Seconds between summaries. Defaults to
+                ``LOG_SUMMARY_INTERVAL`` (10s); 0 disables them.
+        """
+        if interval is None:
+            interval = float(os.getenv("LOG_SUMMARY_INTERVAL", "10"))
+        self.logger = logger
+        self.prefix = prefix
+        self.interval = interval
+        self._counts: dict[str, int] = {}
+        self._started_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record(self, key: str) -> None:
+        """
+        Count one event and log the summary if the interval has elapsed.
+
+        Args:
+            key (str): What the event is counted under (e.g. the topic).
+        """
+        if self.interval <= 0:
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            self._counts[key] = self._counts.get(key, 0) + 1
+            elapsed = now - self._started_at
+            if elapsed < self.interval:
+                return
+            counts = self._counts
+            self._counts = {}
+            self._started_at = now
+
+        if self.logger.isEnabledFor(logging.INFO):
+            for counted_key, count in counts.items():
+                self.logger.info(
+                    "%s %s: %d msgs in %.1fs (%.1f msgs/s)",
+                    self.prefix,
+                    counted_key,
+                    count,
+                    elapsed,
+                    count / elapsed,
+                )
+
+
 logger = get_logger()
@@ -0,0 +1,235 @@
+"""
+Encodings of measurement rows: JSON, and NDJSON, CSV and Arrow for streaming.
+
+The measurement endpoints pick an encoding from the ``Accept`` header and
+send the rows of a server-side cursor one batch at a time, so memory use
+does not grow with the number of readings. Each batch is encoded straight
+from the database rows, without a model per reading.
+
+The JSON list of the default response is also encoded from the rows
+(``encode_json``): building a model per reading and having FastAPI
+validate and serialize the list costs several times more than the query.
+
+JSON objects have the fields of ``PydanticMeasurement``; the CSV has a
+header line with the same names. Timestamps are ISO 8601.
+
+The Arrow IPC stream (``arrow`` extra, pyarrow) is columnar: one record
+batch per batch of rows, which clients map to arrays without parsing.
+``timestamp`` is a ``timestamp[us]`` (int64) of the stored São Paulo local
+time, ``rh`` and ``soc`` are float32. Without pyarrow the media type is
+not offered and such requests get the JSON list.
+"""
+
+import csv
+import io
+import json
+from collections.abc import AsyncGenerator, AsyncIterator, Callable, Sequence
+from typing import Any
+
+from app.services.database.measurement_queries import MEASUREMENT_FIELDS
+from app.services.database.tables.measurements import PydanticMeasurement
+
+MEDIA_TYPE_NDJSON = "application/x-ndjson"
+MEDIA_TYPE_CSV = "text/csv"
+MEDIA_TYPE_ARROW = "application/vnd.apache.arrow.stream"
+
+FIELDS = MEASUREMENT_FIELDS
+_TIMESTAMP = FIELDS.index("timestamp")
+
+try:
+    from orjson import dumps as _json_dumps
+except ImportError:
+
+    def _json_dumps(obj: object) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode()
+
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+
+def _values(row: Sequence[Any]) -> list[Any]:
+    values = list(row)
+    values[_TIMESTAMP] = values[_TIMESTAMP].isoformat()
+    return values
+
+
+def encode_json(rows: Sequence[Sequence[Any]]) -> bytes:
+    """
+    Encode rows as a JSON list of objects.
+
+    Args:
+        rows (Sequence[Sequence[Any]]): Rows with the values of ``FIELDS``.
+
+    Returns:
+        bytes: The list, as ``list[PydanticMeasurement]`` would be.
+    """
+    return _json_dumps([
+        dict(zip(FIELDS, _values(row), strict=True)) for row in rows
+    ])
+
+
+def encode_ndjson(rows: Sequence[Sequence[Any]]) -> bytes:
+    """
+    Encode rows as JSON objects, one per line.
+
+    Args:
+        rows (Sequence[Sequence[Any]]): Rows with the values of ``FIELDS``.
+
+    Returns:
+        bytes: The lines, each ending with a newline.
+    """
+    return b"".join(
+        _json_dumps(dict(zip(FIELDS, _values(row), strict=True))) + b"\n"
+        for row in rows
+    )
+
+
+def encode_csv(rows: Sequence[Sequence[Any]]) -> bytes:
+    """
+    Encode rows as CSV lines (``None`` becomes an empty field).
+
+    Args:
+        rows (Sequence[Sequence[Any]]): Rows with the values of ``FIELDS``.
+
+    Returns:
+        bytes: The lines, without the header.
+    """
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(_values(row) for row in rows)
+    return buffer.getvalue().encode()
+
+
+ENCODERS: dict[str, Callable[[Sequence[Sequence[Any]]], bytes]] = {
+    MEDIA_TYPE_NDJSON: encode_ndjson,
+    MEDIA_TYPE_CSV: encode_csv,
+}
+
+# Sent before the first batch and after the last one
+_HEADERS = {MEDIA_TYPE_CSV: (",".join(FIELDS) + "\r\n").encode()}
+_TRAILERS: dict[str, bytes] = {}
+
+if pa is not None:
+    ARROW_SCHEMA = pa.schema([
+        ("id", pa.int64()),
+        ("process_id", pa.int32()),
+        ("sensor_id", pa.int32()),
+        ("rh", pa.float32()),
+        ("soc", pa.float32()),
+        ("timestamp", pa.timestamp("us")),
+        ("seq", pa.int64()),
+    ])
+
+    def encode_arrow(rows: Sequence[Sequence[Any]]) -> bytes:
+        """
+        Encode rows as one Arrow IPC record batch message.
+
+        Args:
+            rows (Sequence[Sequence[Any]]): Rows with the values of
+                ``FIELDS``.
+
+        Returns:
+            bytes: The message, to follow the schema in an IPC stream.
+        """
+        if not rows:
+            return b""
+        columns = zip(*rows, strict=True)
+        batch = pa.record_batch(
+            [
+                pa.array(values, type=field.type)
+                for values, field in zip(columns, ARROW_SCHEMA, strict=True)
+            ],
+            schema=ARROW_SCHEMA,
+        )
+        return batch.serialize().to_pybytes()
+
+    ENCODERS[MEDIA_TYPE_ARROW] = encode_arrow
+    _HEADERS[MEDIA_TYPE_ARROW] = ARROW_SCHEMA.serialize().to_pybytes()
+    # End-of-stream marker: continuation token and a zero length
+    _TRAILERS[MEDIA_TYPE_ARROW] = b"\xff\xff\xff\xff\x00\x00\x00\x00"
+
+# Extra media types of the measurement endpoints, for the OpenAPI schema
+STREAM_RESPONSES: dict[int | str, dict[str, Any]] = {
+    200: {"content": {media_type: {} for media_type in ENCODERS}},
+}
+
+
+def negotiate_media_type(accept: str | None) -> str | None:
+    """
+    Pick the streaming encoding of a request.
+
+    Args:
+        accept (str | None): The ``Accept`` header.
+
+    Returns:
+        str | None: The first media type of the header that has an
+        encoder, or None for the JSON list response.
+    """
+    if not accept:
+        return None
+    for part in accept.split(","):
+        media_type = part.split(";", 1)[0].strip().lower()
+        if media_type in ENCODERS:
+            return media_type
+    return None
+
+
+async def encode_stream(
+    batches: AsyncGenerator[Sequence[Sequence[Any]]],
+    media_type: str,
+) -> AsyncIterator[bytes]:
+    """
+    Encode batches of rows as they arrive.
+
+    ``batches`` is closed when the response ends, also when the client
+    disconnects halfway, so the cursor behind it releases its connection
+    right away instead of when the generator is garbage collected.
+
+    Args:
+        batches (AsyncGenerator[Sequence[Sequence[Any]]]): Batches of rows
+            with the values of ``FIELDS`` (e.g. from
+            ``stream_measurements``).
+        media_type (str): A media type of ``ENCODERS``.
+
+    Yields:
+        bytes: The body of the response, one chunk per batch.
+    """
+    encode = ENCODERS[media_type]
+    if media_type in _HEADERS:
+        yield _HEADERS[media_type]
+    try:
+        async for rows in batches:
+            yield encode(rows)
+    finally:
+        await batches.aclose()
+    if media_type in _TRAILERS:
+        yield _TRAILERS[media_type]
+
+
+def encode_measurements(
+    measurements: list[PydanticMeasurement],
+    media_type: str,
+) -> bytes:
+    """
+    Encode measurements already in memory as a whole body.
+
+    Used for downsampled series, which are computed before encoding.
+
+    Args:
+        measurements (list[PydanticMeasurement]): The measurements.
+        media_type (str): A media type of ``ENCODERS``.
+
+    Returns:
+        bytes: The body of the response.
+    """
+    rows = [
+        tuple(getattr(measurement, field) for field in FIELDS)
+        for measurement in measurements
+    ]
+    return (
+        _HEADERS.get(media_type, b"")
+        + ENCODERS[media_type](rows)
+        + _TRAILERS.get(media_type, b"")
+    )
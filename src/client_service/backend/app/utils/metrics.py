@@ -0,0 +1,373 @@
+"""
+Minimal in-process metrics in the Prometheus text exposition format.
+
+Counters, gauges and histograms are module-level objects registered in
+``REGISTRY`` when they are created; ``REGISTRY.render()`` produces the body
+served by ``GET /metrics``.
+
+Recording is kept cheap for the ingestion hot path: a labelled child is
+resolved once (``metric.labels(...)``, a dict lookup) and then ``inc`` or
+``observe`` is an uncontended lock plus an addition (and a ``bisect`` over
+the bucket bounds for histograms). Formatting only happens on scrape.
+Gauges can also read their value from a callback at scrape time, so state
+that already exists elsewhere (e.g. connection pool counters) costs nothing
+between scrapes.
+"""
+
+import math
+import threading
+from bisect import bisect_left
+from collections.abc import Callable, Iterator
+
+from app.utils.logger import logger
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds, from sub-millisecond decodes to slow database commits
+DEFAULT_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+_LABEL_ESCAPES = str.maketrans({"\\": "\\\\", '"': '\\"', "\n": "\\n"})
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{value.translate(_LABEL_ESCAPES)}"'
+        for name, value in zip(names, values, strict=True)
+    )
+    return "{" + pairs + "}"
+
+
+class _CounterValue:
+    __slots__ = ("_lock", "value")
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class _GaugeValue:
+    __slots__ = ("_function", "_lock", "_value")
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._value = 0.0
+        self._function: Callable[[], float] | None = None
+
+    @property
+    def value(self) -> float:
+        function = self._function
+        if function is not None:
+            return float(function())
+        return self._value
+
+    def set(self, value: float) -> None:
+        with self._lock:
+            self._value = float(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value -= amount
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self._function = function
+
+
+class _HistogramValue:
+    __slots__ = ("_bounds", "_counts", "_lock", "_sum")
+
+    def __init__(self, bounds: tuple[float, ...]) -> None:
+        self._lock = threading.Lock()
+        self._bounds = bounds
+        # One slot per bound plus the +Inf bucket (not cumulative)
+        self._counts = [0] * (len(bounds) + 1)
+        self._sum = 0.0
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self._bounds, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def snapshot(self) -> tuple[list[int], float]:
+        with self._lock:
+            return list(self._counts), self._sum
+
+
+class _Metric:
+    """A named metric family with one child per label value combination."""
+
+    TYPE = ""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        registry: "MetricsRegistry | None" = None,
+    ) -> None:
+        """
+        Initialize the metric and register it.
+
+        Args:
+            name (str): Metric name (e.g. ``estufa_mqtt_messages_total``).
+            documentation (str): Help text shown in the exposition.
+            labelnames (tuple[str, ...]): Label names, in order.
+            registry (MetricsRegistry | None): Registry to add the metric
+                to. Defaults to ``REGISTRY``.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def labels(self, *values: object) -> object:
+        """
+        Get the child for a label value combination.
+
+        Resolve children once and keep them on hot paths; the lookup itself
+        is a dict access.
+
+        Args:
+            *values (object): One value per label name (converted to str).
+
+        Returns:
+            object: The child, with the recording methods of the metric.
+
+        Raises:
+            ValueError: If the number of values does not match the labels.
+        """
+        child = self._children.get(values)
+        if child is not None:
+            return child
+        key = tuple(str(value) for value in values)
+        if len(key) != len(self.labelnames):
+            msg = f"{self.name} expects labels {self.labelnames}, got {key}"
+            raise ValueError(msg)
+        with self._lock:
+            return self._children.setdefault(key, self._new_child())
+
+    def _default(self) -> object:
+        """
+        Get the child of a metric without labels.
+
+        Returns:
+            object: The only child of the metric.
+        """
+        return self.labels()
+
+    def _new_child(self) -> object:
+        raise NotImplementedError
+
+    def _items(self) -> list[tuple[tuple[str, ...], object]]:
+        with self._lock:
+            return list(self._children.items())
+
+    def collect(self) -> Iterator[str]:
+        """
+        Render the metric family.
+
+        Yields:
+            str: Exposition format lines.
+        """
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.TYPE}"
+        yield from self._samples()
+
+    def _samples(self) -> Iterator[str]:
+        for values, child in self._items():
+            labels = _format_labels(self.labelnames, values)
+            yield f"{self.name}{labels} {_format_value(child.value)}"
+
+
+class Counter(_Metric):
+    """Monotonically increasing count (e.g. messages received)."""
+
+    TYPE = "counter"
+
+    def inc(self, amount: float = 1.0) -> None:
+        """
+        Increment a counter without labels.
+
+        Args:
+            amount (float): How much to add.
+        """
+        self._default().inc(amount)
+
+    @staticmethod
+    def _new_child() -> _CounterValue:
+        return _CounterValue()
+
+
+class Gauge(_Metric):
+    """Value that goes up and down, set directly or read from a callback."""
+
+    TYPE = "gauge"
+
+    def set(self, value: float) -> None:
+        """
+        Set a gauge without labels.
+
+        Args:
+            value (float): The new value.
+        """
+        self._default().set(value)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """
+        Read a gauge without labels from a callback at scrape time.
+
+        Args:
+            function (Callable[[], float]): Returns the current value.
+        """
+        self._default().set_function(function)
+
+    @staticmethod
+    def _new_child() -> _GaugeValue:
+        return _GaugeValue()
+
+    def _samples(self) -> Iterator[str]:
+        for values, child in self._items():
+            try:
+                value = child.value
+            except Exception as e:
+                # A callback whose source is gone (e.g. a disposed pool)
+                logger.debug("Skipping gauge %s%s: %s", self.name, values, e)
+                continue
+            labels = _format_labels(self.labelnames, values)
+            yield f"{self.name}{labels} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    """Distribution of observed values (e.g. latencies) in fixed buckets."""
+
+    TYPE = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+        registry: "MetricsRegistry | None" = None,
+    ) -> None:
+        """
+        Initialize the histogram and register it.
+
+        Args:
+            name (str): Metric name (e.g. ``estufa_db_commit_seconds``).
+            documentation (str): Help text shown in the exposition.
+            labelnames (tuple[str, ...]): Label names, in order.
+            buckets (tuple[float, ...]): Upper bounds of the buckets, in
+                increasing order (``+Inf`` is implicit).
+            registry (MetricsRegistry | None): Registry to add the metric
+                to. Defaults to ``REGISTRY``.
+        """
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def observe(self, value: float) -> None:
+        """
+        Record a value in a histogram without labels.
+
+        Args:
+            value (float): The observed value.
+        """
+        self._default().observe(value)
+
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self.buckets)
+
+    def _samples(self) -> Iterator[str]:
+        names = (*self.labelnames, "le")
+        for values, child in self._items():
+            counts, total = child.snapshot()
+            cumulative = 0
+            for bound, count in zip(
+                (*self.buckets, math.inf),
+                counts,
+                strict=True,
+            ):
+                cumulative += count
+                labels = _format_labels(
+                    names,
+                    (*values, _format_value(bound)),
+                )
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, values)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class MetricsRegistry:
+    """Collection of metric families rendered together."""
+
+    def __init__(self) -> None:
+        """Initialize an empty registry."""
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> None:
+        """
+        Add a metric family.
+
+        Args:
+            metric (_Metric): The metric to add.
+
+        Raises:
+            ValueError: If a metric with the same name is registered.
+        """
+        with self._lock:
+            if metric.name in self._metrics:
+                msg = f"Metric {metric.name} already registered"
+                raise ValueError(msg)
+            self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        """
+        Render every metric in the text exposition format.
+
+        Returns:
+            str: The scrape body.
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = [line for metric in metrics for line in metric.collect()]
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
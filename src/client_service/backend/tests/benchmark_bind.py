@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Bind storm benchmark.
+
+Simulates the start of a process: a number of sensors (1000 by default)
+send their bind request at the same time, spread over a few MQTT
+connections. Reports how long the whole storm took, the bind latency
+percentiles, the failures and whether every sensor got a distinct id.
+The ``bind`` block of ``/health/ingestion`` shows how the requests were
+coalesced into transactions.
+
+Responses are read from the per-request topics
+(``sensores/bind/response/<req_id>``); ``--legacy-bind`` listens on the
+shared topic instead, to compare with the fan-out of the old protocol.
+
+Usage (from the repository root, with ``docker compose up -d`` running):
+    python src/client_service/backend/tests/benchmark_bind.py \
+        --sensors 1000 --connections 10
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+
+import paho.mqtt.client as mqtt
+
+TOPIC_BIND_REQUEST = "sensores/bind/request"
+TOPIC_BIND_RESPONSE = "sensores/bind/response"
+TOPIC_BIND_RESPONSE_ANY = f"{TOPIC_BIND_RESPONSE}/+"
+
+
+def api(
+    base_url: str,
+    method: str,
+    path: str,
+    body: dict | None = None,
+) -> dict | list | None:
+    """
+    Call the API and decode the JSON response.
+
+    Returns:
+        dict | list | None: The decoded response body, None if it is empty.
+    """
+    request = urllib.request.Request(  # noqa: S310
+        f"{base_url}{path}",
+        method=method,
+        data=json.dumps(body).encode() if body is not None else None,
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(request, timeout=30) as response:  # noqa: S310
+        return json.loads(response.read() or "null")
+
+
+class BindStorm:
+    """Sends the bind requests and collects the responses."""
+
+    def __init__(self, args: argparse.Namespace) -> None:
+        """
+        Initialize the storm.
+
+        Args:
+            args (argparse.Namespace): Command line arguments.
+        """
+        self.args = args
+        self.sent_at: dict[str, float] = {}
+        self.latencies: list[float] = []
+        self.sensor_ids: list[int] = []
+        self.failures = 0
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+        self.clients: list[mqtt.Client] = []
+
+    def on_message(
+        self,
+        _client: mqtt.Client,
+        _userdata: None,
+        msg: mqtt.MQTTMessage,
+    ) -> None:
+        """Record a bind response addressed to one of our sensors."""
+        received_at = time.perf_counter()
+        data = json.loads(msg.payload)
+        with self.lock:
+            sent_at = self.sent_at.pop(data.get("req_id"), None)
+            if sent_at is None:
+                return
+            self.latencies.append(received_at - sent_at)
+            if data.get("status") == "ok":
+                self.sensor_ids.append(int(data["id"]))
+            else:
+                self.failures += 1
+            if not self.sent_at:
+                self.done.set()
+
+    def connect(self) -> None:
+        """Open the MQTT connections and subscribe to the responses."""
+        topic = (
+            TOPIC_BIND_RESPONSE
+            if self.args.legacy_bind
+            else TOPIC_BIND_RESPONSE_ANY
+        )
+        for _ in range(self.args.connections):
+            client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+            client.on_message = self.on_message
+            client.connect(self.args.broker_host, self.args.broker_port, 60)
+            client.loop_start()
+            self.clients.append(client)
+        # A single subscriber, so every response is received once
+        self.clients[0].subscribe(topic, qos=1)
+        time.sleep(0.5)
+
+    def disconnect(self) -> None:
+        """Close the MQTT connections."""
+        for client in self.clients:
+            client.loop_stop()
+            client.disconnect()
+
+    def run(self) -> float:
+        """
+        Publish every bind request at once and wait for the responses.
+
+        Returns:
+            float: Seconds from the first request to the last response.
+        """
+        requests = [
+            (str(uuid.uuid4()), f"bench_sensor_{i}")
+            for i in range(self.args.sensors)
+        ]
+        started_at = time.perf_counter()
+        for i, (req_id, nome) in enumerate(requests):
+            with self.lock:
+                self.sent_at[req_id] = time.perf_counter()
+            self.clients[i % len(self.clients)].publish(
+                TOPIC_BIND_REQUEST,
+                json.dumps({"req_id": req_id, "nome": nome}),
+                qos=1,
+            )
+        if not self.done.wait(self.args.timeout):
+            sys.stdout.write(
+                f"[BIND] Timed out with {len(self.sent_at)} unanswered\n",
+            )
+        return time.perf_counter() - started_at
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    """
+    Nearest-rank percentile of a list of values.
+
+    Returns:
+        float: The value at ``fraction`` of the sorted list.
+    """
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main() -> None:
+    """Run the benchmark and exit non-zero on failures or id collisions."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--api-url", default="http://localhost:8007")
+    parser.add_argument("--broker-host", default="localhost")
+    parser.add_argument("--broker-port", type=int, default=1883)
+    parser.add_argument("--sensors", type=int, default=1000)
+    parser.add_argument("--connections", type=int, default=10)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--legacy-bind", action="store_true")
+    args = parser.parse_args()
+
+    process = api(
+        args.api_url,
+        "POST",
+        "/processes/start",
+        {"name": f"bind-bench-{int(time.time())}"},
+    )
+    sys.stdout.write(f"[SETUP] Started process {process['id']}\n")
+
+    storm = BindStorm(args)
+    storm.connect()
+    try:
+        elapsed = storm.run()
+    finally:
+        storm.disconnect()
+        api(args.api_url, "POST", f"/processes/end/{process['id']}")
+
+    try:
+        bind_stats = api(args.api_url, "GET", "/health/ingestion").get("bind")
+    except urllib.error.URLError:
+        bind_stats = None
+
+    answered = len(storm.latencies)
+    collisions = len(storm.sensor_ids) - len(set(storm.sensor_ids))
+    sys.stdout.write(
+        f"[RESULT] sensors={args.sensors} answered={answered} "
+        f"failed={storm.failures} duplicate_ids={collisions}\n",
+    )
+    if storm.latencies:
+        sys.stdout.write(
+            f"[RESULT] total={elapsed:.3f}s "
+            f"({answered / elapsed:,.0f} binds/s) "
+            f"p50={statistics.median(storm.latencies) * 1000:.1f}ms "
+            f"p99={percentile(storm.latencies, 0.99) * 1000:.1f}ms "
+            f"max={max(storm.latencies) * 1000:.1f}ms\n",
+        )
+    if bind_stats:
+        sys.stdout.write(f"[RESULT] coordinator: {bind_stats}\n")
+    ok = answered == args.sensors and not storm.failures and not collisions
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Measurement payload decode benchmark.
+
+Compares the decode cost per message of the previous JSON path
+(``bytes.decode`` + ``json.loads`` + ``int(str)``), the current JSON path
+(orjson when installed) and the binary v1 encoding, plus the payload size of
+each one.
+
+Usage (from src/client_service/backend):
+    PYTHONPATH=. python tests/benchmark_codec.py [--messages 200000]
+"""
+
+import argparse
+import importlib.util
+import itertools
+import json
+import sys
+import timeit
+from collections.abc import Callable
+
+import numpy as np
+
+from app.services.mqtt import messages
+
+
+def legacy_parse(raw_payload: bytes) -> tuple[int, float]:
+    """
+    Decode path used before the binary encoding existed.
+
+    Returns:
+        tuple[int, float]: The sensor id and the measured value.
+    """
+    data = json.loads(raw_payload.decode("utf-8"))
+    return int(data["id"]), float(data["medicao"])
+
+
+def main() -> None:
+    """Run the benchmark and print a table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--messages",
+        type=int,
+        default=200_000,
+        help="Number of payloads decoded per variant",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="Runs per variant (the best one is reported)",
+    )
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    readings = [
+        (int(rng.integers(1, 1_000_000)), round(float(rng.uniform(0, 100)), 2))
+        for _ in range(1000)
+    ]
+    json_payloads = [
+        json.dumps({"medicao": medicao, "id": str(sensor_id)}).encode()
+        for sensor_id, medicao in readings
+    ]
+    binary_payloads = list(
+        itertools.starmap(messages.encode_measurement, readings),
+    )
+    # parse_measurement uses orjson when it is installed
+    json_module = "orjson" if importlib.util.find_spec("orjson") else "json"
+
+    variants = {
+        "json (legacy)": (legacy_parse, json_payloads),
+        f"json ({json_module})": (
+            messages.parse_measurement,
+            json_payloads,
+        ),
+        "binary v1": (messages.parse_measurement, binary_payloads),
+    }
+
+    rounds = max(1, args.messages // len(readings))
+    total = rounds * len(readings)
+    sys.stdout.write(f"{total} messages per run, best of {args.repeat}\n\n")
+    sys.stdout.write(
+        f"{'variant':<20} {'bytes/msg':>10} {'ns/msg':>10} {'msgs/s':>12}\n",
+    )
+
+    for name, (parse, payloads) in variants.items():
+
+        def run(
+            parse: Callable[[bytes], tuple] = parse,
+            payloads: list[bytes] = payloads,
+        ) -> None:
+            for _ in range(rounds):
+                for payload in payloads:
+                    parse(payload)
+
+        best = min(timeit.repeat(run, number=1, repeat=args.repeat))
+        size = sum(len(p) for p in payloads) / len(payloads)
+        sys.stdout.write(
+            f"{name:<20} {size:>10.1f} {best / total * 1e9:>10.0f} "
+            f"{total / best:>12,.0f}\n",
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Dashboard load test: latency percentiles under concurrent requests.
+
+Runs against a running API with some stored data (e.g. after
+``stress_db_pool.py``). A number of concurrent clients repeatedly request
+the dashboard endpoints for the most recent processes and their sensors,
+including the heavy ``/processes/{id}/measurements``, while ``/health``
+is requested alongside them. Reports p50/p95/p99/max per endpoint. Since
+the routes await the async database client, ``/health`` must stay fast
+while the measurement queries are running.
+
+Usage (from the repository root, with ``docker compose up -d`` running):
+    python src/client_service/backend/tests/load_dashboard.py \
+        --clients 50 --duration 30
+"""
+
+import argparse
+import json
+import operator
+import re
+import statistics
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+
+def api(base_url: str, path: str) -> dict | list | None:
+    """
+    GET an API path and decode the JSON response.
+
+    Returns:
+        dict | list | None: The decoded response body, None if it is empty.
+    """
+    with urllib.request.urlopen(f"{base_url}{path}", timeout=60) as r:  # noqa: S310
+        return json.loads(r.read() or "null")
+
+
+def dashboard_paths(args: argparse.Namespace) -> list[str]:
+    """
+    Build the request mix from the most recent processes.
+
+    Returns:
+        list[str]: The API paths to request.
+
+    Raises:
+        RuntimeError: If no processes are stored.
+    """
+    processes = sorted(
+        api(args.api_url, "/processes/"),
+        key=operator.itemgetter("id"),
+        reverse=True,
+    )[: args.processes]
+    if not processes:
+        msg = "No processes stored; run stress_db_pool.py first"
+        raise RuntimeError(msg)
+
+    paths = ["/processes/"]
+    for process in processes:
+        paths += [
+            f"/processes/{process['id']}",
+            f"/processes/{process['id']}/measurements",
+        ]
+        measurements = api(
+            args.api_url,
+            f"/processes/{process['id']}/measurements",
+        )
+        for sensor_id in sorted({m["sensor_id"] for m in measurements})[:3]:
+            paths += [
+                f"/sensors/{sensor_id}",
+                f"/sensors/{sensor_id}/measurements",
+            ]
+    return paths
+
+
+class Load:
+    """Concurrent clients cycling through the request mix."""
+
+    def __init__(self, args: argparse.Namespace, paths: list[str]) -> None:
+        """
+        Initialize the load.
+
+        Args:
+            args (argparse.Namespace): Command line arguments.
+            paths (list[str]): The request mix.
+        """
+        self.args = args
+        self.paths = paths
+        self.latencies: dict[str, list[float]] = {}
+        self.errors: dict[str, int] = {}
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+
+    def run(self) -> None:
+        """Run the clients and the ``/health`` probe for the duration."""
+        threads = [
+            threading.Thread(target=self._client, args=(i,))
+            for i in range(self.args.clients)
+        ]
+        threads.append(threading.Thread(target=self._health_probe))
+        for thread in threads:
+            thread.start()
+        time.sleep(self.args.duration)
+        self.stop_event.set()
+        for thread in threads:
+            thread.join()
+
+    def _request(self, path: str) -> None:
+        # Group the per-id paths under one label
+        label = re.sub(r"/\d+", "/{id}", path)
+        started_at = time.perf_counter()
+        try:
+            api(self.args.api_url, path)
+        except (urllib.error.URLError, OSError, ValueError):
+            with self.lock:
+                self.errors[label] = self.errors.get(label, 0) + 1
+            return
+        elapsed = time.perf_counter() - started_at
+        with self.lock:
+            self.latencies.setdefault(label, []).append(elapsed)
+
+    def _client(self, offset: int) -> None:
+        i = offset
+        while not self.stop_event.is_set():
+            self._request(self.paths[i % len(self.paths)])
+            i += 1
+
+    def _health_probe(self) -> None:
+        while not self.stop_event.wait(self.args.health_interval):
+            self._request("/health")
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    """
+    Nearest-rank percentile of a list of values.
+
+    Returns:
+        float: The value at ``fraction`` of the sorted list.
+    """
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main() -> None:
+    """Run the load test; exit non-zero on errors or a slow ``/health``."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--api-url", default="http://localhost:8007")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--processes", type=int, default=3)
+    parser.add_argument("--health-interval", type=float, default=0.05)
+    parser.add_argument(
+        "--health-p99-ms",
+        type=float,
+        default=100.0,
+        help="Fail if the p99 of /health is above this (default: 100)",
+    )
+    args = parser.parse_args()
+
+    paths = dashboard_paths(args)
+    sys.stdout.write(f"[SETUP] {len(paths)} paths, {args.clients} clients\n")
+    load = Load(args, paths)
+    load.run()
+
+    for label, values in sorted(load.latencies.items()):
+        sys.stdout.write(
+            f"[LOAD] {label:<32} n={len(values):<6} "
+            f"p50={statistics.median(values) * 1000:7.1f}ms "
+            f"p95={percentile(values, 0.95) * 1000:7.1f}ms "
+            f"p99={percentile(values, 0.99) * 1000:7.1f}ms "
+            f"max={max(values) * 1000:7.1f}ms "
+            f"errors={load.errors.get(label, 0)}\n",
+        )
+
+    health = load.latencies.get("/health", [])
+    health_p99 = percentile(health, 0.99) * 1000 if health else float("inf")
+    errors = sum(load.errors.values())
+    sys.stdout.write(
+        f"[RESULT] health_p99={health_p99:.1f}ms errors={errors}\n",
+    )
+    sys.exit(0 if health_p99 <= args.health_p99_ms and not errors else 1)
+
+
+if __name__ == "__main__":
+    main()
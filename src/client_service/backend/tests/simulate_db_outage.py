@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Database outage simulation for the measurement spool.
+
+Runs against the docker compose stack: binds a sensor, publishes a stream
+of numbered measurements, stops the Postgres container in the middle of the
+stream and starts it again. Once the API reports an empty spool and buffer,
+every sequence number must be stored exactly once. The containers are
+driven with ``docker compose`` through ``subprocess`` (fixed argument
+lists, no shell).
+
+Usage (from the repository root, with ``docker compose up -d`` running):
+    python src/client_service/backend/tests/simulate_db_outage.py \
+        --count 3000 --rate 200 --outage-after 3 --outage-duration 20
+"""
+
+import argparse
+import json
+import subprocess  # noqa: S404
+import sys
+import threading
+import time
+import urllib.request
+import uuid
+
+import paho.mqtt.client as mqtt
+
+TOPIC_MEASUREMENT = "sensores/medicao"
+TOPIC_BIND_REQUEST = "sensores/bind/request"
+TOPIC_BIND_RESPONSE = "sensores/bind/response"
+
+
+def api(
+    base_url: str,
+    method: str,
+    path: str,
+    body: dict | None = None,
+) -> dict | list | None:
+    """
+    Call the API and decode the JSON response.
+
+    Returns:
+        dict | list | None: The decoded response body, None if it is empty.
+    """
+    request = urllib.request.Request(  # noqa: S310
+        f"{base_url}{path}",
+        method=method,
+        data=json.dumps(body).encode() if body is not None else None,
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(request, timeout=30) as response:  # noqa: S310
+        return json.loads(response.read() or "null")
+
+
+def bind_sensor(client: mqtt.Client, timeout: float = 10.0) -> int:
+    """
+    Run the bind protocol.
+
+    Returns:
+        int: The id the API assigned to the sensor.
+
+    Raises:
+        RuntimeError: If the API does not answer or refuses the bind.
+    """
+    req_id = str(uuid.uuid4())
+    bound = threading.Event()
+    result: dict = {}
+
+    def on_message(
+        _client: mqtt.Client,
+        _userdata: object,
+        msg: mqtt.MQTTMessage,
+    ) -> None:
+        data = json.loads(msg.payload)
+        if data.get("req_id") == req_id:
+            result.update(data)
+            bound.set()
+
+    client.on_message = on_message
+    client.subscribe(TOPIC_BIND_RESPONSE, qos=1)
+    time.sleep(0.5)
+    client.publish(
+        TOPIC_BIND_REQUEST,
+        json.dumps({"req_id": req_id, "nome": "outage_sim"}),
+        qos=1,
+    )
+    if not bound.wait(timeout) or result.get("status") != "ok":
+        msg = f"Bind failed: {result or 'no response'}"
+        raise RuntimeError(msg)
+    return int(result["id"])
+
+
+def compose(args: argparse.Namespace, command: str) -> None:
+    """Run ``docker compose <command> <service>``."""
+    sys.stdout.write(f"[OUTAGE] docker compose {command} {args.service}\n")
+    subprocess.run(  # noqa: S603
+        [  # noqa: S607
+            "docker",
+            "compose",
+            "-f",
+            args.compose_file,
+            command,
+            args.service,
+        ],
+        check=True,
+    )
+
+
+def run_outage(args: argparse.Namespace) -> None:
+    """Stop the database for a while in the middle of the stream."""
+    time.sleep(args.outage_after)
+    compose(args, "stop")
+    time.sleep(args.outage_duration)
+    compose(args, "start")
+
+
+def wait_for_drain(args: argparse.Namespace) -> dict:
+    """
+    Wait until nothing is left in the ingestion pipeline.
+
+    Returns:
+        dict: The last ``/health/ingestion`` statistics.
+
+    Raises:
+        TimeoutError: If the pipeline is not empty after ``--drain-timeout``.
+    """
+    deadline = time.monotonic() + args.drain_timeout
+    while time.monotonic() < deadline:
+        try:
+            stats = api(args.api_url, "GET", "/health/ingestion")
+        except OSError:
+            time.sleep(1)
+            continue
+        spool = stats.get("spool") or {}
+        executor = stats.get("executor") or {}
+        sys.stdout.write(
+            f"[DRAIN] buffered={stats['buffered_measurements']} "
+            f"spool_pending={spool.get('pending')} "
+            f"replay_rate={spool.get('replay_rate', 0):.0f}/s\n",
+        )
+        if (
+            stats["buffered_measurements"] == 0
+            and not spool.get("pending")
+            and not executor.get("queue_depth")
+        ):
+            return stats
+        time.sleep(1)
+    raise TimeoutError("Ingestion pipeline did not drain in time")
+
+
+def main() -> None:
+    """Run the simulation and exit non-zero if readings were lost."""
+    parser = argparse.ArgumentParser(
+        description="Kill Postgres mid-stream and check no readings are lost",
+    )
+    parser.add_argument("--api-url", default="http://localhost:8007")
+    parser.add_argument("--broker-host", default="localhost")
+    parser.add_argument("--broker-port", type=int, default=1883)
+    parser.add_argument("--compose-file", default="docker-compose.yml")
+    parser.add_argument("--service", default="postgres")
+    parser.add_argument("--count", type=int, default=3000)
+    parser.add_argument("--rate", type=float, default=200.0)
+    parser.add_argument("--outage-after", type=float, default=3.0)
+    parser.add_argument("--outage-duration", type=float, default=20.0)
+    parser.add_argument("--drain-timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    process = api(
+        args.api_url,
+        "POST",
+        "/processes/start",
+        {"name": f"outage-sim-{int(time.time())}"},
+    )
+    sys.stdout.write(f"[SETUP] Started process {process['id']}\n")
+
+    client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+    client.connect(args.broker_host, args.broker_port, 60)
+    client.loop_start()
+    try:
+        sensor_id = bind_sensor(client)
+        sys.stdout.write(f"[SETUP] Bound sensor {sensor_id}\n")
+
+        outage = threading.Thread(target=run_outage, args=(args,))
+        outage.start()
+
+        interval = 1.0 / args.rate
+        started_at = time.monotonic()
+        for seq in range(args.count):
+            payload = {"id": sensor_id, "medicao": seq % 100, "seq": seq}
+            client.publish(TOPIC_MEASUREMENT, json.dumps(payload), qos=1)
+            next_at = started_at + (seq + 1) * interval
+            time.sleep(max(0.0, next_at - time.monotonic()))
+        sys.stdout.write(f"[STREAM] Published {args.count} measurements\n")
+        outage.join()
+    finally:
+        client.loop_stop()
+        client.disconnect()
+
+    wait_for_drain(args)
+    stored = api(args.api_url, "GET", f"/sensors/{sensor_id}/measurements")
+    api(args.api_url, "POST", f"/processes/end/{process['id']}")
+
+    seqs = [m["seq"] for m in stored]
+    missing = sorted(set(range(args.count)) - set(seqs))
+    duplicates = len(seqs) - len(set(seqs))
+    sys.stdout.write(
+        f"[RESULT] stored={len(seqs)} expected={args.count} "
+        f"missing={len(missing)} duplicates={duplicates}\n",
+    )
+    if missing:
+        sys.stdout.write(f"[RESULT] First missing seqs: {missing[:20]}\n")
+    sys.exit(1 if missing or duplicates else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,11 +9,14 @@ implementing the same state machine as the embedded code.
 import argparse
 import json
 import random
+import struct
 import time
 import uuid
 from enum import Enum
 
 import paho.mqtt.client as mqtt
+from paho.mqtt.packettypes import PacketTypes
+from paho.mqtt.properties import Properties
 
 
 class Estado(Enum):
@@ -32,6 +35,7 @@ class SensorSimulator:
 
     # MQTT Topics
     TOPIC_MEASUREMENT = "sensores/medicao"
+    TOPIC_MEASUREMENT_BATCH = "sensores/medicao/lote"
     TOPIC_PROCESS = "sensores/processo"
     TOPIC_BIND_REQUEST = "sensores/bind/request"
     TOPIC_BIND_RESPONSE = "sensores/bind/response"
@@ -44,6 +48,11 @@ class SensorSimulator:
         broker_port: int,
         sensor_name: str,
         interval: int,
+        *,
+        binary: bool = False,
+        batch_size: int = 1,
+        mqtt5: bool = False,
+        legacy_bind: bool = False,
     ) -> None:
         """
         Initialize the sensor simulator.
@@ -53,11 +62,24 @@ class SensorSimulator:
             broker_port: MQTT broker port.
             sensor_name: Name of the sensor.
             interval: Measurement interval in seconds.
+            binary: Send measurements in the binary v1 encoding instead of
+                JSON.
+            batch_size: Readings buffered before publishing them together
+                on the batch topic (1 publishes every reading).
+            mqtt5: Connect with MQTT v5 and send the bind request with a
+                Response Topic and Correlation Data.
+            legacy_bind: Wait for the bind response on the shared topic, as
+                the current firmware does.
         """
         self.broker_host = broker_host
         self.broker_port = broker_port
         self.sensor_name = sensor_name
         self.interval = interval
+        self.binary = binary
+        self.batch_size = batch_size
+        self.mqtt5 = mqtt5
+        self.legacy_bind = legacy_bind
+        self.leituras: list[tuple[float, float]] = []
 
         # State machine
         self.estado_atual = Estado.AGUARDE  # Começa aguardando, não em BIND
@@ -65,10 +87,14 @@ class SensorSimulator:
         self.processo_finalizado = False
         self.bind_ok = False
         self.req_id = ""
+        self.bind_topic = self.TOPIC_BIND_RESPONSE
         self.sensor_id = ""
 
         # MQTT Client
-        self.client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+        self.client = mqtt.Client(
+            mqtt.CallbackAPIVersion.VERSION2,
+            protocol=mqtt.MQTTv5 if mqtt5 else mqtt.MQTTv311,
+        )
         self.client.on_message = self._on_message
         self.client.on_connect = self._on_connect
 
@@ -86,7 +112,8 @@ class SensorSimulator:
         """Callback when connected to MQTT broker."""
         if rc == 0:
             print(
-                f"[✓] Connected to MQTT broker at {self.broker_host}:{self.broker_port}"
+                "[✓] Connected to MQTT broker at "
+                f"{self.broker_host}:{self.broker_port}",
             )
             # Subscribe to process commands immediately
             self.client.subscribe(self.TOPIC_PROCESS)
@@ -103,7 +130,7 @@ class SensorSimulator:
         """Callback when a message is received."""
         payload = msg.payload.decode("utf-8")
 
-        if msg.topic == self.TOPIC_BIND_RESPONSE:
+        if msg.topic == self.bind_topic:
             self._handle_bind_response(payload)
         elif msg.topic == self.TOPIC_PROCESS:
             self._handle_process_command(payload)
@@ -139,18 +166,30 @@ class SensorSimulator:
         """Handle BIND state."""
         print("[BIND] Solicitando ID ao servidor...")
 
-        # Subscribe to bind response topic
-        self.client.subscribe(self.TOPIC_BIND_RESPONSE)
-        print(f"[BIND] ✓ Subscribed to {self.TOPIC_BIND_RESPONSE}")
-
         self.req_id = self._generate_uuid()
 
+        # Subscribe to the response topic of this request only
+        if not self.legacy_bind:
+            self.bind_topic = f"{self.TOPIC_BIND_RESPONSE}/{self.req_id}"
+        self.client.subscribe(self.bind_topic)
+        print(f"[BIND] ✓ Subscribed to {self.bind_topic}")
+
         request = {
             "req_id": self.req_id,
             "nome": self.sensor_name,
         }
 
-        self.client.publish(self.TOPIC_BIND_REQUEST, json.dumps(request))
+        properties = None
+        if self.mqtt5:
+            properties = Properties(PacketTypes.PUBLISH)
+            properties.ResponseTopic = self.bind_topic
+            properties.CorrelationData = self.req_id.encode()
+
+        self.client.publish(
+            self.TOPIC_BIND_REQUEST,
+            json.dumps(request),
+            properties=properties,
+        )
         print(f"[BIND] → Publicado em {self.TOPIC_BIND_REQUEST}")
         print(f"[BIND]   req_id: {self.req_id}")
         print(f"[BIND]   nome: {self.sensor_name}")
@@ -183,16 +222,65 @@ class SensorSimulator:
         # Simulate analog reading (random value between 0-100)
         medicao = round(random.uniform(0, 100), 2)
 
-        message = {
-            "medicao": medicao,
-            "id": self.sensor_id,
-        }
-
-        self.client.publish(self.TOPIC_MEASUREMENT, json.dumps(message))
+        if self.batch_size > 1:
+            enviadas = self._bufferizar_medicao(medicao)
+            acao = (
+                f"enviada em lote de {enviadas}" if enviadas else "armazenada"
+            )
+        else:
+            self._publicar_medicao(medicao)
+            acao = "enviada"
         print(
-            f"[MEDICAO] 📊 Medição enviada: {medicao:.2f} (ID: {self.sensor_id})"
+            f"[MEDICAO] 📊 Medição {acao}: {medicao:.2f} (ID: {self.sensor_id})"
         )
 
+    def _publicar_medicao(self, medicao: float) -> None:
+        """Publish a single reading on the measurement topic."""
+        if self.binary:
+            # Header 0x01 + uint32 id + float64 value (little-endian)
+            message = struct.pack("<BId", 0x01, int(self.sensor_id), medicao)
+        else:
+            message = json.dumps({
+                "medicao": medicao,
+                "id": self.sensor_id,
+            })
+
+        self.client.publish(self.TOPIC_MEASUREMENT, message)
+
+    def _bufferizar_medicao(self, medicao: float) -> int:
+        """
+        Buffer a reading and publish the batch once it is full.
+
+        Returns:
+            int: The number of readings published, 0 while buffering.
+        """
+        self.leituras.append((medicao, time.monotonic()))
+        if len(self.leituras) < self.batch_size:
+            return 0
+
+        agora = time.monotonic()
+        leituras = [
+            (valor, int((agora - lida_em) * 1000))
+            for valor, lida_em in self.leituras
+        ]
+        if self.binary:
+            # Header 0x02 + uint32 id + uint16 count + (float64, uint32 age)
+            message = struct.pack(
+                "<BIH", 0x02, int(self.sensor_id), len(leituras)
+            ) + b"".join(struct.pack("<dI", *leitura) for leitura in leituras)
+        else:
+            message = json.dumps({
+                "id": self.sensor_id,
+                "leituras": [
+                    {"medicao": valor, "idade_ms": idade}
+                    for valor, idade in leituras
+                ],
+            })
+
+        self.client.publish(self.TOPIC_MEASUREMENT_BATCH, message)
+        self.leituras = []
+        return len(leituras)
+
     def _handle_medicao(self) -> None:
         """Handle MEDICAO state."""
         print("[MEDICAO] Realizando medição...")
@@ -244,7 +332,8 @@ class SensorSimulator:
         print(f"Interval: {self.interval}s")
         print("=" * 60)
         print(
-            "\n[INFO] Fluxo: AGUARDE → (recebe 'iniciar') → BIND → MEDICAO → DEEP_SLEEP...\n"
+            "\n[INFO] Fluxo: AGUARDE → (recebe 'iniciar') → BIND → MEDICAO → "
+            "DEEP_SLEEP...\n",
         )
 
         # Connect to MQTT broker
@@ -311,6 +400,28 @@ def main() -> None:
         default=10,
         help="Measurement interval in seconds (default: 10)",
     )
+    parser.add_argument(
+        "--binary",
+        action="store_true",
+        help="Send measurements in the binary encoding instead of JSON",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1,
+        help="Readings buffered per batch publish (default: 1, no batching)",
+    )
+
+    parser.add_argument(
+        "--mqtt5",
+        action="store_true",
+        help="Use MQTT v5 and send a Response Topic with the bind request",
+    )
+    parser.add_argument(
+        "--legacy-bind",
+        action="store_true",
+        help="Wait for the bind response on the shared topic",
+    )
 
     args = parser.parse_args()
 
@@ -319,6 +430,10 @@ def main() -> None:
         broker_port=args.broker_port,
         sensor_name=args.sensor_name,
         interval=args.interval,
+        binary=args.binary,
+        batch_size=args.batch_size,
+        mqtt5=args.mqtt5,
+        legacy_bind=args.legacy_bind,
     )
 
     simulator.run()
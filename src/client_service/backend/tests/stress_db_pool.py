@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Concurrency stress test for the database connection pool.
+
+Runs against the docker compose stack: binds a few sensors, streams numbered
+measurements from them over MQTT while several threads read the dashboard
+endpoints in parallel. Reports the API latency percentiles and errors per
+endpoint, the pool metrics exposed on ``/metrics`` and whether every
+measurement was stored exactly once. With the API started with a small pool
+(e.g. ``DB_POOL_SIZE=2 DB_MAX_OVERFLOW=0``) the readers have to queue for
+connections, which shows up as latency, never as errors.
+
+Usage (from the repository root, with ``docker compose up -d`` running):
+    python src/client_service/backend/tests/stress_db_pool.py \
+        --sensors 20 --rate 500 --duration 30 --readers 16
+"""
+
+import argparse
+import json
+import re
+import statistics
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+
+import paho.mqtt.client as mqtt
+
+TOPIC_MEASUREMENT = "sensores/medicao"
+TOPIC_BIND_REQUEST = "sensores/bind/request"
+TOPIC_BIND_RESPONSE = "sensores/bind/response"
+
+
+def api(
+    base_url: str,
+    method: str,
+    path: str,
+    body: dict | None = None,
+) -> dict | list | None:
+    """
+    Call the API and decode the JSON response.
+
+    Returns:
+        dict | list | None: The decoded response body, None if it is empty.
+    """
+    request = urllib.request.Request(  # noqa: S310
+        f"{base_url}{path}",
+        method=method,
+        data=json.dumps(body).encode() if body is not None else None,
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(request, timeout=30) as response:  # noqa: S310
+        return json.loads(response.read() or "null")
+
+
+def bind_sensors(client: mqtt.Client, count: int, timeout: float) -> list[int]:
+    """
+    Bind ``count`` sensors.
+
+    Returns:
+        list[int]: The ids the API assigned to the sensors.
+
+    Raises:
+        RuntimeError: If not every sensor was bound within ``timeout``.
+    """
+    pending = {str(uuid.uuid4()) for _ in range(count)}
+    sensor_ids: list[int] = []
+    lock = threading.Lock()
+    done = threading.Event()
+
+    def on_message(
+        _client: mqtt.Client,
+        _userdata: object,
+        msg: mqtt.MQTTMessage,
+    ) -> None:
+        data = json.loads(msg.payload)
+        with lock:
+            if data.get("req_id") not in pending:
+                return
+            pending.discard(data["req_id"])
+            if data.get("status") == "ok":
+                sensor_ids.append(int(data["id"]))
+            if not pending:
+                done.set()
+
+    client.on_message = on_message
+    client.subscribe(f"{TOPIC_BIND_RESPONSE}/+", qos=1)
+    time.sleep(0.5)
+    for i, req_id in enumerate(list(pending)):
+        client.publish(
+            TOPIC_BIND_REQUEST,
+            json.dumps({"req_id": req_id, "nome": f"pool_stress_{i}"}),
+            qos=1,
+        )
+    if not done.wait(timeout) or len(sensor_ids) != count:
+        msg = f"Bound {len(sensor_ids)} of {count} sensors"
+        raise RuntimeError(msg)
+    return sensor_ids
+
+
+class Readers:
+    """Dashboard readers hitting the API until stopped."""
+
+    def __init__(
+        self,
+        args: argparse.Namespace,
+        process_id: int,
+        sensor_ids: list[int],
+    ) -> None:
+        """
+        Initialize the readers.
+
+        Args:
+            args (argparse.Namespace): Command line arguments.
+            process_id (int): Process whose data is read.
+            sensor_ids (list[int]): Sensors whose data is read.
+        """
+        self.args = args
+        self.paths = [
+            "/health",
+            "/processes/",
+            f"/processes/{process_id}",
+            f"/processes/{process_id}/measurements",
+            *(f"/sensors/{sensor_id}" for sensor_id in sensor_ids[:3]),
+            *(
+                f"/sensors/{sensor_id}/measurements"
+                for sensor_id in sensor_ids[:3]
+            ),
+        ]
+        self.latencies: dict[str, list[float]] = {}
+        self.errors: dict[str, int] = {}
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.threads: list[threading.Thread] = []
+
+    def start(self) -> None:
+        """Start the reader threads."""
+        for i in range(self.args.readers):
+            thread = threading.Thread(target=self._run, args=(i,))
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self) -> None:
+        """Stop the reader threads."""
+        self.stop_event.set()
+        for thread in self.threads:
+            thread.join()
+
+    def _run(self, offset: int) -> None:
+        i = offset
+        while not self.stop_event.is_set():
+            path = self.paths[i % len(self.paths)]
+            # Group the per-id paths under one label
+            label = re.sub(r"/\d+", "/{id}", path)
+            started_at = time.perf_counter()
+            try:
+                api(self.args.api_url, "GET", path)
+            except (urllib.error.URLError, OSError, ValueError):
+                with self.lock:
+                    self.errors[label] = self.errors.get(label, 0) + 1
+            else:
+                elapsed = time.perf_counter() - started_at
+                with self.lock:
+                    self.latencies.setdefault(label, []).append(elapsed)
+            i += 1
+
+
+def stream(
+    client: mqtt.Client,
+    args: argparse.Namespace,
+    ids: list[int],
+) -> int:
+    """
+    Publish numbered measurements round-robin.
+
+    Returns:
+        int: The number of measurements published.
+    """
+    interval = 1.0 / args.rate
+    count = int(args.rate * args.duration)
+    started_at = time.monotonic()
+    for n in range(count):
+        sensor_id = ids[n % len(ids)]
+        seq = n // len(ids)
+        payload = {"id": sensor_id, "medicao": seq % 100, "seq": seq}
+        client.publish(TOPIC_MEASUREMENT, json.dumps(payload), qos=1)
+        next_at = started_at + (n + 1) * interval
+        time.sleep(max(0.0, next_at - time.monotonic()))
+    return count
+
+
+def wait_for_drain(args: argparse.Namespace) -> None:
+    """
+    Wait until the ingestion buffer and spool are empty.
+
+    Raises:
+        TimeoutError: If they are not empty after ``--drain-timeout``.
+    """
+    deadline = time.monotonic() + args.drain_timeout
+    while time.monotonic() < deadline:
+        stats = api(args.api_url, "GET", "/health/ingestion")
+        spool = stats.get("spool") or {}
+        executor = stats.get("executor") or {}
+        if (
+            stats["buffered_measurements"] == 0
+            and not spool.get("pending")
+            and not executor.get("queue_depth")
+        ):
+            return
+        time.sleep(1)
+    raise TimeoutError("Ingestion pipeline did not drain in time")
+
+
+def pool_metrics(base_url: str) -> list[str]:
+    """
+    Get the pool lines of ``/metrics``.
+
+    Returns:
+        list[str]: The ``estufa_db_pool`` samples, without histogram
+        buckets.
+    """
+    with urllib.request.urlopen(f"{base_url}/metrics", timeout=30) as r:  # noqa: S310
+        body = r.read().decode()
+    return [
+        line
+        for line in body.splitlines()
+        if line.startswith("estufa_db_pool") and "_bucket" not in line
+    ]
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    """
+    Nearest-rank percentile of a list of values.
+
+    Returns:
+        float: The value at ``fraction`` of the sorted list.
+    """
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main() -> None:
+    """Run the stress test; exit non-zero on API errors or lost readings."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--api-url", default="http://localhost:8007")
+    parser.add_argument("--broker-host", default="localhost")
+    parser.add_argument("--broker-port", type=int, default=1883)
+    parser.add_argument("--sensors", type=int, default=20)
+    parser.add_argument("--rate", type=float, default=500.0)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--drain-timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    process = api(
+        args.api_url,
+        "POST",
+        "/processes/start",
+        {"name": f"pool-stress-{int(time.time())}"},
+    )
+    sys.stdout.write(f"[SETUP] Started process {process['id']}\n")
+
+    client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+    client.connect(args.broker_host, args.broker_port, 60)
+    client.loop_start()
+    try:
+        sensor_ids = bind_sensors(client, args.sensors, timeout=30)
+        sys.stdout.write(f"[SETUP] Bound {len(sensor_ids)} sensors\n")
+
+        readers = Readers(args, process["id"], sensor_ids)
+        readers.start()
+        try:
+            published = stream(client, args, sensor_ids)
+        finally:
+            readers.stop()
+        sys.stdout.write(f"[STREAM] Published {published} measurements\n")
+    finally:
+        client.loop_stop()
+        client.disconnect()
+
+    wait_for_drain(args)
+    stored = api(
+        args.api_url,
+        "GET",
+        f"/processes/{process['id']}/measurements",
+    )
+    api(args.api_url, "POST", f"/processes/end/{process['id']}")
+
+    for label, values in sorted(readers.latencies.items()):
+        sys.stdout.write(
+            f"[API] {label:<32} n={len(values):<6} "
+            f"p50={statistics.median(values) * 1000:7.1f}ms "
+            f"p99={percentile(values, 0.99) * 1000:7.1f}ms "
+            f"errors={readers.errors.get(label, 0)}\n",
+        )
+    for line in pool_metrics(args.api_url):
+        sys.stdout.write(f"[POOL] {line}\n")
+
+    keys = [(m["sensor_id"], m["seq"]) for m in stored]
+    duplicates = len(keys) - len(set(keys))
+    errors = sum(readers.errors.values())
+    sys.stdout.write(
+        f"[RESULT] stored={len(keys)} expected={published} "
+        f"duplicates={duplicates} api_errors={errors}\n",
+    )
+    ok = len(set(keys)) == published and not duplicates and not errors
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()